@@ -488,14 +488,18 @@ create_dirs() {
 
 ensure_memory_file() {
   mkdir -p "$(dirname "$TEST_MEMORY_FILE")"
-  python3 - "$TEST_MEMORY_FILE" "$(iso_now)" <<'PY'
+  python3 - "$SCRIPT_DIR" "$TEST_MEMORY_FILE" "$(iso_now)" <<'PY'
 import json
 import sys
 from collections import defaultdict
 from pathlib import Path
 
-path = Path(sys.argv[1])
-now = sys.argv[2]
+sys.path.insert(0, sys.argv[1])
+from memory_eviction import lock_store
+
+path = Path(sys.argv[2])
+now = sys.argv[3]
+lock = lock_store(path.parent)
 
 default_playbooks = {
     "frontend_unreachable": [
@@ -1708,15 +1712,19 @@ upsert_test_memory() {
   snippet="$(tail -n 20 "$log_file" | tr '\n' ' ' | sed -E 's/[[:space:]]+/ /g' | cut -c1-280)"
 
   local delta_json
-  delta_json="$(python3 - "$TEST_MEMORY_FILE" "$FEATURE" "$VERSION" "$TEST_TYPE" "$case_id" "$SELECTED_TOOL" "$signature" "$suggestion" "$snippet" <<'PY'
+  delta_json="$(python3 - "$SCRIPT_DIR" "$TEST_MEMORY_FILE" "$FEATURE" "$VERSION" "$TEST_TYPE" "$case_id" "$SELECTED_TOOL" "$signature" "$suggestion" "$snippet" <<'PY'
 import json, sys
 from datetime import datetime, timezone
 from pathlib import Path
 
-(path, feature, version, test_type, case_id, tool, signature, suggestion, snippet) = sys.argv[1:]
+(script_dir, path, feature, version, test_type, case_id, tool, signature, suggestion, snippet) = sys.argv[1:]
 now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
+sys.path.insert(0, script_dir)
+from memory_eviction import config_path_for, evict_sections, lock_store, read_limits
+
 p = Path(path)
+lock = lock_store(p.parent)
 if p.exists():
     try:
         data = json.loads(p.read_text(encoding="utf-8"))
@@ -1822,6 +1830,8 @@ signatures.sort(key=lambda x: x.get("last_seen", ""), reverse=True)
 data["pitfalls"] = pitfalls[:500]
 data["signatures"] = signatures[:500]
 data["updated_at"] = now
+limits = read_limits(config_path_for(Path(script_dir).parent))
+evict_sections(p.parent, p.name, data, limits, ["test_learnings"])
 
 p.parent.mkdir(parents=True, exist_ok=True)
 p.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -1857,21 +1867,26 @@ PY
   record_event "case_failure" "$case_id" "failed" "$suggestion" "{\"signature\":\"$signature\",\"log_file\":\"$log_file\"}"
 }
 
+
 update_playbook_outcome() {
   local signature="$1"
   local outcome="$2" # success|fail
-  python3 - "$TEST_MEMORY_FILE" "$signature" "$outcome" "$(iso_now)" <<'PY'
+  python3 - "$SCRIPT_DIR" "$TEST_MEMORY_FILE" "$signature" "$outcome" "$(iso_now)" <<'PY'
 import json
 import sys
 from pathlib import Path
 
-path = Path(sys.argv[1])
-signature = sys.argv[2]
-outcome = sys.argv[3]
-now = sys.argv[4]
+sys.path.insert(0, sys.argv[1])
+from memory_eviction import lock_store
+
+path = Path(sys.argv[2])
+signature = sys.argv[3]
+outcome = sys.argv[4]
+now = sys.argv[5]
 
 if not path.exists():
     raise SystemExit(0)
+lock = lock_store(path.parent)
 try:
     data = json.loads(path.read_text(encoding="utf-8"))
 except Exception:
@@ -2775,19 +2790,23 @@ consolidate_test_memory() {
   local failed="$3"
   local blocked="$4"
 
-  python3 - "$TEST_MEMORY_FILE" "$SESSION_ID" "$VERSION" "$FEATURE" "$TEST_TYPE" "$final_status" "$SESSION_STARTED_AT" "$SESSION_STOPPED_AT" "$passed" "$failed" "$blocked" "$(iso_now)" <<'PY'
+  python3 - "$SCRIPT_DIR" "$TEST_MEMORY_FILE" "$SESSION_ID" "$VERSION" "$FEATURE" "$TEST_TYPE" "$final_status" "$SESSION_STARTED_AT" "$SESSION_STOPPED_AT" "$passed" "$failed" "$blocked" "$(iso_now)" <<'PY'
 import json
 import sys
 from pathlib import Path
 
 (
-    memory_file, session_id, version, feature, test_type, status,
+    script_dir, memory_file, session_id, version, feature, test_type, status,
     started_at, stopped_at, passed, failed, blocked, now
 ) = sys.argv[1:]
 
+sys.path.insert(0, script_dir)
+from memory_eviction import config_path_for, evict_sections, lock_store, read_limits
+
 p = Path(memory_file)
 if not p.exists():
     raise SystemExit(0)
+lock = lock_store(p.parent)
 try:
     data = json.loads(p.read_text(encoding="utf-8"))
 except Exception:
@@ -2810,6 +2829,7 @@ sessions.append({
 sessions = sorted(sessions, key=lambda x: x.get("stopped_at", ""), reverse=True)[:500]
 data["sessions"] = sessions
 data["updated_at"] = now
+evict_sections(p.parent, p.name, data, read_limits(config_path_for(Path(script_dir).parent)), ["sessions"])
 p.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
 PY
 }
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Benchmark ScopeMatcher against the per-call substring classifier.
+
+Usage:
+  python3 scripts/bench_scope_matcher.py --proposals 10000
+  python3 scripts/bench_scope_matcher.py --output docs/product/v3.7.0/execution/benchmarks/scope-matcher.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from ptk_cli import RISK_HIGH_KEYWORDS, ScopeMatcher, parse_acceptance_criteria
+
+
+def _repo_root() -> Path:
+    return Path(__file__).resolve().parents[1]
+
+
+def _legacy_classify(proposal: str, ac_scope: dict[str, Any]) -> tuple[str, str]:
+    # Pre-index implementation, kept verbatim as the baseline.
+    proposal_low = proposal.lower()
+    if any(k in proposal_low for k in RISK_HIGH_KEYWORDS):
+        return "out-of-scope", "high"
+
+    ac_text = " ".join(str(item.get("description", "")).lower() for item in ac_scope.get("acceptance_criteria", []))
+    terms = [x for x in re.split(r"[\s,，。;；/]+", proposal_low) if len(x) >= 2]
+    overlap = any(term in ac_text for term in terms)
+    if overlap:
+        return "in-scope", "low"
+    return "enhancement-proposal", "low"
+
+
+def _proposals(ac_scope: dict[str, Any], count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    vocab = " ".join(str(item.get("description", "")) for item in ac_scope.get("acceptance_criteria", [])).split()
+    vocab += ["export", "billing", "dark-mode", "webhook", "多语言", "批量导入", *RISK_HIGH_KEYWORDS]
+    return [" ".join(rng.choice(vocab) for _ in range(rng.randint(2, 6))) for _ in range(count)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark proposal classification throughput")
+    parser.add_argument("--version", default="v3.7.0", help="version folder providing the user story")
+    parser.add_argument("--proposals", type=int, default=10000, help="number of synthetic proposals")
+    parser.add_argument("--seed", type=int, default=3701, help="random seed")
+    parser.add_argument("--output", default="", help="write result json (repo-relative)")
+    args = parser.parse_args()
+
+    root = _repo_root()
+    story = root / "docs" / "product" / args.version / "user-story" / "ptk-cli-scope-guard.md"
+    ac_scope = parse_acceptance_criteria(story)
+    proposals = _proposals(ac_scope, args.proposals, args.seed)
+
+    started = time.perf_counter()
+    legacy = [_legacy_classify(p, ac_scope) for p in proposals]
+    legacy_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    matcher = ScopeMatcher(ac_scope)
+    build_ms = (time.perf_counter() - started) * 1000
+    matches = [matcher.classify(p) for p in proposals]
+    indexed_ms = (time.perf_counter() - started) * 1000
+
+    mismatches = sum(1 for old, new in zip(legacy, matches) if old != (new.deviation_type, new.risk))
+    result = {
+        "metric": "scope_matcher_throughput",
+        "proposal_count": len(proposals),
+        "ac_count": len(ac_scope.get("acceptance_criteria", [])),
+        "legacy_ms": round(legacy_ms, 2),
+        "indexed_ms": round(indexed_ms, 2),
+        "index_build_ms": round(build_ms, 2),
+        "speedup": round(legacy_ms / indexed_ms, 2) if indexed_ms else None,
+        "classification_mismatches": mismatches,
+        "pass": mismatches == 0,
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+    if args.output:
+        out_path = root / args.output
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0 if result["pass"] else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,15 @@
 #!/usr/bin/env python3
-"""Build sha256 manifest for terminal evidence refs."""
+"""Build sha256 manifest for terminal evidence refs.
+
+Schema 1.1 (default) tags each item with its evidence class and adds a Merkle tree
+(one subtree per class, single root digest); --schema 1.0 emits the legacy flat list.
+Use verify_evidence_manifest.py for subtree/AC verification and manifest diffs.
+
+With --incremental, digests are served from the sha256 cache (--cache, shared with the
+verifier and validator) for files whose device, inode, size and mtime_ns are unchanged;
+only new or modified files are hashed. A full build re-hashes everything and refreshes
+the cache unless --no-cache is given.
+"""
 
 from __future__ import annotations
 
@@ -10,12 +20,16 @@ from pathlib import Path
 from typing import Any
 
 from evidence_integrity_common import (
-    collect_evidence_refs,
+    MANIFEST_SCHEMA_FLAT,
+    HASH_CACHE_REL,
+    MANIFEST_SCHEMA_MERKLE,
+    HashCache,
+    build_merkle,
+    classify_evidence_refs,
     display_path,
+    hash_files,
     load_json,
     resolve_ref,
-    sha256_file,
-    unique_refs,
 )
 
 
@@ -23,11 +37,28 @@ def _repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
+def _mtime_iso(mtime: float) -> str:
+    return datetime.fromtimestamp(mtime, tz=timezone.utc).isoformat()
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Build sha256 manifest from terminal evidence refs")
     parser.add_argument("--terminal", required=True, help="terminal path (repo-relative)")
     parser.add_argument("--output", required=True, help="manifest output path (repo-relative)")
     parser.add_argument("--pretty", action="store_true", help="pretty-print json to stdout")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse cached digests for files whose device, inode, size and mtime_ns are unchanged",
+    )
+    parser.add_argument("--cache", default=HASH_CACHE_REL, help=f"sha256 cache path (default: {HASH_CACHE_REL})")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the sha256 cache")
+    parser.add_argument(
+        "--schema",
+        choices=[MANIFEST_SCHEMA_FLAT, MANIFEST_SCHEMA_MERKLE],
+        default=MANIFEST_SCHEMA_MERKLE,
+        help="manifest schema version (1.1 adds per-class Merkle tree)",
+    )
     args = parser.parse_args()
 
     root = _repo_root()
@@ -38,47 +69,62 @@ def main() -> int:
     if err or not isinstance(terminal_data, dict):
         raise SystemExit(f"failed to read terminal json: {err or 'not_object'}")
 
-    refs = collect_evidence_refs(terminal_data)
-    integrity = terminal_data.get("evidence_integrity")
-    if isinstance(integrity, dict):
-        for key in ("raw_command_log", "gate_consistency_report"):
-            val = integrity.get(key)
-            if isinstance(val, str) and val.strip():
-                refs.append(val)
-
-    refs.append(args.terminal)
-    refs = unique_refs(refs)
+    classified = classify_evidence_refs(terminal_data, args.terminal)
 
     items: list[dict[str, Any]] = []
     missing: list[str] = []
 
-    for ref in refs:
+    for ref, evidence_class in classified:
         ref_path = resolve_ref(ref, root)
-        if not ref_path.exists():
+        try:
+            stat = ref_path.stat()
+        except OSError:
             missing.append(ref)
             continue
-
-        stat = ref_path.stat()
-        items.append(
-            {
-                "path": ref,
-                "sha256": sha256_file(ref_path),
-                "size_bytes": stat.st_size,
-                "mtime": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
-            }
-        )
+        item = {
+            "path": ref,
+            "sha256": None,
+            "size_bytes": stat.st_size,
+            "mtime": _mtime_iso(stat.st_mtime),
+        }
+        if args.schema == MANIFEST_SCHEMA_MERKLE:
+            item["class"] = evidence_class
+        items.append(item)
+
+    cache = HashCache(None if args.no_cache else resolve_ref(args.cache, root))
+    digests = hash_files([resolve_ref(item["path"], root) for item in items], cache, paranoid=not args.incremental)
+    cache.save()
+    present: list[dict[str, Any]] = []
+    for item in items:
+        digest = digests[resolve_ref(item["path"], root)]
+        if digest.sha256 is None:
+            # Vanished between the stat above and hashing.
+            missing.append(item["path"])
+            continue
+        item["sha256"] = digest.sha256
+        item["size_bytes"] = digest.size_bytes
+        present.append(item)
+    items = present
+    hashed = [digest for digest in digests.values() if digest.sha256 is not None and not digest.cached]
+    reused = [digest for digest in digests.values() if digest.cached]
 
     manifest = {
-        "schema_version": "1.0",
+        "schema_version": args.schema,
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "terminal": display_path(terminal_path, root),
         "summary": {
             "item_count": len(items),
             "missing_count": len(missing),
+            "hashed_count": len(hashed),
+            "hashed_bytes": sum(digest.size_bytes for digest in hashed),
+            "reused_count": len(reused),
+            "reused_bytes": sum(digest.size_bytes for digest in reused),
         },
         "items": items,
         "missing": missing,
     }
+    if args.schema == MANIFEST_SCHEMA_MERKLE:
+        manifest["merkle"] = build_merkle(items)
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
     output_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
@@ -1,5 +1,14 @@
 #!/usr/bin/env python3
-"""Run PTK gate consistency checks and optionally write report file."""
+"""Run PTK gate consistency checks and optionally write report file.
+
+Results come from the shared consistency cache (.ptk/cache/gate-consistency), keyed on
+the terminal, api-contracts.md and nfr-budgets.md digests; the key is written into the
+report as ``cache_key``. Use --no-cache to recompute.
+
+--all-versions / --versions GLOB check docs/product/<version>/execution/terminal.json
+for every matching version in worker processes and print one aggregate.
+Exit codes: 0 Pass, 2 Blocked, 3 no version folder matched.
+"""
 
 from __future__ import annotations
 
@@ -9,27 +18,26 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-from evidence_integrity_common import compute_gate_consistency, display_path, load_json
+from evidence_integrity_common import (
+    cached_gate_consistency,
+    compute_gate_consistency,
+    discover_versions,
+    display_path,
+    load_json,
+    run_versions,
+)
 
 
 def _repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Check terminal gate consistency")
-    parser.add_argument("--version", required=True, help="version folder, e.g. v3.6.0")
-    parser.add_argument("--terminal", required=True, help="terminal path (repo-relative)")
-    parser.add_argument("--output", default="", help="output report path (repo-relative)")
-    parser.add_argument("--pretty", action="store_true", help="pretty-print json")
-    args = parser.parse_args()
-
-    root = _repo_root()
-    terminal_path = root / args.terminal
+def check_version(version: str, root: Path, terminal: str = "", use_cache: bool = True) -> dict[str, Any]:
+    terminal_path = root / terminal if terminal else root / "docs" / "product" / version / "execution" / "terminal.json"
 
     payload, err = load_json(terminal_path)
     if err or not isinstance(payload, dict):
-        report = {
+        return {
             "status": "Blocked",
             "checked_at": datetime.now(timezone.utc).isoformat(),
             "terminal": display_path(terminal_path, root),
@@ -42,24 +50,58 @@ def main() -> int:
             ],
             "metrics": {},
         }
-        output = json.dumps(report, ensure_ascii=False, indent=2 if args.pretty else None)
-        print(output)
-        if args.output:
-            out_path = root / args.output
-            out_path.parent.mkdir(parents=True, exist_ok=True)
-            out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-        return 2
-
-    report: dict[str, Any] = compute_gate_consistency(payload, root, args.version)
+
+    if use_cache:
+        report, _ = cached_gate_consistency(payload, root, version)
+    else:
+        report = compute_gate_consistency(payload, root, version)
     report["checked_at"] = datetime.now(timezone.utc).isoformat()
     report["terminal"] = display_path(terminal_path, root)
+    return report
+
+
+def _version_summary(version: str, **kwargs: Any) -> dict[str, Any]:
+    report = check_version(version, **kwargs)
+    return {"status": report["status"], "conflict_ids": [item.get("id") for item in report.get("conflicts", [])]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check terminal gate consistency")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--version", help="version folder, e.g. v3.6.0")
+    target.add_argument("--all-versions", action="store_true", help="check every docs/product/v* folder")
+    target.add_argument("--versions", default="", help="glob of version folders under docs/product, e.g. 'v3.6.*'")
+    parser.add_argument("--terminal", default="", help="terminal path (repo-relative; required with --version)")
+    parser.add_argument("--output", default="", help="output report path (repo-relative)")
+    parser.add_argument("--pretty", action="store_true", help="pretty-print json")
+    parser.add_argument("--no-cache", action="store_true", help="recompute instead of using the consistency cache")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes for multi-version mode")
+    args = parser.parse_args()
+
+    root = _repo_root()
+    indent = 2 if args.pretty else None
+
+    if not args.version:
+        if args.terminal or args.output:
+            parser.error("--terminal/--output only apply to a single --version")
+        versions = discover_versions(root, args.versions or "v*")
+        if not versions:
+            print(json.dumps({"status": "Blocked", "version_count": 0, "reason_codes": ["no_versions_matched"]}, indent=indent))
+            return 3
+        aggregate = run_versions(_version_summary, versions, args.jobs, root=root, use_cache=not args.no_cache)
+        print(json.dumps(aggregate, ensure_ascii=False, indent=indent))
+        return 0 if aggregate["status"] == "Pass" else 2
+
+    if not args.terminal:
+        parser.error("--terminal is required with --version")
+    report = check_version(args.version, root, terminal=args.terminal, use_cache=not args.no_cache)
 
     if args.output:
         out_path = root / args.output
         out_path.parent.mkdir(parents=True, exist_ok=True)
         out_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
 
-    print(json.dumps(report, ensure_ascii=False, indent=2 if args.pretty else None))
+    print(json.dumps(report, ensure_ascii=False, indent=indent))
     return 0 if report.get("status") == "Pass" else 2
 
 
@@ -3,11 +3,20 @@
 
 from __future__ import annotations
 
+import fcntl
+import gzip
 import hashlib
 import json
+import lzma
+import os
 import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Callable, Iterator
 
 PASS_STATUS_WORDS = {
     "pass",
@@ -82,79 +91,522 @@ def collect_evidence_refs(data: dict[str, Any]) -> list[str]:
     return refs
 
 
+OUTPUT_STORE_DIR = "cas"
+STORE_CODECS = {"gzip": ".gz", "lzma": ".xz"}
+_STORE_OBJECT_RE = re.compile(r"^[0-9a-f]{64}\.log\.(gz|xz)$")
+
+
+def store_object_path(store_root: Path, digest: str, codec: str) -> Path:
+    """Location of an output in the content-addressed store (sha256 of the uncompressed bytes)."""
+    return store_root / "sha256" / digest[:2] / f"{digest}.log{STORE_CODECS[codec]}"
+
+
+def is_store_object(path: Path) -> bool:
+    return bool(_STORE_OBJECT_RE.match(path.name)) and path.parent.parent.name == "sha256"
+
+
+def open_evidence(path: Path) -> BinaryIO:
+    """Open evidence for reading; content-addressed store objects are decompressed transparently."""
+    if is_store_object(path):
+        return gzip.open(path, "rb") if path.suffix == ".gz" else lzma.open(path, "rb")
+    return path.open("rb")
+
+
 def sha256_file(path: Path) -> str:
+    """sha256 of the evidence content (uncompressed for store objects)."""
     hasher = hashlib.sha256()
-    with path.open("rb") as handle:
+    with open_evidence(path) as handle:
         for chunk in iter(lambda: handle.read(1024 * 1024), b""):
             hasher.update(chunk)
     return hasher.hexdigest()
 
 
-def parse_raw_command_log(path: Path) -> dict[str, Any]:
-    result: dict[str, Any] = {
-        "exists": path.exists(),
-        "entry_count": 0,
-        "invalid_lines": [],
-        "errors": [],
-    }
-    if not path.exists():
-        result["errors"].append("missing")
-        return result
+HASH_CACHE_VERSION = 1
+HASH_CACHE_REL = ".ptk/cache/evidence-sha256.json"
 
-    lines = path.read_text(encoding="utf-8").splitlines()
-    if not lines:
-        result["errors"].append("empty")
-        return result
 
-    required = {"cmd", "cwd", "started_at", "ended_at", "exit_code"}
+def _stat_key(st: os.stat_result) -> list[int]:
+    return [st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns]
 
-    for idx, line in enumerate(lines, start=1):
-        row = line.strip()
-        if not row:
-            result["invalid_lines"].append({"line": idx, "reason": "blank_line"})
-            continue
 
+@contextmanager
+def _locked(lock_path: Path) -> Iterator[None]:
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with lock_path.open("a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
         try:
-            payload = json.loads(row)
-        except Exception as exc:  # noqa: BLE001
-            result["invalid_lines"].append({"line": idx, "reason": f"json_error:{exc}"})
-            continue
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
 
-        if not isinstance(payload, dict):
-            result["invalid_lines"].append({"line": idx, "reason": "not_object"})
-            continue
 
-        missing = [key for key in required if key not in payload]
-        if missing:
-            result["invalid_lines"].append({"line": idx, "reason": f"missing_keys:{','.join(missing)}"})
-            continue
+def _load_hash_entries(path: Path) -> dict[str, dict[str, Any]]:
+    data, err = load_json(path)
+    if not err and isinstance(data, dict) and data.get("version") == HASH_CACHE_VERSION:
+        entries = data.get("entries")
+        if isinstance(entries, dict):
+            return entries
+    return {}
 
-        cmd = payload.get("cmd")
-        cwd = payload.get("cwd")
-        started_at = payload.get("started_at")
-        ended_at = payload.get("ended_at")
-        exit_code = payload.get("exit_code")
 
-        if not isinstance(cmd, str) or not cmd.strip():
-            result["invalid_lines"].append({"line": idx, "reason": "invalid_cmd"})
-            continue
-        if not isinstance(cwd, str) or not cwd.strip():
-            result["invalid_lines"].append({"line": idx, "reason": "invalid_cwd"})
-            continue
-        if not isinstance(started_at, str) or not started_at.strip():
-            result["invalid_lines"].append({"line": idx, "reason": "invalid_started_at"})
-            continue
-        if not isinstance(ended_at, str) or not ended_at.strip():
-            result["invalid_lines"].append({"line": idx, "reason": "invalid_ended_at"})
+def _entry_current(path: str, entry: Any) -> bool:
+    try:
+        return isinstance(entry, dict) and entry.get("stat") == _stat_key(os.stat(path))
+    except OSError:
+        return False
+
+
+class HashCache:
+    """sha256 digests keyed on (path, device, inode, size, mtime_ns).
+
+    Any change to the stat tuple invalidates the entry, so a cached digest is only
+    served for a file that has not been rewritten, replaced or touched. ``save``
+    merges this process's new digests into the file under an exclusive lock, so
+    concurrent writers (e.g. multi-version process pools) never drop each other's,
+    and prunes entries whose file is gone or no longer matches the recorded stat.
+    """
+
+    def __init__(self, path: Path | None) -> None:
+        self.path = path
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.dirty = False
+        self._updated: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path is not None:
+            self.entries = _load_hash_entries(path)
+
+    def get(self, path: Path, st: os.stat_result) -> str | None:
+        entry = self.entries.get(str(path))
+        if isinstance(entry, dict) and entry.get("stat") == _stat_key(st):
+            digest = entry.get("sha256")
+            return digest if isinstance(digest, str) else None
+        return None
+
+    def put(self, path: Path, st: os.stat_result, digest: str) -> None:
+        entry = {"stat": _stat_key(st), "sha256": digest}
+        with self._lock:
+            self.entries[str(path)] = entry
+            self._updated[str(path)] = entry
+            self.dirty = True
+
+    def save(self) -> None:
+        if self.path is None or not self.dirty:
+            return
+        with _locked(self.path.with_name(f"{self.path.name}.lock")):
+            entries = {key: entry for key, entry in _load_hash_entries(self.path).items() if _entry_current(key, entry)}
+            entries.update(self._updated)
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": HASH_CACHE_VERSION, "entries": entries}), encoding="utf-8")
+            os.replace(tmp, self.path)
+        self.entries = entries
+        self._updated = {}
+        self.dirty = False
+
+
+@dataclass
+class FileDigest:
+    path: Path
+    sha256: str | None
+    size_bytes: int
+    seconds: float
+    cached: bool
+
+
+def hash_files(
+    paths: list[Path],
+    cache: HashCache | None = None,
+    *,
+    paranoid: bool = False,
+    workers: int | None = None,
+) -> dict[Path, FileDigest]:
+    """Hash ``paths``, serving unchanged files from ``cache`` and hashing misses on a thread pool.
+
+    ``paranoid`` re-hashes everything (fresh digests still refresh the cache).
+    Missing files yield ``sha256=None``.
+    """
+    results: dict[Path, FileDigest] = {}
+    misses: list[tuple[Path, os.stat_result]] = []
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            results[path] = FileDigest(path, None, 0, 0.0, False)
             continue
-        if not isinstance(exit_code, int):
-            result["invalid_lines"].append({"line": idx, "reason": "invalid_exit_code"})
+        digest = None if paranoid or cache is None else cache.get(path, st)
+        if digest is not None:
+            results[path] = FileDigest(path, digest, st.st_size, 0.0, True)
+        else:
+            misses.append((path, st))
+
+    def run(item: tuple[Path, os.stat_result]) -> FileDigest:
+        path, st = item
+        started = time.perf_counter()
+        try:
+            digest = sha256_file(path)
+        except FileNotFoundError:
+            return FileDigest(path, None, 0, 0.0, False)
+        elapsed = time.perf_counter() - started
+        if cache is not None:
+            cache.put(path, st, digest)
+        return FileDigest(path, digest, st.st_size, elapsed, False)
+
+    if len(misses) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(run, misses):
+                results[result.path] = result
+    else:
+        for item in misses:
+            result = run(item)
+            results[result.path] = result
+    return results
+
+
+MANIFEST_SCHEMA_FLAT = "1.0"
+MANIFEST_SCHEMA_MERKLE = "1.1"
+MANIFEST_SCHEMA_VERSIONS = {MANIFEST_SCHEMA_FLAT, MANIFEST_SCHEMA_MERKLE}
+MERKLE_CLASSES = ("reports", "logs", "screenshots", "raw_command_log", "traceability", "integrity")
+
+
+def classify_evidence_refs(data: dict[str, Any], terminal_ref: str) -> list[tuple[str, str]]:
+    """(ref, evidence class) pairs in manifest order; a ref keeps the first class it is seen in."""
+    pairs: list[tuple[str, str]] = []
+    integrity = data.get("evidence_integrity") if isinstance(data.get("evidence_integrity"), dict) else {}
+    raw_ref = integrity.get("raw_command_log")
+    raw_norm = str(raw_ref).strip() if isinstance(raw_ref, str) else ""
+
+    evidence = data.get("evidence")
+    if isinstance(evidence, dict):
+        for key in ("reports", "logs", "screenshots"):
+            items = evidence.get(key)
+            if isinstance(items, list):
+                pairs.extend((str(x), "raw_command_log" if str(x).strip() == raw_norm else key) for x in items)
+
+    trace = data.get("traceability")
+    if isinstance(trace, list):
+        for item in trace:
+            if isinstance(item, dict) and isinstance(item.get("evidence_refs"), list):
+                pairs.extend((str(x), "traceability") for x in item["evidence_refs"])
+
+    if raw_norm:
+        pairs.append((raw_norm, "raw_command_log"))
+    report_ref = integrity.get("gate_consistency_report")
+    if isinstance(report_ref, str) and report_ref.strip():
+        pairs.append((report_ref, "integrity"))
+    pairs.append((terminal_ref, "integrity"))
+
+    out: list[tuple[str, str]] = []
+    seen: set[str] = set()
+    for ref, cls in pairs:
+        ref = ref.strip()
+        if ref and ref not in seen:
+            seen.add(ref)
+            out.append((ref, cls))
+    return out
+
+
+def _node(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def merkle_leaf(path: str, digest: str) -> str:
+    return _node("leaf", path, digest.lower())
+
+
+def merkle_root(hashes: list[str]) -> str:
+    """Binary Merkle root; an odd node at any level is promoted unchanged."""
+    if not hashes:
+        return _node("empty")
+    level = list(hashes)
+    while len(level) > 1:
+        nxt = [_node("node", level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0]
+
+
+def build_merkle(items: list[dict[str, Any]]) -> dict[str, Any]:
+    """Group manifest items by ``class`` into per-class subtrees under one root digest.
+
+    Leaves are ordered by path so the tree depends only on content, not on ref order.
+    """
+    classes: dict[str, dict[str, Any]] = {}
+    for cls in MERKLE_CLASSES:
+        leaves = {
+            item["path"]: merkle_leaf(item["path"], item["sha256"])
+            for item in sorted(items, key=lambda x: x["path"])
+            if item.get("class") == cls
+        }
+        classes[cls] = {"root": merkle_root(list(leaves.values())), "leaves": leaves}
+    root = merkle_root([_node("class", cls, classes[cls]["root"]) for cls in MERKLE_CLASSES])
+    return {"algorithm": "sha256", "root": root, "classes": classes}
+
+
+def merkle_problems(manifest: dict[str, Any]) -> list[str]:
+    """Structural check of a 1.1 manifest: items, leaves, class roots and root must agree (no file IO)."""
+    merkle = manifest.get("merkle")
+    items = manifest.get("items")
+    if not isinstance(merkle, dict) or not isinstance(items, list):
+        return ["merkle_missing"]
+    usable = [i for i in items if isinstance(i, dict) and isinstance(i.get("path"), str) and isinstance(i.get("sha256"), str)]
+    unknown = sorted({str(i.get("class")) for i in usable if i.get("class") not in MERKLE_CLASSES})
+    problems = [f"unknown_class:{cls}" for cls in unknown]
+    expected = build_merkle(usable)
+    classes = merkle.get("classes") if isinstance(merkle.get("classes"), dict) else {}
+    for cls in MERKLE_CLASSES:
+        if classes.get(cls) != expected["classes"][cls]:
+            problems.append(f"class_mismatch:{cls}")
+    if merkle.get("root") != expected["root"]:
+        problems.append("root_mismatch")
+    return problems
+
+
+def diff_merkle(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    """Changed paths between two merkle blocks, descending only into classes whose roots differ."""
+    if old.get("root") == new.get("root"):
+        return {"equal": True, "changed_classes": [], "added": [], "removed": [], "modified": []}
+    old_classes = old.get("classes") or {}
+    new_classes = new.get("classes") or {}
+    changed_classes: list[str] = []
+    added: list[str] = []
+    removed: list[str] = []
+    modified: list[str] = []
+    for cls in MERKLE_CLASSES:
+        a = old_classes.get(cls) or {}
+        b = new_classes.get(cls) or {}
+        if a.get("root") == b.get("root"):
             continue
+        changed_classes.append(cls)
+        a_leaves = a.get("leaves") or {}
+        b_leaves = b.get("leaves") or {}
+        added.extend(sorted(set(b_leaves) - set(a_leaves)))
+        removed.extend(sorted(set(a_leaves) - set(b_leaves)))
+        modified.extend(sorted(p for p in set(a_leaves) & set(b_leaves) if a_leaves[p] != b_leaves[p]))
+    return {"equal": False, "changed_classes": changed_classes, "added": added, "removed": removed, "modified": modified}
+
+
+RUSAGE_FIELDS = (
+    "user_cpu_ms",
+    "sys_cpu_ms",
+    "max_rss_kb",
+    "block_in",
+    "block_out",
+    "voluntary_ctx_switches",
+    "involuntary_ctx_switches",
+)
+
+
+def _new_resource_summary() -> dict[str, Any]:
+    summary: dict[str, Any] = {"record_count": 0}
+    for key in ("user_cpu_ms", "sys_cpu_ms", "block_in", "block_out", "voluntary_ctx_switches", "involuntary_ctx_switches"):
+        summary[f"{key}_total"] = 0
+    return summary
+
+
+def _accumulate_resources(summary: dict[str, Any], cmd: str, duration_ms: Any, usage: dict[str, int], timeline: Any) -> None:
+    """Fold one record into running totals/peaks, remembering the worst command per metric."""
+    summary["record_count"] += 1
+    for key in ("user_cpu_ms", "sys_cpu_ms", "block_in", "block_out", "voluntary_ctx_switches", "involuntary_ctx_switches"):
+        summary[f"{key}_total"] += usage[key]
+    if usage["max_rss_kb"] > summary.get("max_rss_kb_peak", -1):
+        summary["max_rss_kb_peak"] = usage["max_rss_kb"]
+        summary["max_rss_cmd"] = cmd
+    cpu = usage["user_cpu_ms"] + usage["sys_cpu_ms"]
+    if cpu > summary.get("max_cpu_ms", -1):
+        summary["max_cpu_ms"] = cpu
+        summary["max_cpu_cmd"] = cmd
+    if isinstance(duration_ms, int) and duration_ms > summary.get("max_duration_ms", -1):
+        summary["max_duration_ms"] = duration_ms
+    peak = timeline.get("peak_rss_kb") if isinstance(timeline, dict) else None
+    if isinstance(peak, int) and peak > summary.get("sampled_peak_rss_kb", -1):
+        summary["sampled_peak_rss_kb"] = peak
+
+
+RAW_LOG_CHECKPOINT_VERSION = 1
+RAW_LOG_CHECKPOINT_REL = ".ptk/cache/raw-log-checkpoints"
+_RAW_LOG_REQUIRED = {"cmd", "cwd", "started_at", "ended_at", "exit_code"}
+
+
+def _check_raw_line(idx: int, line: bytes, state: dict[str, Any]) -> None:
+    try:
+        row = line.decode("utf-8").strip()
+    except UnicodeDecodeError:
+        state["invalid_lines"].append({"line": idx, "reason": "not_utf8"})
+        return
+    if not row:
+        state["invalid_lines"].append({"line": idx, "reason": "blank_line"})
+        return
+
+    try:
+        payload = json.loads(row)
+    except Exception as exc:  # noqa: BLE001
+        state["invalid_lines"].append({"line": idx, "reason": f"json_error:{exc}"})
+        return
+
+    if not isinstance(payload, dict):
+        state["invalid_lines"].append({"line": idx, "reason": "not_object"})
+        return
+
+    missing = [key for key in _RAW_LOG_REQUIRED if key not in payload]
+    if missing:
+        state["invalid_lines"].append({"line": idx, "reason": f"missing_keys:{','.join(missing)}"})
+        return
+
+    cmd = payload.get("cmd")
+    cwd = payload.get("cwd")
+    started_at = payload.get("started_at")
+    ended_at = payload.get("ended_at")
+    exit_code = payload.get("exit_code")
+
+    if not isinstance(cmd, str) or not cmd.strip():
+        state["invalid_lines"].append({"line": idx, "reason": "invalid_cmd"})
+        return
+    if not isinstance(cwd, str) or not cwd.strip():
+        state["invalid_lines"].append({"line": idx, "reason": "invalid_cwd"})
+        return
+    if not isinstance(started_at, str) or not started_at.strip():
+        state["invalid_lines"].append({"line": idx, "reason": "invalid_started_at"})
+        return
+    if not isinstance(ended_at, str) or not ended_at.strip():
+        state["invalid_lines"].append({"line": idx, "reason": "invalid_ended_at"})
+        return
+    if not isinstance(exit_code, int):
+        state["invalid_lines"].append({"line": idx, "reason": "invalid_exit_code"})
+        return
+
+    usage = payload.get("rusage")
+    if usage is not None:
+        if not isinstance(usage, dict) or any(
+            not isinstance(usage.get(key), int) or isinstance(usage.get(key), bool) for key in RUSAGE_FIELDS
+        ):
+            state["invalid_lines"].append({"line": idx, "reason": "invalid_rusage"})
+            return
+        _accumulate_resources(state["resources"], cmd, payload.get("duration_ms"), usage, payload.get("memory_timeline"))
+
+    state["entry_count"] += 1
+
+
+def _raw_log_checkpoint_path(checkpoint_dir: Path, path: Path) -> Path:
+    key = hashlib.sha256(str(path.resolve()).encode("utf-8")).hexdigest()[:32]
+    return checkpoint_dir / f"{key}.json"
+
+
+def parse_raw_command_log(path: Path, checkpoint_dir: Path | None = None) -> dict[str, Any]:
+    """Validate a raw command log JSONL, streaming line by line.
+
+    With ``checkpoint_dir``, the validated newline-terminated prefix is recorded as
+    (byte offset, sha256 of the prefix, accumulated state); the next call re-hashes
+    that prefix instead of re-parsing it and validates only appended lines. Only a
+    prefix without invalid lines is checkpointed. A prefix whose hash no longer
+    matches (edited or truncated log) is re-validated from the start, the checkpoint
+    is refreshed and ``prefix_modified`` is reported under ``warnings``.
+    """
+    result: dict[str, Any] = {
+        "exists": path.exists(),
+        "entry_count": 0,
+        "invalid_lines": [],
+        "errors": [],
+        "warnings": [],
+    }
+    if not path.exists():
+        result["errors"].append("missing")
+        return result
 
-        result["entry_count"] += 1
+    state: dict[str, Any] = {
+        "offset": 0,
+        "line_count": 0,
+        "entry_count": 0,
+        "invalid_lines": [],
+        "resources": _new_resource_summary(),
+    }
+    checkpoint_file = _raw_log_checkpoint_path(checkpoint_dir, path) if checkpoint_dir is not None else None
+    checkpoint = None
+    if checkpoint_file is not None:
+        data, err = load_json(checkpoint_file)
+        if not err and isinstance(data, dict) and data.get("version") == RAW_LOG_CHECKPOINT_VERSION:
+            checkpoint = data
+
+    prefix_hasher = hashlib.sha256()
+    resumed_at = 0
+    prefix_modified = False
+    with path.open("rb") as handle:
+        if checkpoint is not None and path.stat().st_size >= checkpoint["state"]["offset"]:
+            remaining = checkpoint["state"]["offset"]
+            while remaining:
+                chunk = handle.read(min(1024 * 1024, remaining))
+                if not chunk:
+                    break
+                prefix_hasher.update(chunk)
+                remaining -= len(chunk)
+            if prefix_hasher.hexdigest() == checkpoint["prefix_sha256"]:
+                state = checkpoint["state"]
+                resumed_at = state["line_count"]
+            else:
+                prefix_modified = True
+        elif checkpoint is not None:
+            prefix_modified = True
+        if prefix_modified or resumed_at == 0:
+            handle.seek(0)
+            prefix_hasher = hashlib.sha256()
+            state["offset"] = 0
+
+        tail: bytes | None = None
+        for line in handle:
+            if not line.endswith(b"\n"):
+                tail = line  # possibly still being written; validate but keep out of the checkpoint
+                break
+            state["line_count"] += 1
+            _check_raw_line(state["line_count"], line, state)
+            state["offset"] += len(line)
+            prefix_hasher.update(line)
+
+    if (
+        checkpoint_file is not None
+        and state["offset"]
+        and not state["invalid_lines"]
+        and (prefix_modified or state["line_count"] > resumed_at)
+    ):
+        checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = checkpoint_file.with_name(f".{checkpoint_file.name}.{os.getpid()}.tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "version": RAW_LOG_CHECKPOINT_VERSION,
+                    "path": str(path.resolve()),
+                    "prefix_sha256": prefix_hasher.hexdigest(),
+                    "state": state,
+                },
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp, checkpoint_file)
+
+    line_count = state["line_count"]
+    invalid_lines = list(state["invalid_lines"])
+    entry_count = state["entry_count"]
+    resources = dict(state["resources"])
+    if tail is not None:
+        line_count += 1
+        tail_state = {"entry_count": 0, "invalid_lines": [], "resources": resources}
+        _check_raw_line(line_count, tail, tail_state)
+        entry_count += tail_state["entry_count"]
+        invalid_lines.extend(tail_state["invalid_lines"])
+
+    if line_count == 0:
+        result["errors"].append("empty")
+        return result
 
-    if result["entry_count"] == 0 and not result["invalid_lines"]:
+    result["entry_count"] = entry_count
+    result["invalid_lines"] = invalid_lines
+    if prefix_modified:
+        result["warnings"].append("prefix_modified")
+    if entry_count == 0 and not invalid_lines:
         result["errors"].append("no_valid_entries")
+    if resources["record_count"]:
+        result["resource_summary"] = resources
+    if checkpoint_dir is not None:
+        result["checkpoint"] = {"resumed_at_line": resumed_at, "prefix_modified": prefix_modified}
 
     result["valid"] = result["entry_count"] > 0 and not result["invalid_lines"] and not result["errors"]
     return result
@@ -212,43 +664,153 @@ def blocking_open_question_ids(data: dict[str, Any]) -> list[str]:
     return blocking_ids
 
 
-def _is_template_markdown(text: str) -> bool:
-    if not text.strip():
-        return True
+TEMPLATE_MARKERS = ("<feature-name>", "<nfr_id>", "<change>", "vX.Y.Z", "YYYY-MM-DD")
+_MD_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*$")
+_MD_BULLET_RE = re.compile(r"^[-*+]\s+")
 
-    markers = [
-        "<feature-name>",
-        "<nfr_id>",
-        "<change>",
-        "vX.Y.Z",
-        "YYYY-MM-DD",
-    ]
-    if any(marker in text for marker in markers):
-        return True
 
-    placeholder_count = len(re.findall(r"<[^>]+>", text))
-    return placeholder_count >= 3
+@dataclass
+class MdLine:
+    index: int
+    text: str  # stripped
+    kind: str  # blank | heading | bullet | table_row | table_sep | code | text
+    cells: list[str] | None = None
+
+
+@dataclass
+class MdSection:
+    level: int
+    title: str
+    heading: str
+    start: int  # heading line index
+    end: int  # exclusive: next heading of the same or a higher level
+    parent: int | None  # index into MarkdownDoc.sections
+
+
+@dataclass
+class MdTable:
+    start: int
+    end: int
+    rows: list[list[str]]  # header included, separator excluded
+
+
+@dataclass
+class MarkdownDoc:
+    """Single-pass model of a markdown file: heading tree with line spans, tables, bullets, placeholders.
+
+    Lines inside fenced code blocks are kind ``code`` and never become headings,
+    bullets or table rows.
+    """
+
+    text: str
+    lines: list[MdLine]
+    sections: list[MdSection]
+    tables: list[MdTable]
+    placeholder_count: int
+    template_markers: list[str]
+
+    @property
+    def is_template(self) -> bool:
+        return not self.text.strip() or bool(self.template_markers) or self.placeholder_count >= 3
+
+    def find_section(self, heading_pattern: str) -> MdSection | None:
+        regex = re.compile(heading_pattern, flags=re.IGNORECASE)
+        return next((section for section in self.sections if regex.search(section.heading)), None)
+
+    def has_heading(self, prefix: str) -> bool:
+        return any(section.heading.startswith(prefix) for section in self.sections)
+
+    def body(self, section: MdSection | None) -> list[MdLine]:
+        """Lines under ``section`` (nested subsections included); the whole document for None."""
+        if section is None:
+            return self.lines
+        return self.lines[section.start + 1 : section.end]
+
+    def table_rows(self) -> list[list[str]]:
+        return [row for table in self.tables for row in table.rows]
+
+
+def parse_markdown(text: str) -> MarkdownDoc:
+    lines: list[MdLine] = []
+    sections: list[MdSection] = []
+    tables: list[MdTable] = []
+    open_sections: list[int] = []
+    in_code = False
+
+    for idx, raw in enumerate(text.splitlines()):
+        stripped = raw.strip()
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            in_code = not in_code
+            lines.append(MdLine(idx, stripped, "code"))
+            continue
+        if in_code:
+            lines.append(MdLine(idx, stripped, "code"))
+            continue
+        if not stripped:
+            lines.append(MdLine(idx, stripped, "blank"))
+            continue
+
+        heading = _MD_HEADING_RE.match(stripped)
+        if heading:
+            level = len(heading.group(1))
+            while open_sections and sections[open_sections[-1]].level >= level:
+                sections[open_sections.pop()].end = idx
+            parent = open_sections[-1] if open_sections else None
+            sections.append(MdSection(level, heading.group(2).rstrip("#").strip(), stripped, idx, idx + 1, parent))
+            open_sections.append(len(sections) - 1)
+            lines.append(MdLine(idx, stripped, "heading"))
+            continue
+
+        if stripped.startswith("|"):
+            compact = stripped.replace(" ", "")
+            is_sep = compact.startswith("|---") or compact.startswith("|:-")
+            if not tables or tables[-1].end != idx:
+                tables.append(MdTable(idx, idx, []))
+            tables[-1].end = idx + 1
+            if is_sep:
+                lines.append(MdLine(idx, stripped, "table_sep"))
+            else:
+                cells = [cell.strip() for cell in stripped.strip("|").split("|")]
+                tables[-1].rows.append(cells)
+                lines.append(MdLine(idx, stripped, "table_row", cells))
+            continue
+
+        kind = "bullet" if _MD_BULLET_RE.match(stripped) or stripped == "-" else "text"
+        lines.append(MdLine(idx, stripped, kind))
 
+    for open_idx in open_sections:
+        sections[open_idx].end = len(lines)
 
-def _extract_md_section(text: str, heading_pattern: str) -> str:
-    lines = text.splitlines()
-    start_idx = -1
-    heading_regex = re.compile(heading_pattern, flags=re.IGNORECASE)
+    return MarkdownDoc(
+        text=text,
+        lines=lines,
+        sections=sections,
+        tables=tables,
+        placeholder_count=len(re.findall(r"<[^>]+>", text)),
+        template_markers=[marker for marker in TEMPLATE_MARKERS if marker in text],
+    )
 
-    for idx, line in enumerate(lines):
-        if heading_regex.search(line.strip()):
-            start_idx = idx + 1
-            break
 
-    if start_idx < 0:
-        return ""
+_MARKDOWN_CACHE: dict[str, tuple[tuple[int, int], MarkdownDoc]] = {}
+_MARKDOWN_LOCK = threading.Lock()
 
-    buf: list[str] = []
-    for line in lines[start_idx:]:
-        if line.strip().startswith("## "):
-            break
-        buf.append(line)
-    return "\n".join(buf).strip()
+
+def load_markdown(path: Path) -> MarkdownDoc | None:
+    """Parsed markdown for ``path``, memoized per (mtime_ns, size); None if the file is missing."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key = str(path.resolve())
+    fingerprint = (st.st_mtime_ns, st.st_size)
+    with _MARKDOWN_LOCK:
+        cached = _MARKDOWN_CACHE.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    doc = parse_markdown(path.read_text(encoding="utf-8"))
+    with _MARKDOWN_LOCK:
+        _MARKDOWN_CACHE[key] = (fingerprint, doc)
+    return doc
 
 
 def parse_api_contracts_doc(path: Path) -> dict[str, Any]:
@@ -265,33 +827,39 @@ def parse_api_contracts_doc(path: Path) -> dict[str, Any]:
     if not path.exists():
         return result
 
-    text = path.read_text(encoding="utf-8")
-    if _is_template_markdown(text):
+    doc = load_markdown(path)
+    if doc is None or doc.is_template:
         result["template"] = True
         return result
 
-    section = _extract_md_section(text, r"^##\s+.*(drift|变更记录)") or text
-    lines = [line.strip() for line in section.splitlines() if line.strip()]
-
+    section = doc.find_section(r"^##\s+.*(drift|变更记录)")
+    body = doc.body(section)
+    if all(md_line.kind == "blank" for md_line in body):
+        # An empty drift section falls back to scanning the whole document.
+        body = doc.lines
     open_lines: list[str] = []
     resolved = 0
     declared_no_open = False
 
-    for line in lines:
+    for md_line in body:
+        line = md_line.text
+        if md_line.kind in {"blank", "code"}:
+            continue
         low = line.lower()
         if "无 open drift" in line or "no open drift" in low:
             declared_no_open = True
             continue
-        if not line.startswith("-") and not line.startswith("|"):
+        if md_line.kind not in {"bullet", "table_row", "table_sep"}:
             continue
 
         if "resolved" in low or "closed" in low or "已关闭" in line:
             resolved += 1
             continue
 
-        if line.startswith("|"):
-            cells = [cell.strip().lower() for cell in line.strip().strip("|").split("|")]
-            if any("open" == cell for cell in cells):
+        if md_line.kind == "table_sep":
+            continue
+        if md_line.cells is not None:
+            if any("open" == cell.lower() for cell in md_line.cells):
                 open_lines.append(line)
             continue
 
@@ -318,21 +886,14 @@ def parse_nfr_budgets_doc(path: Path) -> dict[str, Any]:
     if not path.exists():
         return result
 
-    text = path.read_text(encoding="utf-8")
-    if _is_template_markdown(text):
+    doc = load_markdown(path)
+    if doc is None or doc.is_template:
         result["template"] = True
         return result
 
     statuses: list[str] = []
-    for line in text.splitlines():
-        stripped = line.strip()
-        if not stripped.startswith("|"):
-            continue
-        compact = stripped.replace(" ", "")
-        if compact.startswith("|---"):
-            continue
-
-        cells = [cell.strip().strip("`") for cell in stripped.strip("|").split("|")]
+    for row in doc.table_rows():
+        cells = [cell.strip("`") for cell in row]
         if len(cells) < 4:
             continue
 
@@ -355,14 +916,102 @@ def parse_nfr_budgets_doc(path: Path) -> dict[str, Any]:
     return result
 
 
-def compute_gate_consistency(data: dict[str, Any], root: Path, version: str) -> dict[str, Any]:
+def _version_sort_key(name: str) -> list[Any]:
+    return [(0, int(part)) if part.isdigit() else (1, part) for part in re.split(r"(\d+)", name)]
+
+
+def discover_versions(root: Path, pattern: str = "v*") -> list[str]:
+    """Version folders under docs/product matching ``pattern``, in natural version order."""
+    base = root / "docs" / "product"
+    if not base.is_dir():
+        return []
+    return sorted((p.name for p in base.glob(pattern) if p.is_dir()), key=_version_sort_key)
+
+
+def run_versions(worker: Callable[..., dict[str, Any]], versions: list[str], jobs: int | None, **kwargs: Any) -> dict[str, Any]:
+    """Run ``worker(version, **kwargs)`` for each version in a process pool and aggregate.
+
+    The aggregate is Pass only when every version passes; a version whose worker
+    raised is reported as Blocked with ``worker_error``.
+    """
+    results: dict[str, dict[str, Any]] = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {version: pool.submit(worker, version, **kwargs) for version in versions}
+        for version, future in futures.items():
+            try:
+                results[version] = future.result()
+            except Exception as exc:  # noqa: BLE001
+                results[version] = {"status": "Blocked", "reason_codes": ["worker_error"], "error": str(exc)}
+    blocked = [version for version in versions if results[version].get("status") != "Pass"]
+    return {
+        "status": "Pass" if versions and not blocked else "Blocked",
+        "version_count": len(versions),
+        "blocked_versions": blocked,
+        "versions": results,
+    }
+
+
+def _gate_doc_paths(data: dict[str, Any], root: Path, version: str) -> tuple[Path, Path]:
     source_artifacts = data.get("source_artifacts") if isinstance(data.get("source_artifacts"), dict) else {}
 
     api_ref = str(source_artifacts.get("architecture_contracts") or f"docs/product/{version}/architecture/api-contracts.md")
     nfr_ref = str(source_artifacts.get("architecture_nfr") or f"docs/product/{version}/architecture/nfr-budgets.md")
 
-    api_path = resolve_ref(api_ref, root)
-    nfr_path = resolve_ref(nfr_ref, root)
+    return resolve_ref(api_ref, root), resolve_ref(nfr_ref, root)
+
+
+GATE_CONSISTENCY_CACHE_VERSION = 1
+GATE_CONSISTENCY_CACHE_REL = ".ptk/cache/gate-consistency"
+
+
+def gate_consistency_cache_key(data: dict[str, Any], root: Path, version: str) -> str:
+    """Digest of everything compute_gate_consistency depends on.
+
+    Covers the terminal content (canonical JSON), the referenced api-contracts.md and
+    nfr-budgets.md, the version and this module's own source.
+    """
+    api_path, nfr_path = _gate_doc_paths(data, root, version)
+    parts = [
+        f"v{GATE_CONSISTENCY_CACHE_VERSION}",
+        version,
+        hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest(),
+        sha256_file(api_path) if api_path.is_file() else "missing",
+        sha256_file(nfr_path) if nfr_path.is_file() else "missing",
+        sha256_file(Path(__file__)),
+    ]
+    return f"gc{GATE_CONSISTENCY_CACHE_VERSION}-" + hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def cached_gate_consistency(
+    data: dict[str, Any], root: Path, version: str, cache_dir: Path | None = None
+) -> tuple[dict[str, Any], bool]:
+    """compute_gate_consistency through a content-keyed cache shared by the validator and the checker.
+
+    Each version has one slot that a miss overwrites, so the cache directory stays at
+    one file per version however often its inputs change. Returns (result, cache_hit);
+    the result carries its ``cache_key``.
+    """
+    cache_dir = cache_dir if cache_dir is not None else root / GATE_CONSISTENCY_CACHE_REL
+    key = gate_consistency_cache_key(data, root, version)
+    cache_path = cache_dir / f"{re.sub(r'[^A-Za-z0-9._-]', '_', version) or '_'}.json"
+    cached, err = load_json(cache_path)
+    if not err and isinstance(cached, dict) and cached.get("cache_key") == key:
+        return cached, True
+
+    result = compute_gate_consistency(data, root, version)
+    result["cache_key"] = key
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, cache_path)
+    # Entries from the old one-file-per-key layout are never read again.
+    for stale in cache_dir.glob("gc*-*.json"):
+        stale.unlink(missing_ok=True)
+    return result, False
+
+
+def compute_gate_consistency(data: dict[str, Any], root: Path, version: str) -> dict[str, Any]:
+    api_path, nfr_path = _gate_doc_paths(data, root, version)
 
     unresolved_api = unresolved_api_drift_ids(data)
     unproven_nfr = unproven_nfr_items(data)
@@ -6,14 +6,31 @@ Outputs:
 - .ptk/state/requirement-feedback/{version}-{feature}.json
 - docs/product/{version}/feedback/{feature}.json
 - docs/product/{version}/feedback/{feature}.md
+- docs/product/feedback/{version}-{feature}.json / .md (shared copies)
+
+The JSON and MD are serialized once into docs/product/{version}/feedback; the shared
+docs copies are reflinks or hardlinks of them (plain copies where neither is possible).
+The state JSON is a reflink or copy, never a hardlink, because other tools
+(ptk feedback sync) rewrite files under .ptk/state. A version/feature is skipped when
+its payload digest (everything except generated_at) matches the last one generated
+and all five outputs still hold the content written then; see
+.ptk/cache/feedback-payloads.json and --force.
+
+Batch mode: --sessions-dir DIR [--glob '*.json'] builds payloads in worker processes
+and emits only the newest session per version/feature.
 """
 
 from __future__ import annotations
 
 import argparse
+import fcntl
+import hashlib
 import json
+import os
 import re
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -234,61 +251,236 @@ def render_markdown(payload: dict) -> str:
     return "\n".join(lines)
 
 
+FEEDBACK_CACHE_VERSION = 2
+FEEDBACK_CACHE_REL = ".ptk/cache/feedback-payloads.json"
+FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+
+
+def payload_digest(payload: dict) -> str:
+    """sha256 of the payload without ``generated_at``, so regenerating the same feedback is detectable."""
+    stable = {key: value for key, value in payload.items() if key != "generated_at"}
+    return hashlib.sha256(json.dumps(stable, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def output_paths(state_dir: Path, docs_root: Path, version: str, feature_safe: str) -> dict[str, Path]:
+    feedback_dir = docs_root / version / "feedback"
+    shared_feedback_dir = docs_root / "feedback"
+    return {
+        "state_json": state_dir / f"{version}-{feature_safe}.json",
+        "feedback_json": feedback_dir / f"{feature_safe}.json",
+        "feedback_md": feedback_dir / f"{feature_safe}.md",
+        "shared_feedback_json": shared_feedback_dir / f"{version}-{feature_safe}.json",
+        "shared_feedback_md": shared_feedback_dir / f"{version}-{feature_safe}.md",
+    }
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _duplicate(src: Path, dst: Path, mode: str) -> str:
+    """Materialize ``dst`` as a reflink/hardlink of ``src`` (falling back to a copy); returns the method used."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    method = "copy"
+    if mode in ("auto", "reflink"):
+        try:
+            with src.open("rb") as source, tmp.open("wb") as target:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            method = "reflink"
+        except OSError:
+            tmp.unlink(missing_ok=True)
+    if method == "copy" and mode in ("auto", "hardlink"):
+        try:
+            os.link(src, tmp)
+            method = "hardlink"
+        except OSError:
+            pass
+    if method == "copy":
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+    # rename() is a no-op when both names already point at the same inode.
+    tmp.unlink(missing_ok=True)
+    return method
+
+
+def _sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _file_sha256(path: Path) -> str | None:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _expected_digests(cached: dict) -> dict[str, str | None]:
+    json_sha, md_sha = cached.get("json_sha256"), cached.get("md_sha256")
+    return {
+        "state_json": json_sha,
+        "feedback_json": json_sha,
+        "shared_feedback_json": json_sha,
+        "feedback_md": md_sha,
+        "shared_feedback_md": md_sha,
+    }
+
+
+def write_outputs(payload: dict, paths: dict[str, Path], link_mode: str) -> tuple[dict[str, str], dict[str, str]]:
+    """Serialize the JSON and MD once; the other three outputs are duplicates of those two files.
+
+    Returns (method per output, sha256 of the JSON and MD text).
+    """
+    json_text = json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
+    md_text = render_markdown(payload)
+    _write_atomic(paths["feedback_json"], json_text)
+    _write_atomic(paths["feedback_md"], md_text)
+    methods = {"feedback_json": "write", "feedback_md": "write"}
+    for name, src in (("shared_feedback_json", "feedback_json"), ("shared_feedback_md", "feedback_md")):
+        methods[name] = _duplicate(paths[src], paths[name], link_mode)
+    methods["state_json"] = _duplicate(paths["feedback_json"], paths["state_json"], "copy" if link_mode == "copy" else "reflink")
+    return methods, {"json_sha256": _sha256_text(json_text), "md_sha256": _sha256_text(md_text)}
+
+
+def prepare_session(session_file: Path) -> dict:
+    """Load one session and build its payload; runs in worker processes in batch mode."""
+    try:
+        session = load_json(session_file)
+        if not isinstance(session, dict):
+            raise ValueError(f"Invalid session json (not an object): {session_file}")
+        payload = build_payload(session)
+        source = payload.get("source", {})
+        lifecycle = session.get("lifecycle") if isinstance(session.get("lifecycle"), dict) else {}
+        return {
+            "session_file": str(session_file),
+            "version": str(source.get("version") or "unknown-version"),
+            "feature_safe": slugify(str(source.get("feature") or "feature")),
+            "order": (str(lifecycle.get("stopped_at") or ""), session_file.stat().st_mtime_ns, str(session_file)),
+            "digest": payload_digest(payload),
+            "payload": payload,
+        }
+    except Exception as exc:  # noqa: BLE001
+        # A malformed session must not abort a whole --sessions-dir sweep.
+        return {"session_file": str(session_file), "error": f"{type(exc).__name__}: {exc}"}
+
+
+def load_cache(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != FEEDBACK_CACHE_VERSION:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def save_cache(path: Path, entries: dict) -> None:
+    _write_atomic(path, json.dumps({"version": FEEDBACK_CACHE_VERSION, "entries": entries}, ensure_ascii=False))
+
+
+def emit_feedback(
+    prepared: dict, state_dir: Path, docs_root: Path, cache: dict, *, link_mode: str, force: bool
+) -> dict:
+    paths = output_paths(state_dir, docs_root, prepared["version"], prepared["feature_safe"])
+    key = f"{prepared['version']}/{prepared['feature_safe']}"
+    cached = cache.get(key) or {}
+    skipped = (
+        not force
+        and cached.get("digest") == prepared["digest"]
+        and all(_file_sha256(paths[name]) == sha for name, sha in _expected_digests(cached).items())
+    )
+    result: dict = {"session_file": prepared["session_file"], **{name: str(path) for name, path in paths.items()}}
+    if skipped:
+        result["skipped"] = True
+    else:
+        result["written"], written = write_outputs(prepared["payload"], paths, link_mode)
+        cache[key] = {"digest": prepared["digest"], "session_file": prepared["session_file"], **written}
+    result["open_questions"] = len(prepared["payload"].get("open_questions", []))
+    return result
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Generate requirement feedback from auto-test session artifact.")
-    parser.add_argument("--session-file", required=True, help="Path to test session json")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--session-file", help="Path to test session json")
+    target.add_argument("--sessions-dir", help="Directory of test session json files (batch mode)")
+    parser.add_argument("--glob", default="*.json", help="Session file pattern inside --sessions-dir (default: *.json)")
     parser.add_argument("--project-root", default=str(Path(__file__).resolve().parents[1]), help="Product toolkit root")
     parser.add_argument("--state-dir", default=".ptk/state/requirement-feedback", help="State output directory")
     parser.add_argument("--docs-root", default="docs/product", help="Docs output root")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes for batch mode (default: CPU count)")
+    parser.add_argument(
+        "--link-mode",
+        default="auto",
+        choices=LINK_MODES,
+        help="How duplicate outputs are materialized (auto: reflink, then hardlink, then copy)",
+    )
+    parser.add_argument("--force", action="store_true", help="Regenerate even when the payload digest is unchanged")
     args = parser.parse_args()
 
     project_root = Path(args.project_root).resolve()
-    session_file = Path(args.session_file).resolve()
     state_dir = (project_root / args.state_dir).resolve()
     docs_root = (project_root / args.docs_root).resolve()
-
-    session = load_json(session_file)
-    payload = build_payload(session)
-
-    source = payload.get("source", {})
-    version = str(source.get("version") or "unknown-version")
-    feature = str(source.get("feature") or "feature")
-    feature_safe = slugify(feature)
-
-    state_dir.mkdir(parents=True, exist_ok=True)
-    state_json = state_dir / f"{version}-{feature_safe}.json"
-    state_json.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-
-    feedback_dir = docs_root / version / "feedback"
-    feedback_dir.mkdir(parents=True, exist_ok=True)
-    feedback_json = feedback_dir / f"{feature_safe}.json"
-    feedback_md = feedback_dir / f"{feature_safe}.md"
-    feedback_json.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    feedback_md.write_text(render_markdown(payload), encoding="utf-8")
-
-    shared_feedback_dir = docs_root / "feedback"
-    shared_feedback_dir.mkdir(parents=True, exist_ok=True)
-    shared_feedback_json = shared_feedback_dir / f"{version}-{feature_safe}.json"
-    shared_feedback_md = shared_feedback_dir / f"{version}-{feature_safe}.md"
-    shared_feedback_json.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    shared_feedback_md.write_text(render_markdown(payload), encoding="utf-8")
+    cache_path = project_root / FEEDBACK_CACHE_REL
+    cache = load_cache(cache_path)
+
+    if args.session_file:
+        prepared = prepare_session(Path(args.session_file).resolve())
+        if "error" in prepared:
+            raise ValueError(prepared["error"])
+        result = emit_feedback(prepared, state_dir, docs_root, cache, link_mode=args.link_mode, force=args.force)
+        save_cache(cache_path, cache)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+
+    session_files = sorted(p for p in Path(args.sessions_dir).resolve().glob(args.glob) if p.is_file())
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        prepared_all = list(pool.map(prepare_session, session_files, chunksize=32))
+
+    errors = [item for item in prepared_all if "error" in item]
+    # Several sessions can target the same version/feature; only the newest one is emitted.
+    latest: dict[tuple[str, str], dict] = {}
+    for item in prepared_all:
+        if "error" in item:
+            continue
+        key = (item["version"], item["feature_safe"])
+        if key not in latest or tuple(item["order"]) > tuple(latest[key]["order"]):
+            latest[key] = item
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(
+            pool.map(
+                lambda item: emit_feedback(
+                    item, state_dir, docs_root, cache, link_mode=args.link_mode, force=args.force
+                ),
+                [latest[key] for key in sorted(latest)],
+            )
+        )
+    save_cache(cache_path, cache)
 
     print(
         json.dumps(
             {
-                "session_file": str(session_file),
-                "state_json": str(state_json),
-                "feedback_json": str(feedback_json),
-                "feedback_md": str(feedback_md),
-                "shared_feedback_json": str(shared_feedback_json),
-                "shared_feedback_md": str(shared_feedback_md),
-                "open_questions": len(payload.get("open_questions", [])),
+                "sessions_dir": str(Path(args.sessions_dir).resolve()),
+                "session_count": len(session_files),
+                "feature_count": len(results),
+                "generated": sum(1 for item in results if not item.get("skipped")),
+                "skipped": sum(1 for item in results if item.get("skipped")),
+                "superseded": len(session_files) - len(errors) - len(results),
+                "errors": [{"session_file": item["session_file"], "error": item["error"]} for item in errors],
+                "results": results,
             },
             ensure_ascii=False,
             indent=2,
         )
     )
-    return 0
+    return 2 if errors else 0
 
 
 if __name__ == "__main__":
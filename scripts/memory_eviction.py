@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Bounded memory stores for Product Toolkit.
+
+Enforces the limits declared in config/persistence.yaml:
+- memory.decisions.max_count        -> decisions.json "decisions"
+- memory.test_learnings.max_records -> test-learnings.json "signatures", "playbooks", "pitfalls" (each)
+- session.max_history_count         -> test-learnings.json "sessions"
+
+Writers that already hold a store in memory call evict_sections() on it before they write
+it back, under lock_store() (auto_test.sh for test learnings and sessions), so a write under
+the limit costs one len() per section and eviction never races the writer. The CLI and
+migrate_memory_v3.py go through enforce_limits(), which takes the same lock and rewrites the
+store only when a section overflowed (the remember skill runs the CLI for decisions). Once a
+section overflows, the lowest-scoring entries are evicted until it fits again. The score combines confidence, recency (updated_at and friends,
+halving every RECENCY_HALF_LIFE_DAYS) and usage (count / success+fail counts). Evicted
+entries are appended as a new gzip member to .ptk/memory/archive/<store>-NNNNNN.jsonl.gz.
+They are never deleted, and archive segments are never rewritten.
+
+Usage:
+  python3 scripts/memory_eviction.py --root . --store test_learnings --store sessions
+  python3 scripts/memory_eviction.py --root . --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import gzip
+import json
+import math
+import os
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+DEFAULT_LIMITS = {
+    "memory.decisions.max_count": 100,
+    "memory.test_learnings.max_records": 300,
+    "session.max_history_count": 10,
+}
+
+
+@dataclass(frozen=True)
+class BoundedSection:
+    store: str
+    file: str
+    section: str
+    limit_key: str
+
+
+BOUNDED_SECTIONS = (
+    BoundedSection("decisions", "decisions.json", "decisions", "memory.decisions.max_count"),
+    BoundedSection("test_learnings", "test-learnings.json", "signatures", "memory.test_learnings.max_records"),
+    BoundedSection("test_learnings", "test-learnings.json", "playbooks", "memory.test_learnings.max_records"),
+    BoundedSection("test_learnings", "test-learnings.json", "pitfalls", "memory.test_learnings.max_records"),
+    BoundedSection("sessions", "test-learnings.json", "sessions", "session.max_history_count"),
+)
+STORES = sorted({item.store for item in BOUNDED_SECTIONS})
+
+SCORE_WEIGHTS = {"confidence": 0.4, "recency": 0.4, "usage": 0.2}
+DEFAULT_CONFIDENCE = 0.5
+RECENCY_HALF_LIFE_DAYS = 30.0
+RECENCY_FIELDS = (
+    "updated_at",
+    "last_used",
+    "last_seen",
+    "stopped_at",
+    "decided_at",
+    "created_at",
+    "first_seen",
+    "started_at",
+)
+USAGE_FIELDS = ("usage_count", "use_count", "hits", "count")
+
+ARCHIVE_DIRNAME = "archive"
+ARCHIVE_SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+LOCK_NAME = ".eviction.lock"
+
+
+def iso_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def read_limits(config_path: Path) -> dict[str, int]:
+    """Read the integer limits from persistence.yaml (plain ``key: value`` nesting only)."""
+    limits = dict(DEFAULT_LIMITS)
+    try:
+        lines = config_path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return limits
+    stack: list[tuple[int, str]] = []
+    for raw in lines:
+        line = raw.split("#", 1)[0].rstrip()
+        if not line.strip() or ":" not in line:
+            continue
+        indent = len(line) - len(line.lstrip())
+        key, _, value = line.strip().partition(":")
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        dotted = ".".join([name for _, name in stack] + [key.strip()])
+        value = value.strip()
+        if not value:
+            stack.append((indent, key.strip()))
+        elif dotted in limits:
+            try:
+                limits[dotted] = int(value)
+            except ValueError:
+                pass
+    return limits
+
+
+def config_path_for(root: Path) -> Path:
+    """The project's persistence.yaml, falling back to the toolkit's own copy."""
+    config_path = root / "config" / "persistence.yaml"
+    if config_path.exists():
+        return config_path
+    return Path(__file__).resolve().parents[1] / "config" / "persistence.yaml"
+
+
+def _parse_ts(value: Any) -> datetime | None:
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _usage(entry: dict) -> float:
+    for key in USAGE_FIELDS:
+        value = entry.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return max(float(value), 0.0)
+    total = 0.0
+    for key in ("success_count", "fail_count"):
+        value = entry.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            total += max(float(value), 0.0)
+    return total
+
+
+def score_entries(entries: list[Any], now: datetime) -> list[float]:
+    """Retention score per entry; higher is kept longer. Non-dict entries score lowest."""
+    usages = [_usage(item) if isinstance(item, dict) else 0.0 for item in entries]
+    usage_scale = math.log1p(max(usages, default=0.0)) or 1.0
+    scores: list[float] = []
+    for item, usage in zip(entries, usages):
+        if not isinstance(item, dict):
+            scores.append(-1.0)
+            continue
+        confidence = item.get("confidence")
+        if not isinstance(confidence, (int, float)) or isinstance(confidence, bool):
+            confidence = DEFAULT_CONFIDENCE
+        stamp = next((ts for ts in (_parse_ts(item.get(key)) for key in RECENCY_FIELDS) if ts), None)
+        recency = 0.0
+        if stamp is not None:
+            age_days = max((now - stamp).total_seconds() / 86400.0, 0.0)
+            recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+        scores.append(
+            SCORE_WEIGHTS["confidence"] * min(max(float(confidence), 0.0), 1.0)
+            + SCORE_WEIGHTS["recency"] * recency
+            + SCORE_WEIGHTS["usage"] * math.log1p(usage) / usage_scale
+        )
+    return scores
+
+
+def select_evictions(entries: list[Any], limit: int, now: datetime) -> list[tuple[int, float]]:
+    """(index, score) of the entries to evict so that ``limit`` remain; lowest scores first."""
+    overflow = len(entries) - max(limit, 0)
+    if overflow <= 0:
+        return []
+    scores = score_entries(entries, now)
+    # Older positions lose ties, so equal-score stores behave like a FIFO.
+    ranked = sorted(range(len(entries)), key=lambda idx: (scores[idx], idx))
+    return sorted(((idx, round(scores[idx], 4)) for idx in ranked[:overflow]), key=lambda pair: pair[0])
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def lock_store(memory_dir: Path) -> IO[str]:
+    """Take the eviction lock for a short-lived writer; it is held until the handle closes or the process exits."""
+    memory_dir.mkdir(parents=True, exist_ok=True)
+    handle = (memory_dir / LOCK_NAME).open("a")
+    fcntl.flock(handle, fcntl.LOCK_EX)
+    return handle
+
+
+def _archive_segment(archive_dir: Path, stem: str) -> Path:
+    segments = sorted(archive_dir.glob(f"{stem}-*.jsonl.gz"))
+    if segments and segments[-1].stat().st_size < ARCHIVE_SEGMENT_MAX_BYTES:
+        return segments[-1]
+    seq = int(segments[-1].name[len(stem) + 1 :].split(".", 1)[0]) + 1 if segments else 1
+    return archive_dir / f"{stem}-{seq:06d}.jsonl.gz"
+
+
+def archive_entries(archive_dir: Path, stem: str, records: list[dict[str, Any]]) -> Path:
+    """Append ``records`` as one gzip member; concatenated members read back as one stream."""
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    segment = _archive_segment(archive_dir, stem)
+    payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+    with segment.open("ab") as handle:
+        handle.write(gzip.compress(payload))
+        handle.flush()
+        os.fsync(handle.fileno())
+    return segment
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _plan_evictions(
+    data: dict,
+    file_name: str,
+    sections: list[BoundedSection],
+    limits: dict[str, int],
+    now: datetime,
+    dry_run: bool,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Trim over-limit sections of ``data`` in place; returns (report rows, archive records)."""
+    report: list[dict[str, Any]] = []
+    archived: list[dict[str, Any]] = []
+    for bounded in sections:
+        entries = data.get(bounded.section)
+        if not isinstance(entries, list):
+            continue
+        limit = limits[bounded.limit_key]
+        evictions = select_evictions(entries, limit, now)
+        row: dict[str, Any] = {
+            "file": file_name,
+            "section": bounded.section,
+            "limit": limit,
+            "before": len(entries),
+            "evicted": len(evictions),
+            "after": len(entries) - len(evictions),
+        }
+        if dry_run:
+            row["would_evict"] = [
+                {"index": idx, "id": _entry_id(entries[idx]), "score": score} for idx, score in evictions
+            ]
+        report.append(row)
+        if not evictions or dry_run:
+            continue
+        stamp = iso_now()
+        evicted = {idx for idx, _ in evictions}
+        archived.extend(
+            {"archived_at": stamp, "file": file_name, "section": bounded.section, "score": score, "entry": entries[idx]}
+            for idx, score in evictions
+        )
+        data[bounded.section] = [item for idx, item in enumerate(entries) if idx not in evicted]
+    return report, archived
+
+
+def _archive_report(memory_dir: Path, file_name: str, data: dict, report: list[dict[str, Any]], archived: list) -> None:
+    segment = archive_entries(memory_dir / ARCHIVE_DIRNAME, Path(file_name).stem, archived)
+    data["updated_at"] = iso_now()
+    for row in report:
+        if row["evicted"]:
+            row["archive"] = str(segment)
+
+
+def evict_sections(
+    memory_dir: Path,
+    file_name: str,
+    data: dict,
+    limits: dict[str, int],
+    stores: list[str] | None = None,
+    *,
+    now: datetime | None = None,
+) -> list[dict[str, Any]]:
+    """Evict in place from a store the caller already loaded and is about to write back.
+
+    The caller holds lock_store(memory_dir) across its read, this call and its write, so
+    the archive and the rewritten store stay consistent. Sections within their limit cost
+    a len() and nothing is archived.
+    """
+    sections = [
+        item for item in BOUNDED_SECTIONS if item.file == file_name and (not stores or item.store in stores)
+    ]
+    report, archived = _plan_evictions(data, file_name, sections, limits, now or datetime.now(timezone.utc), False)
+    if archived:
+        _archive_report(memory_dir, file_name, data, report, archived)
+    return report
+
+
+def enforce_file(
+    memory_dir: Path,
+    file_name: str,
+    sections: list[BoundedSection],
+    limits: dict[str, int],
+    *,
+    dry_run: bool = False,
+    now: datetime | None = None,
+) -> list[dict[str, Any]]:
+    path = memory_dir / file_name
+    try:
+        before = path.stat()
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    if not isinstance(data, dict):
+        return []
+
+    report, archived = _plan_evictions(data, file_name, sections, limits, now or datetime.now(timezone.utc), dry_run)
+    if dry_run or not archived:
+        return report
+    current = path.stat()
+    if (current.st_mtime_ns, current.st_size) != (before.st_mtime_ns, before.st_size):
+        # A writer outside lock_store() (e.g. a hand edit) replaced the store while we were scoring.
+        for row in report:
+            row["evicted"], row["after"], row["skipped"] = 0, row["before"], "store changed concurrently"
+        return report
+    _archive_report(memory_dir, file_name, data, report, archived)
+    _write_json_atomic(path, data)
+    return report
+
+
+def _entry_id(entry: Any) -> str:
+    if not isinstance(entry, dict):
+        return ""
+    for key in ("memory_id", "id", "signature_id", "playbook_id", "session_id", "signature"):
+        value = entry.get(key)
+        if isinstance(value, str) and value:
+            return value
+    return ""
+
+
+def enforce_limits(
+    memory_dir: Path,
+    limits: dict[str, int],
+    stores: list[str] | None = None,
+    *,
+    dry_run: bool = False,
+    now: datetime | None = None,
+) -> list[dict[str, Any]]:
+    selected = [item for item in BOUNDED_SECTIONS if not stores or item.store in stores]
+    by_file: dict[str, list[BoundedSection]] = {}
+    for item in selected:
+        by_file.setdefault(item.file, []).append(item)
+    report: list[dict[str, Any]] = []
+    with file_lock(memory_dir / LOCK_NAME):
+        for file_name, sections in by_file.items():
+            report.extend(enforce_file(memory_dir, file_name, sections, limits, dry_run=dry_run, now=now))
+    return report
+
+
+def iter_archive(memory_dir: Path, stem: str) -> Iterator[dict[str, Any]]:
+    for segment in sorted((memory_dir / ARCHIVE_DIRNAME).glob(f"{stem}-*.jsonl.gz")):
+        with gzip.open(segment, "rt", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
+
+
+def main() -> int:
+    toolkit_root = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Enforce persistence.yaml memory limits with scored eviction.")
+    parser.add_argument("--root", default=str(toolkit_root), help="Project root (default: script parent)")
+    parser.add_argument("--memory-dir", default="", help="Memory directory (default: <root>/.ptk/memory)")
+    parser.add_argument("--config", default="", help="persistence.yaml (default: <root>/config, then the toolkit's)")
+    parser.add_argument("--store", action="append", default=[], choices=STORES, help="Limit to one store (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be evicted without writing")
+    args = parser.parse_args()
+
+    root = Path(args.root).resolve()
+    memory_dir = Path(args.memory_dir).resolve() if args.memory_dir else root / ".ptk" / "memory"
+    config_path = Path(args.config) if args.config else config_path_for(root)
+    limits = read_limits(config_path)
+
+    report = enforce_limits(memory_dir, limits, args.store, dry_run=args.dry_run)
+    payload = {
+        "mode": "dry-run" if args.dry_run else "enforce",
+        "config": str(config_path),
+        "limits": limits,
+        "evicted": sum(row["evicted"] for row in report),
+        "sections": report,
+    }
+    print(json.dumps(payload, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
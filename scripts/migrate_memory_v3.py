@@ -6,31 +6,71 @@ Goals:
 - normalize memory entries with a unified metadata envelope
 - keep backward compatibility with existing data structures
 - provide dry-run and rollback support
+
+Migrators are pure transforms over the loaded JSON; --dry-run never writes and reports
+every entry that would change (section, index, memory_id, fields). A real migration
+backs up the targets, migrates the files concurrently and replaces each one atomically,
+then evicts decisions over memory.decisions.max_count (see memory_eviction.py).
+
+Large test-learnings.json files (--stream, or >= 64 MiB) are migrated one array element
+at a time; --jsonl-sidecar additionally writes test-learnings.jsonl for lazy readers.
 """
 
 from __future__ import annotations
 
 import argparse
+import copy
 import json
+import os
+import re
 import shutil
 import sys
 import uuid
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Callable, Iterable, Iterator, TextIO
+
+from memory_eviction import config_path_for, enforce_limits, read_limits
 
 
 def iso_now() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
+@dataclass
+class EntryChange:
+    section: str
+    index: int
+    memory_id: str
+    fields: list[str]
+
+
+@dataclass
+class Transform:
+    """Result of a pure migrator: the migrated copy plus what changed in it."""
+
+    data: dict
+    entries_touched: int
+    entry_changes: list[EntryChange] = field(default_factory=list)
+    note: str = ""
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.entry_changes)
+
+
 @dataclass
 class FileMigrationResult:
     path: Path
     changed: bool
     entries_touched: int
     note: str = ""
+    entry_changes: list[EntryChange] = field(default_factory=list)
+    entries_changed: int = 0
+    field_counts: dict[str, int] = field(default_factory=dict)
+    sidecar: Path | None = None
 
 
 def read_json(path: Path) -> dict:
@@ -44,7 +84,9 @@ def read_json(path: Path) -> dict:
 
 def write_json(path: Path, data: dict) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
 
 
 def first_non_empty(entry: dict, keys: Iterable[str]) -> str | None:
@@ -63,8 +105,8 @@ def normalize_entry(
     created_candidates: list[str],
     updated_candidates: list[str],
     default_source: str,
-) -> bool:
-    changed = False
+) -> list[str]:
+    changed: list[str] = []
     if not isinstance(entry, dict):
         return changed
 
@@ -73,34 +115,34 @@ def normalize_entry(
         existing_id = str(uuid.uuid4())
     if entry.get("memory_id") != existing_id:
         entry["memory_id"] = existing_id
-        changed = True
+        changed.append("memory_id")
 
     if entry.get("type") != entry_type:
         entry["type"] = entry_type
-        changed = True
+        changed.append("type")
 
     source_session_id = first_non_empty(entry, ["source_session_id", "session_id"]) or "system"
     if entry.get("source_session_id") != source_session_id:
         entry["source_session_id"] = source_session_id
-        changed = True
+        changed.append("source_session_id")
 
     source = first_non_empty(entry, ["source"]) or default_source
     if entry.get("source") != source:
         entry["source"] = source
-        changed = True
+        changed.append("source")
 
     created_at = first_non_empty(entry, created_candidates) or iso_now()
     updated_at = first_non_empty(entry, updated_candidates) or created_at
     if entry.get("created_at") != created_at:
         entry["created_at"] = created_at
-        changed = True
+        changed.append("created_at")
     if entry.get("updated_at") != updated_at:
         entry["updated_at"] = updated_at
-        changed = True
+        changed.append("updated_at")
 
     if "confidence" not in entry:
         entry["confidence"] = 0.7 if entry_type.startswith("test_") else 0.8
-        changed = True
+        changed.append("confidence")
 
     if "tags" not in entry or not isinstance(entry.get("tags"), list):
         tags: list[str] = []
@@ -110,7 +152,7 @@ def normalize_entry(
         if entry_type.startswith("test_"):
             tags.append("test-memory")
         entry["tags"] = sorted(set(tags))
-        changed = True
+        changed.append("tags")
 
     if "evidence_ref" not in entry:
         evidence = None
@@ -120,152 +162,365 @@ def normalize_entry(
                 evidence = value.strip()
                 break
         entry["evidence_ref"] = evidence or []
-        changed = True
+        changed.append("evidence_ref")
 
     return changed
 
 
-def migrate_insights(path: Path) -> FileMigrationResult:
-    data = read_json(path)
-    if not data:
-        return FileMigrationResult(path, False, 0, "file missing or empty")
-
-    items = data.get("insights")
-    if not isinstance(items, list):
-        return FileMigrationResult(path, False, 0, "no insights array")
-
-    changed = False
+def _normalize_section(data: dict, section: str, changes: list[EntryChange], **kwargs) -> int:
     touched = 0
-    for item in items:
+    for index, item in enumerate(data.get(section) or []):
         touched += 1
-        changed |= normalize_entry(
-            item,
-            entry_type="insight",
-            id_candidates=["id"],
-            created_candidates=["created_at"],
-            updated_candidates=["updated_at", "created_at"],
-            default_source="remember",
-        )
-
-    if changed:
-        data["schema_version"] = "3.0"
-        data["updated_at"] = iso_now()
-        write_json(path, data)
-    return FileMigrationResult(path, changed, touched)
-
-
-def migrate_decisions(path: Path) -> FileMigrationResult:
-    data = read_json(path)
-    if not data:
-        return FileMigrationResult(path, False, 0, "file missing or empty")
-
-    items = data.get("decisions")
-    if not isinstance(items, list):
-        return FileMigrationResult(path, False, 0, "no decisions array")
+        fields = normalize_entry(item, **kwargs)
+        if fields:
+            changes.append(EntryChange(section, index, str(item.get("memory_id", "")), fields))
+    return touched
 
-    changed = False
-    touched = 0
-    for item in items:
-        touched += 1
-        changed |= normalize_entry(
-            item,
-            entry_type="decision",
-            id_candidates=["id"],
-            created_candidates=["created_at", "decided_at"],
-            updated_candidates=["updated_at", "decided_at", "created_at"],
-            default_source="remember",
-        )
 
-    if changed:
+def _finish(data: dict, touched: int, changes: list[EntryChange]) -> Transform:
+    if changes:
         data["schema_version"] = "3.0"
         data["updated_at"] = iso_now()
-        write_json(path, data)
-    return FileMigrationResult(path, changed, touched)
+    return Transform(data, touched, changes)
 
 
-def migrate_vocabulary(path: Path) -> FileMigrationResult:
-    data = read_json(path)
+def migrate_insights(data: dict) -> Transform:
     if not data:
-        return FileMigrationResult(path, False, 0, "file missing or empty")
-
-    items = data.get("terms")
-    if not isinstance(items, list):
-        return FileMigrationResult(path, False, 0, "no terms array")
-
-    changed = False
-    touched = 0
-    for item in items:
-        touched += 1
-        changed |= normalize_entry(
-            item,
-            entry_type="vocabulary",
-            id_candidates=["id", "term"],
-            created_candidates=["created_at"],
-            updated_candidates=["updated_at", "created_at"],
-            default_source="remember",
-        )
-
-    if changed:
-        data["schema_version"] = "3.0"
-        data["updated_at"] = iso_now()
-        write_json(path, data)
-    return FileMigrationResult(path, changed, touched)
-
-
-def migrate_test_learnings(path: Path) -> FileMigrationResult:
-    data = read_json(path)
+        return Transform(data, 0, note="file missing or empty")
+    if not isinstance(data.get("insights"), list):
+        return Transform(data, 0, note="no insights array")
+
+    data = copy.deepcopy(data)
+    changes: list[EntryChange] = []
+    touched = _normalize_section(
+        data,
+        "insights",
+        changes,
+        entry_type="insight",
+        id_candidates=["id"],
+        created_candidates=["created_at"],
+        updated_candidates=["updated_at", "created_at"],
+        default_source="remember",
+    )
+    return _finish(data, touched, changes)
+
+
+def migrate_decisions(data: dict) -> Transform:
     if not data:
-        return FileMigrationResult(path, False, 0, "file missing or empty")
+        return Transform(data, 0, note="file missing or empty")
+    if not isinstance(data.get("decisions"), list):
+        return Transform(data, 0, note="no decisions array")
+
+    data = copy.deepcopy(data)
+    changes: list[EntryChange] = []
+    touched = _normalize_section(
+        data,
+        "decisions",
+        changes,
+        entry_type="decision",
+        id_candidates=["id"],
+        created_candidates=["created_at", "decided_at"],
+        updated_candidates=["updated_at", "decided_at", "created_at"],
+        default_source="remember",
+    )
+    return _finish(data, touched, changes)
+
+
+def migrate_vocabulary(data: dict) -> Transform:
+    if not data:
+        return Transform(data, 0, note="file missing or empty")
+    if not isinstance(data.get("terms"), list):
+        return Transform(data, 0, note="no terms array")
+
+    data = copy.deepcopy(data)
+    changes: list[EntryChange] = []
+    touched = _normalize_section(
+        data,
+        "terms",
+        changes,
+        entry_type="vocabulary",
+        id_candidates=["id", "term"],
+        created_candidates=["created_at"],
+        updated_candidates=["updated_at", "created_at"],
+        default_source="remember",
+    )
+    return _finish(data, touched, changes)
+
+
+TEST_LEARNING_SECTIONS: dict[str, dict] = {
+    "signatures": {
+        "entry_type": "test_signature",
+        "id_candidates": ["signature_id", "signature"],
+        "created_candidates": ["created_at", "first_seen"],
+        "updated_candidates": ["updated_at", "last_seen", "first_seen"],
+        "default_source": "auto-test",
+    },
+    "playbooks": {
+        "entry_type": "test_playbook",
+        "id_candidates": ["playbook_id", "signature_id"],
+        "created_candidates": ["created_at", "last_used", "updated_at"],
+        "updated_candidates": ["updated_at", "last_used", "created_at"],
+        "default_source": "auto-test",
+    },
+    "sessions": {
+        "entry_type": "test_session",
+        "id_candidates": ["session_id"],
+        "created_candidates": ["created_at", "started_at"],
+        "updated_candidates": ["updated_at", "stopped_at", "started_at"],
+        "default_source": "auto-test",
+    },
+}
+
+
+def migrate_test_learnings(data: dict) -> Transform:
+    if not data:
+        return Transform(data, 0, note="file missing or empty")
 
-    changed = False
+    data = copy.deepcopy(data)
+    changes: list[EntryChange] = []
     touched = 0
-
-    signatures = data.get("signatures")
-    if isinstance(signatures, list):
-        for item in signatures:
-            touched += 1
-            changed |= normalize_entry(
-                item,
-                entry_type="test_signature",
-                id_candidates=["signature_id", "signature"],
-                created_candidates=["created_at", "first_seen"],
-                updated_candidates=["updated_at", "last_seen", "first_seen"],
-                default_source="auto-test",
-            )
-
-    playbooks = data.get("playbooks")
-    if isinstance(playbooks, list):
-        for item in playbooks:
-            touched += 1
-            changed |= normalize_entry(
-                item,
-                entry_type="test_playbook",
-                id_candidates=["playbook_id", "signature_id"],
-                created_candidates=["created_at", "last_used", "updated_at"],
-                updated_candidates=["updated_at", "last_used", "created_at"],
-                default_source="auto-test",
-            )
-
-    sessions = data.get("sessions")
-    if isinstance(sessions, list):
-        for item in sessions:
+    for section, spec in TEST_LEARNING_SECTIONS.items():
+        if isinstance(data.get(section), list):
+            touched += _normalize_section(data, section, changes, **spec)
+    # Keep version=2.0 for runtime backward compatibility in auto_test.sh
+    return _finish(data, touched, changes)
+
+
+# --- streaming path for large test-learnings.json ---------------------------------
+
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+STREAM_CHUNK_CHARS = 1 << 20
+SIDECAR_SUFFIX = ".jsonl"
+
+_DECODER = json.JSONDecoder()
+# Characters a JSON number can still continue with ("123." | "5e10" split across chunks).
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+
+class _JsonStream:
+    """Minimal pull reader: decodes one JSON value at a time from a chunked buffer."""
+
+    def __init__(self, fh: TextIO) -> None:
+        self.fh = fh
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        chunk = self.fh.read(STREAM_CHUNK_CHARS)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} in streamed JSON, got {self.peek()!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number decoded up to (or followed only by number characters until) the end
+            # of the buffer may continue in the next chunk.
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if is_number and _NUMBER_TAIL.fullmatch(self.buf, end) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_events(path: Path, array_keys: Iterable[str]) -> Iterator[tuple[str, str, Any]]:
+    """Yield top-level ("value", key, value) events; arrays under ``array_keys`` are
+    streamed as ("begin", key, None), ("item", key, element)..., ("end", key, None)."""
+    array_keys = set(array_keys)
+    with path.open(encoding="utf-8") as fh:
+        stream = _JsonStream(fh)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key in array_keys and stream.peek() == "[":
+                stream.expect("[")
+                yield "begin", key, None
+                if stream.peek() == "]":
+                    stream.pos += 1
+                else:
+                    while True:
+                        yield "item", key, stream.value()
+                        if stream.peek() != ",":
+                            stream.expect("]")
+                            break
+                        stream.pos += 1
+                yield "end", key, None
+            else:
+                yield "value", key, stream.value()
+            if stream.peek() != ",":
+                stream.expect("}")
+                return
+            stream.pos += 1
+
+
+def _indented(value: Any, level: int) -> str:
+    return json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n" + "  " * level)
+
+
+def stream_test_learnings(path: Path, *, dry_run: bool, sidecar: bool) -> FileMigrationResult:
+    """Migrate test-learnings.json one array element at a time.
+
+    Pass 1 counts the changes and collects the (small) non-array top-level fields;
+    pass 2 rewrites the file in ``json.dumps(indent=2)`` layout and/or writes a JSONL
+    sidecar (one header record, then one record per entry) via temp file + rename.
+    """
+    touched = 0
+    changes: list[EntryChange] = []
+    changed_count = 0
+    counts: dict[str, int] = {}
+    header: dict[str, Any] = {}
+    index = 0
+    for kind, key, value in iter_json_events(path, TEST_LEARNING_SECTIONS):
+        if kind == "value":
+            header[key] = value
+        elif kind == "begin":
+            index = 0
+        elif kind == "item":
             touched += 1
-            changed |= normalize_entry(
-                item,
-                entry_type="test_session",
-                id_candidates=["session_id"],
-                created_candidates=["created_at", "started_at"],
-                updated_candidates=["updated_at", "stopped_at", "started_at"],
-                default_source="auto-test",
-            )
-
-    if changed:
-        # Keep version=2.0 for runtime backward compatibility in auto_test.sh
-        data["schema_version"] = "3.0"
-        data["updated_at"] = iso_now()
-        write_json(path, data)
+            fields = normalize_entry(value, **TEST_LEARNING_SECTIONS[key])
+            if fields:
+                changed_count += 1
+                for name in fields:
+                    counts[name] = counts.get(name, 0) + 1
+                if dry_run:
+                    changes.append(EntryChange(key, index, str(value.get("memory_id", "")), fields))
+            index += 1
+    if not header and not touched:
+        return FileMigrationResult(path, False, 0, "file missing or empty")
 
-    return FileMigrationResult(path, changed, touched)
+    changed = changed_count > 0
+    result = FileMigrationResult(path, changed, touched, "streamed", changes, changed_count, dict(sorted(counts.items())))
+    if dry_run:
+        result.note = "would change (streamed)" if changed else "streamed"
+        return result
+    if not changed and not sidecar:
+        return result
+
+    updates = {"schema_version": "3.0", "updated_at": iso_now()} if changed else {}
+    header.update(updates)
+    sidecar_path = path.with_suffix(SIDECAR_SUFFIX)
+    json_tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    side_tmp = sidecar_path.with_name(f".{sidecar_path.name}.{os.getpid()}.tmp")
+    json_out = json_tmp.open("w", encoding="utf-8") if changed else None
+    side_out = side_tmp.open("w", encoding="utf-8") if sidecar else None
+    try:
+        if side_out:
+            side_out.write(json.dumps({"record": "header", "source": path.name, "fields": header}, ensure_ascii=False) + "\n")
+        seen: set[str] = set()
+        first_key = True
+        first_item = True
+        for kind, key, value in iter_json_events(path, TEST_LEARNING_SECTIONS):
+            if kind == "item":
+                normalize_entry(value, **TEST_LEARNING_SECTIONS[key])
+                if side_out:
+                    side_out.write(json.dumps({"record": "entry", "section": key, "entry": value}, ensure_ascii=False) + "\n")
+            if not json_out:
+                continue
+            if kind in ("value", "begin"):
+                seen.add(key)
+                json_out.write(("{\n" if first_key else ",\n") + f"  {json.dumps(key, ensure_ascii=False)}: ")
+                first_key = False
+            if kind == "value":
+                json_out.write(_indented(updates.get(key, value), 1))
+            elif kind == "begin":
+                json_out.write("[")
+                first_item = True
+            elif kind == "item":
+                json_out.write(("\n    " if first_item else ",\n    ") + _indented(value, 2))
+                first_item = False
+            elif kind == "end":
+                json_out.write("]" if first_item else "\n  ]")
+        if json_out:
+            for key, value in updates.items():
+                if key not in seen:
+                    json_out.write(("{\n" if first_key else ",\n") + f"  {json.dumps(key)}: {_indented(value, 1)}")
+                    first_key = False
+            json_out.write("\n}\n")
+    finally:
+        for handle in (json_out, side_out):
+            if handle:
+                handle.close()
+    if side_out:
+        os.replace(side_tmp, sidecar_path)
+        result.sidecar = sidecar_path
+    if json_out:
+        os.replace(json_tmp, path)
+    return result
+
+
+MIGRATORS: dict[str, Callable[[dict], Transform]] = {
+    "project-insights.json": migrate_insights,
+    "decisions.json": migrate_decisions,
+    "vocabulary.json": migrate_vocabulary,
+    "test-learnings.json": migrate_test_learnings,
+}
+
+
+def migrate_file(path: Path, *, dry_run: bool, stream: bool = False, sidecar: bool = False) -> FileMigrationResult:
+    """Run the pure migrator for ``path``; only write (atomically) when not a dry run.
+
+    test-learnings.json goes through the streaming path when asked to, when a JSONL
+    sidecar is requested, or once it reaches STREAM_THRESHOLD_BYTES.
+    """
+    if not path.exists():
+        return FileMigrationResult(path, False, 0, "file missing")
+    if path.name == "test-learnings.json" and (stream or sidecar or path.stat().st_size >= STREAM_THRESHOLD_BYTES):
+        try:
+            return stream_test_learnings(path, dry_run=dry_run, sidecar=sidecar)
+        except Exception as exc:  # pragma: no cover
+            return FileMigrationResult(path, False, 0, f"error: {exc}")
+    try:
+        result = MIGRATORS[path.name](read_json(path))
+    except Exception as exc:  # pragma: no cover
+        return FileMigrationResult(path, False, 0, f"error: {exc}")
+    note = result.note
+    if result.changed:
+        if dry_run:
+            note = "would change"
+        else:
+            write_json(path, result.data)
+    return FileMigrationResult(
+        path,
+        result.changed,
+        result.entries_touched,
+        note,
+        result.entry_changes,
+        len(result.entry_changes),
+        summarize_changes(result.entry_changes),
+    )
+
+
+def summarize_changes(changes: list[EntryChange]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for change in changes:
+        for name in change.fields:
+            counts[name] = counts.get(name, 0) + 1
+    return dict(sorted(counts.items()))
 
 
 def create_backup(files: list[Path], backup_root: Path) -> Path:
@@ -295,6 +550,16 @@ def main() -> int:
     parser.add_argument("--root", default=str(Path(__file__).resolve().parents[1]), help="Project root (default: script parent)")
     parser.add_argument("--dry-run", action="store_true", help="Show what would be migrated without writing changes")
     parser.add_argument("--rollback", help="Restore memory files from a backup directory")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Migrate test-learnings.json incrementally (automatic above 64 MiB)",
+    )
+    parser.add_argument(
+        "--jsonl-sidecar",
+        action="store_true",
+        help="Also write test-learnings.jsonl (header record + one record per entry)",
+    )
     args = parser.parse_args()
 
     root = Path(args.root).resolve()
@@ -306,42 +571,23 @@ def main() -> int:
         print(json.dumps({"mode": "rollback", "restored_files": restored}, ensure_ascii=False, indent=2))
         return 0
 
-    targets = [
-        memory_dir / "project-insights.json",
-        memory_dir / "decisions.json",
-        memory_dir / "vocabulary.json",
-        memory_dir / "test-learnings.json",
-    ]
-
-    migrators = {
-        "project-insights.json": migrate_insights,
-        "decisions.json": migrate_decisions,
-        "vocabulary.json": migrate_vocabulary,
-        "test-learnings.json": migrate_test_learnings,
-    }
+    targets = [memory_dir / name for name in MIGRATORS]
 
-    existing_targets = [p for p in targets if p.exists()]
-    backup_dir = create_backup(existing_targets, backup_root) if existing_targets else None
+    backup_dir = None
+    if not args.dry_run:
+        existing_targets = [p for p in targets if p.exists()]
+        backup_dir = create_backup(existing_targets, backup_root) if existing_targets else None
 
-    results: list[FileMigrationResult] = []
-    for path in targets:
-        migrator = migrators[path.name]
-        if args.dry_run:
-            # simulate by reading only
-            try:
-                result = migrator(path)
-            except Exception as exc:  # pragma: no cover
-                result = FileMigrationResult(path, False, 0, f"error: {exc}")
-            # rollback immediately if dry run wrote anything
-            if result.changed and backup_dir:
-                shutil.copy2(backup_dir / path.name, path)
-                result = FileMigrationResult(path, True, result.entries_touched, "would change")
-            elif not path.exists():
-                result = FileMigrationResult(path, False, 0, "file missing")
-            results.append(result)
-            continue
-
-        results.append(migrator(path))
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        results = list(
+            pool.map(
+                lambda path: migrate_file(path, dry_run=args.dry_run, stream=args.stream, sidecar=args.jsonl_sidecar),
+                targets,
+            )
+        )
+
+    # decisions.json has no other scripted writer; keep it within memory.decisions.max_count.
+    eviction = [] if args.dry_run else enforce_limits(memory_dir, read_limits(config_path_for(root)), ["decisions"])
 
     payload = {
         "mode": "dry-run" if args.dry_run else "migrate",
@@ -352,10 +598,15 @@ def main() -> int:
                 "file": str(r.path),
                 "changed": r.changed,
                 "entries_touched": r.entries_touched,
+                "entries_changed": r.entries_changed,
+                "field_counts": r.field_counts,
                 "note": r.note,
+                **({"sidecar": str(r.sidecar)} if r.sidecar else {}),
+                **({"entries": [asdict(c) for c in r.entry_changes]} if args.dry_run else {}),
             }
             for r in results
         ],
+        "eviction": eviction,
     }
     print(json.dumps(payload, ensure_ascii=False, indent=2))
     return 0
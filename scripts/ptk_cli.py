@@ -4,15 +4,34 @@
 from __future__ import annotations
 
 import argparse
+import copy
+import ctypes
+import ctypes.util
+import hashlib
 import json
+import os
 import re
 import secrets
+import select
+import socket
+import socketserver
+import sqlite3
 import sys
+import threading
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from io import StringIO
+from typing import Any, Callable, Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
 
 
 TOOLKIT_VERSION = "3.7.0"
@@ -45,7 +64,7 @@ WORKFLOW_ALIASES = {
     "ralph_bridge": "ralph-bridge",
     "bridge": "ralph-bridge",
 }
-KNOWN_COMMANDS = {"status", "run", "debug", "report", "feedback", "resume", "doctor", "help", "-h", "--help"}
+KNOWN_COMMANDS = {"status", "run", "runs", "scope", "memory", "serve", "debug", "report", "feedback", "resume", "doctor", "help", "-h", "--help"}
 
 INTENT_RULES = [
     {
@@ -78,9 +97,31 @@ def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+# Enabled only inside ``ptk serve``: "<kind>:<path>" -> ((st_mtime_ns, st_size), parsed value).
+# Callers get deep copies, so mutating a returned value never leaks into later requests.
+_WARM_CACHE: dict[str, tuple[tuple[int, int], Any]] | None = None
+
+
+def _warm_cached(kind: str, path: Path, loader: Callable[[], Any]) -> Any:
+    if _WARM_CACHE is None:
+        return loader()
+    try:
+        stat = path.stat()
+    except OSError:
+        return loader()
+    key = f"{kind}:{path}"
+    signature = (stat.st_mtime_ns, stat.st_size)
+    hit = _WARM_CACHE.get(key)
+    if hit is not None and hit[0] == signature:
+        return copy.deepcopy(hit[1])
+    value = loader()
+    _WARM_CACHE[key] = (signature, value)
+    return copy.deepcopy(value)
+
+
 def read_json(path: Path, fallback: Any) -> Any:
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        return _warm_cached("json", path, lambda: json.loads(path.read_text(encoding="utf-8")))
     except Exception:  # noqa: BLE001
         return fallback
 
@@ -90,10 +131,77 @@ def write_json(path: Path, data: Any) -> None:
     path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
 
 
-def append_jsonl(path: Path, item: dict[str, Any]) -> None:
+def write_json_atomic(path: Path, data: Any) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock on ``path`` (no-op where fcntl is unavailable)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+EVENT_DURABILITY_POLICIES = ("none", "per-event", "end-of-run")
+
+
+class RunEventSink:
+    """Run-scoped writer for events.jsonl.
+
+    Holds one buffered handle for the whole run (opened on the first event) and
+    keeps the emitted events in memory. Durability policy: ``none`` never
+    fsyncs, ``per-event`` flushes and fsyncs after every event, ``end-of-run``
+    fsyncs once in ``close``.
+    """
+
+    def __init__(self, path: Path, durability: str = "end-of-run", buffer_size: int = 64 * 1024) -> None:
+        if durability not in EVENT_DURABILITY_POLICIES:
+            raise ValueError(f"unknown durability policy: {durability}")
+        self.path = path
+        self.durability = durability
+        self.buffer_size = buffer_size
+        self.events: list[dict[str, Any]] = []
+        self._handle: Any = None
+
+    def emit(self, event: dict[str, Any]) -> None:
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = self.path.open("a", encoding="utf-8", buffering=self.buffer_size)
+        self._handle.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self.events.append(event)
+        if self.durability == "per-event":
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+
+    def close(self) -> None:
+        if self._handle is None:
+            return
+        self._handle.flush()
+        if self.durability == "end-of-run":
+            os.fsync(self._handle.fileno())
+        self._handle.close()
+        self._handle = None
+
+    def discard(self) -> None:
+        """Drop everything written so far (used when a run aborts before it starts)."""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self.events = []
 
 
 @dataclass
@@ -117,6 +225,10 @@ class Context:
     def runs_dir(self) -> Path:
         return self.root / ".ptk" / "runs"
 
+    @property
+    def memory_dir(self) -> Path:
+        return self.root / ".ptk" / "memory"
+
     @property
     def scope_memory_dir(self) -> Path:
         return self.root / ".ptk" / "memory" / "scope"
@@ -125,9 +237,20 @@ class Context:
     def terminal_path(self) -> Path:
         return self.execution_dir / "terminal.json"
 
+    @property
+    def cache_dir(self) -> Path:
+        return self.root / ".ptk" / "cache"
+
 
 def parse_acceptance_criteria(user_story_path: Path) -> dict[str, Any]:
-    text = user_story_path.read_text(encoding="utf-8")
+    return _warm_cached("ac", user_story_path, lambda: _parse_acceptance_criteria(user_story_path))
+
+
+def _parse_acceptance_criteria(user_story_path: Path) -> dict[str, Any]:
+    return parse_acceptance_criteria_text(user_story_path.read_text(encoding="utf-8"))
+
+
+def parse_acceptance_criteria_text(text: str) -> dict[str, Any]:
     lines = text.splitlines()
     acs: list[dict[str, str]] = []
     core_scope: list[str] = []
@@ -156,13 +279,79 @@ def parse_acceptance_criteria(user_story_path: Path) -> dict[str, Any]:
     }
 
 
-def create_ac_scope(ctx: Context) -> Path:
+# Bump when parse_acceptance_criteria_text output changes so stale cache entries are ignored.
+AC_SCOPE_CACHE_VERSION = 1
+
+
+@dataclass
+class AcScopeResult:
+    path: Path
+    scope: dict[str, Any]
+    cache: dict[str, Any]
+
+
+def _stat_signature(path: Path) -> dict[str, int]:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def create_ac_scope(ctx: Context) -> AcScopeResult:
+    """Bind the AC scope for strict mode, reusing .ptk/cache/ac-scope when the story is unchanged.
+
+    Lookup order: (size, mtime_ns) match against the cache index, then the story's
+    sha256, then a fresh parse. ac_scope.json is only rewritten when its content
+    would change or the file was modified since PTK last wrote it.
+    """
     if not ctx.user_story_path.exists():
         raise FileNotFoundError(str(ctx.user_story_path))
-    ac_scope = parse_acceptance_criteria(ctx.user_story_path)
+
+    cache_root = ctx.cache_dir / "ac-scope"
+    index_path = cache_root / "index.json"
+    index = read_json(index_path, {})
+    if not isinstance(index, dict):
+        index = {}
+    stories = index.setdefault("stories", {})
+    outputs = index.setdefault("outputs", {})
+
+    story_key = str(ctx.user_story_path.resolve())
+    signature = _stat_signature(ctx.user_story_path)
+    entry = stories.get(story_key) if isinstance(stories.get(story_key), dict) else {}
+
+    ac_scope: Any = None
+    cache_key = ""
+    source = "parse"
+    if entry.get("version") == AC_SCOPE_CACHE_VERSION and all(entry.get(k) == v for k, v in signature.items()):
+        cache_key = str(entry.get("cache_key", ""))
+        ac_scope = read_json(cache_root / f"{cache_key}.json", None)
+        source = "stat"
+    if not isinstance(ac_scope, dict):
+        raw = ctx.user_story_path.read_bytes()
+        cache_key = f"v{AC_SCOPE_CACHE_VERSION}-{hashlib.sha256(raw).hexdigest()}"
+        ac_scope = read_json(cache_root / f"{cache_key}.json", None)
+        source = "hash"
+        if not isinstance(ac_scope, dict):
+            ac_scope = parse_acceptance_criteria_text(raw.decode("utf-8"))
+            write_json_atomic(cache_root / f"{cache_key}.json", ac_scope)
+            source = "parse"
+
     out = ctx.execution_dir / "ac_scope.json"
-    write_json(out, ac_scope)
-    return out
+    out_key = str(out.resolve())
+    written = outputs.get(out_key) if isinstance(outputs.get(out_key), dict) else {}
+    rewritten = not (
+        out.exists()
+        and written.get("cache_key") == cache_key
+        and all(written.get(k) == v for k, v in _stat_signature(out).items())
+    )
+    if rewritten:
+        write_json(out, ac_scope)
+        outputs[out_key] = {"cache_key": cache_key, **_stat_signature(out)}
+
+    if source != "stat" or rewritten:
+        stories[story_key] = {"version": AC_SCOPE_CACHE_VERSION, "cache_key": cache_key, **signature}
+        write_json_atomic(index_path, index)
+
+    cache = {"hit": source != "parse", "source": source, "key": cache_key, "ac_scope_rewritten": rewritten}
+    return AcScopeResult(path=out, scope=ac_scope, cache=cache)
 
 
 def resolve_workflow_route(name: str) -> dict[str, Any] | None:
@@ -205,17 +394,356 @@ def infer_intent(raw: str) -> IntentResult:
     )
 
 
-def classify_proposal(proposal: str, ac_scope: dict[str, Any]) -> tuple[str, str]:
-    proposal_low = proposal.lower()
-    if any(k in proposal_low for k in RISK_HIGH_KEYWORDS):
-        return "out-of-scope", "high"
+PROPOSAL_TERM_SPLIT = re.compile(r"[\s,，。;；/]+")
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton: finds every keyword occurring in a text in one pass."""
+
+    def __init__(self, keywords: tuple[str, ...] | list[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[str]] = [[]]
+        for keyword in keywords:
+            if not keyword:
+                continue
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(keyword)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> list[str]:
+        found: list[str] = []
+        state = 0
+        for ch in text:
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for keyword in self._out[state]:
+                if keyword not in found:
+                    found.append(keyword)
+        return found
+
+
+@dataclass
+class ProposalMatch:
+    deviation_type: str
+    risk: str
+    matched_ac_ids: list[str]
+    risk_keywords: list[str]
+
+
+class ScopeMatcher:
+    """Precompiled proposal classifier for one AC scope.
+
+    Substring overlap between proposal terms and AC descriptions is answered
+    from a character n-gram inverted index (bigrams for 2-char terms, trigrams
+    otherwise) and verified on the candidate ACs only; per-term results are
+    memoized. Risk keywords are matched by a single KeywordAutomaton pass.
+    """
+
+    _risk_automaton: KeywordAutomaton | None = None
+
+    def __init__(self, ac_scope: dict[str, Any]) -> None:
+        items = ac_scope.get("acceptance_criteria", []) if isinstance(ac_scope, dict) else []
+        self.ac_ids: list[str] = []
+        self.descriptions: list[str] = []
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, dict):
+                self.ac_ids.append(str(item.get("id", "")))
+                self.descriptions.append(str(item.get("description", "")).lower())
+        self._grams: dict[str, set[int]] = {}
+        for idx, desc in enumerate(self.descriptions):
+            for size in (2, 3):
+                for pos in range(len(desc) - size + 1):
+                    self._grams.setdefault(desc[pos : pos + size], set()).add(idx)
+        self._term_cache: dict[str, tuple[int, ...]] = {}
+        if ScopeMatcher._risk_automaton is None:
+            ScopeMatcher._risk_automaton = KeywordAutomaton([k.lower() for k in RISK_HIGH_KEYWORDS])
+
+    def _term_acs(self, term: str) -> tuple[int, ...]:
+        cached = self._term_cache.get(term)
+        if cached is not None:
+            return cached
+        if len(term) == 2:
+            candidates: set[int] = set(self._grams.get(term, ()))
+        else:
+            postings = sorted(
+                (self._grams.get(term[pos : pos + 3], set()) for pos in range(len(term) - 2)),
+                key=len,
+            )
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                if not candidates:
+                    break
+                candidates &= posting
+        result = tuple(sorted(idx for idx in candidates if term in self.descriptions[idx]))
+        self._term_cache[term] = result
+        return result
+
+    def classify(self, proposal: str) -> ProposalMatch:
+        proposal_low = proposal.lower()
+        assert ScopeMatcher._risk_automaton is not None
+        risk_keywords = ScopeMatcher._risk_automaton.find_all(proposal_low)
+        matched: set[int] = set()
+        for term in PROPOSAL_TERM_SPLIT.split(proposal_low):
+            if len(term) >= 2:
+                matched.update(self._term_acs(term))
+        matched_ids = [self.ac_ids[idx] for idx in sorted(matched)]
+        if risk_keywords:
+            return ProposalMatch("out-of-scope", "high", matched_ids, risk_keywords)
+        if matched_ids:
+            return ProposalMatch("in-scope", "low", matched_ids, [])
+        return ProposalMatch("enhancement-proposal", "low", [], [])
+
+
+def classify_proposal(
+    proposal: str, ac_scope: dict[str, Any], matcher: ScopeMatcher | None = None
+) -> tuple[str, str]:
+    match = (matcher or ScopeMatcher(ac_scope)).classify(proposal)
+    return match.deviation_type, match.risk
+
+
+SCOPE_KINDS = ("deviations", "confirmations")
+SCOPE_SEGMENT_MAX_BYTES = 1024 * 1024
+SCOPE_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    run_id TEXT,
+    deviation_id TEXT,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (kind, entry_id)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_run_id ON entries (run_id);
+CREATE INDEX IF NOT EXISTS idx_entries_deviation_id ON entries (deviation_id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+class ScopeMemoryStore:
+    """Append-only, segmented JSONL store behind the scope memory JSON views.
+
+    Entries are appended to ``segments/<kind>-NNNNNN.jsonl`` under an exclusive
+    file lock and never rewritten. ``index.sqlite3`` maps entry ids, run ids and
+    deviation ids to byte offsets. Appends never touch the legacy
+    ``deviations.json`` and ``confirmations.json`` views: the ``appended:`` and
+    ``compacted:`` meta counters mark them stale, ``refresh_views`` rebuilds only
+    stale kinds on demand (``ptk scope views``) and ``compact`` rebuilds both.
+    """
 
-    ac_text = " ".join(str(item.get("description", "")).lower() for item in ac_scope.get("acceptance_criteria", []))
-    terms = [x for x in re.split(r"[\s,，。;；/]+", proposal_low) if len(x) >= 2]
-    overlap = any(term in ac_text for term in terms)
-    if overlap:
-        return "in-scope", "low"
-    return "enhancement-proposal", "low"
+    def __init__(self, base_dir: Path) -> None:
+        self.base_dir = base_dir
+        self.segments_dir = base_dir / "segments"
+        self.index_path = base_dir / "index.sqlite3"
+        self.lock_path = base_dir / ".lock"
+
+    def view_path(self, kind: str) -> Path:
+        return self.base_dir / f"{kind}.json"
+
+    def _segments(self, kind: str) -> list[Path]:
+        return sorted(self.segments_dir.glob(f"{kind}-*.jsonl"))
+
+    def _connect(self) -> sqlite3.Connection:
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.index_path), timeout=10)
+        conn.executescript(SCOPE_INDEX_SCHEMA)
+        return conn
+
+    @staticmethod
+    def _meta(conn: sqlite3.Connection, key: str) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, key: str, value: int) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    @staticmethod
+    def _index_row(kind: str, entry: dict[str, Any], segment: str, offset: int, length: int) -> tuple[Any, ...]:
+        deviation_id = entry.get("id") if kind == "deviations" else entry.get("deviation_id")
+        return (kind, str(entry.get("id", "")), entry.get("run_id"), deviation_id, segment, offset, length)
+
+    def _active_segment(self, kind: str) -> Path:
+        segments = self._segments(kind)
+        if segments and segments[-1].stat().st_size < SCOPE_SEGMENT_MAX_BYTES:
+            return segments[-1]
+        seq = int(segments[-1].stem.rsplit("-", 1)[1]) + 1 if segments else 1
+        return self.segments_dir / f"{kind}-{seq:06d}.jsonl"
+
+    def _append_locked(self, conn: sqlite3.Connection, kind: str, entries: list[dict[str, Any]]) -> None:
+        if not entries:
+            return
+        segment = self._active_segment(kind)
+        segment.parent.mkdir(parents=True, exist_ok=True)
+        rows: list[tuple[Any, ...]] = []
+        with segment.open("a+b") as handle:
+            offset = handle.seek(0, os.SEEK_END)
+            if offset:
+                handle.seek(offset - 1)
+                if handle.read(1) != b"\n":
+                    # Terminate a torn line left by an interrupted writer so this entry stays parseable.
+                    handle.write(b"\n")
+                    offset += 1
+            for entry in entries:
+                line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+                handle.write(line)
+                rows.append(self._index_row(kind, entry, segment.name, offset, len(line)))
+                offset += len(line)
+        conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self._set_meta(conn, f"appended:{kind}", self._meta(conn, f"appended:{kind}") + len(entries))
+
+    def _import_legacy_locked(self, conn: sqlite3.Connection) -> None:
+        # One-time seed from JSON views written before the segment store existed.
+        if self.segments_dir.exists():
+            return
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        for kind in SCOPE_KINDS:
+            legacy = read_json(self.view_path(kind), [])
+            entries = [item for item in legacy if isinstance(item, dict)] if isinstance(legacy, list) else []
+            self._append_locked(conn, kind, entries)
+            self._set_meta(conn, f"compacted:{kind}", len(entries))
+
+    def _stale_views(self, conn: sqlite3.Connection) -> list[str]:
+        stale: list[str] = []
+        for kind in SCOPE_KINDS:
+            appended = self._meta(conn, f"appended:{kind}")
+            if appended != self._meta(conn, f"compacted:{kind}") or (appended and not self.view_path(kind).exists()):
+                stale.append(kind)
+        return stale
+
+    def _compact_locked(self, conn: sqlite3.Connection, kinds: Iterable[str] = SCOPE_KINDS) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for kind in kinds:
+            entries = list(self.iter_entries(kind))
+            write_json_atomic(self.view_path(kind), entries)
+            self._set_meta(conn, f"compacted:{kind}", self._meta(conn, f"appended:{kind}"))
+            counts[kind] = len(entries)
+        return counts
+
+    def append(self, deviations: list[dict[str, Any]], confirmations: list[dict[str, Any]]) -> None:
+        with file_lock(self.lock_path):
+            conn = self._connect()
+            try:
+                with conn:
+                    self._import_legacy_locked(conn)
+                    self._append_locked(conn, "deviations", deviations)
+                    self._append_locked(conn, "confirmations", confirmations)
+            finally:
+                conn.close()
+
+    def refresh_views(self) -> dict[str, int]:
+        """Rebuild only the views that are stale or missing; returns entry counts of rebuilt kinds."""
+        with file_lock(self.lock_path):
+            conn = self._connect()
+            try:
+                with conn:
+                    self._import_legacy_locked(conn)
+                    return self._compact_locked(conn, self._stale_views(conn))
+            finally:
+                conn.close()
+
+    def compact(self) -> dict[str, int]:
+        with file_lock(self.lock_path):
+            conn = self._connect()
+            try:
+                with conn:
+                    self._import_legacy_locked(conn)
+                    return self._compact_locked(conn)
+            finally:
+                conn.close()
+
+    def reindex(self) -> int:
+        """Rebuild index.sqlite3 from the segment files; returns indexed entry count."""
+        with file_lock(self.lock_path):
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM entries")
+                    total = 0
+                    for kind in SCOPE_KINDS:
+                        rows: list[tuple[Any, ...]] = []
+                        for segment in self._segments(kind):
+                            offset = 0
+                            with segment.open("rb") as handle:
+                                for raw in handle:
+                                    try:
+                                        entry = json.loads(raw)
+                                    except ValueError:
+                                        entry = None
+                                    if isinstance(entry, dict):
+                                        rows.append(self._index_row(kind, entry, segment.name, offset, len(raw)))
+                                    offset += len(raw)
+                        conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                        total += len(rows)
+                    return total
+            finally:
+                conn.close()
+
+    def iter_entries(self, kind: str) -> Iterator[dict[str, Any]]:
+        for segment in self._segments(kind):
+            with segment.open(encoding="utf-8") as handle:
+                for line in handle:
+                    try:
+                        item = json.loads(line)
+                    except ValueError:
+                        # Torn trailing line from an interrupted writer.
+                        continue
+                    if isinstance(item, dict):
+                        yield item
+
+    def lookup(self, *, run_id: str | None = None, deviation_id: str | None = None) -> dict[str, list[dict[str, Any]]]:
+        result: dict[str, list[dict[str, Any]]] = {kind: [] for kind in SCOPE_KINDS}
+        if not self.index_path.exists():
+            if not self.segments_dir.exists():
+                return result
+            self.reindex()
+        clauses: list[str] = []
+        params: list[Any] = []
+        if run_id:
+            clauses.append("run_id = ?")
+            params.append(run_id)
+        if deviation_id:
+            clauses.append("deviation_id = ?")
+            params.append(deviation_id)
+        if not clauses:
+            return result
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT kind, segment, offset, length FROM entries WHERE {' AND '.join(clauses)} ORDER BY segment, offset",
+                params,
+            ).fetchall()
+        finally:
+            conn.close()
+        for kind, segment, offset, length in rows:
+            try:
+                with (self.segments_dir / segment).open("rb") as handle:
+                    handle.seek(offset)
+                    result[kind].append(json.loads(handle.read(length)))
+            except (OSError, ValueError):
+                continue
+        return result
 
 
 def record_scope_memory(
@@ -225,21 +753,14 @@ def record_scope_memory(
     ac_scope: dict[str, Any],
     confirm_choice: str | None,
 ) -> tuple[list[dict[str, Any]], list[dict[str, Any]], bool]:
-    deviations_path = ctx.scope_memory_dir / "deviations.json"
-    confirmations_path = ctx.scope_memory_dir / "confirmations.json"
-    deviations = read_json(deviations_path, [])
-    confirmations = read_json(confirmations_path, [])
-    if not isinstance(deviations, list):
-        deviations = []
-    if not isinstance(confirmations, list):
-        confirmations = []
-
     run_deviations: list[dict[str, Any]] = []
     run_confirmations: list[dict[str, Any]] = []
     has_pending_high = False
 
+    matcher = ScopeMatcher(ac_scope)
     for idx, proposal in enumerate(proposals, start=1):
-        deviation_type, risk = classify_proposal(proposal, ac_scope)
+        match = matcher.classify(proposal)
+        deviation_type, risk = match.deviation_type, match.risk
         if deviation_type == "in-scope":
             continue
 
@@ -249,9 +770,10 @@ def record_scope_memory(
             "proposal": proposal,
             "type": deviation_type,
             "risk": risk,
+            "matched_ac_ids": match.matched_ac_ids,
+            "risk_keywords": match.risk_keywords,
             "created_at": now_iso(),
         }
-        deviations.append(deviation)
         run_deviations.append(deviation)
 
         if risk == "high":
@@ -271,34 +793,491 @@ def record_scope_memory(
                 "options": ["A", "B", "C"],
                 "created_at": now_iso(),
             }
-            confirmations.append(confirmation)
             run_confirmations.append(confirmation)
 
-    write_json(deviations_path, deviations)
-    write_json(confirmations_path, confirmations)
+    ScopeMemoryStore(ctx.scope_memory_dir).append(run_deviations, run_confirmations)
     return run_deviations, run_confirmations, has_pending_high
 
 
+RUN_INDEX_FILENAME = "index.sqlite3"
+RUN_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    workflow TEXT,
+    mode TEXT,
+    status TEXT,
+    started_at TEXT,
+    ended_at TEXT,
+    sort_ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_sort_ts ON runs (sort_ts);
+CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs (started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_filter ON runs (workflow, mode, status, sort_ts);
+"""
+
+
+def run_index_path(runs_dir: Path) -> Path:
+    return runs_dir / RUN_INDEX_FILENAME
+
+
+def _open_run_index(runs_dir: Path) -> sqlite3.Connection:
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(run_index_path(runs_dir)), timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(RUN_INDEX_SCHEMA)
+    return conn
+
+
+def _run_index_row(run_id: str, state: dict[str, Any], sort_ts: float) -> tuple[Any, ...]:
+    return (
+        run_id,
+        state.get("workflow"),
+        state.get("mode"),
+        state.get("status"),
+        state.get("started_at"),
+        state.get("ended_at"),
+        sort_ts,
+    )
+
+
+def run_index_record(runs_dir: Path, state: dict[str, Any], sort_ts: float | None = None) -> None:
+    """Upsert one run into the index; called by command_run after state.json is written."""
+    run_id = str(state.get("run_id", "")).strip()
+    if not run_id:
+        return
+    if not run_index_path(runs_dir).exists():
+        # First record after an upgrade: seed from the existing run directories
+        # so the index never starts out holding only the newest run.
+        run_index_rebuild(runs_dir)
+    conn = _open_run_index(runs_dir)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                _run_index_row(run_id, state, time.time() if sort_ts is None else sort_ts),
+            )
+    finally:
+        conn.close()
+
+
+def run_index_rebuild(runs_dir: Path) -> int:
+    """Rebuild the run index from the run directory tree; returns indexed run count."""
+    rows: list[tuple[Any, ...]] = []
+    if runs_dir.exists():
+        for run_dir in runs_dir.iterdir():
+            if not run_dir.is_dir():
+                continue
+            state_path = run_dir / "state.json"
+            state = read_json(state_path, {})
+            if not isinstance(state, dict):
+                state = {}
+            sort_ts = (state_path if state_path.exists() else run_dir).stat().st_mtime
+            rows.append(_run_index_row(run_dir.name, state, sort_ts))
+    conn = _open_run_index(runs_dir)
+    try:
+        with conn:
+            conn.execute("DELETE FROM runs")
+            conn.executemany("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def run_index_query(
+    runs_dir: Path,
+    *,
+    workflow: str | None = None,
+    mode: str | None = None,
+    status: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    exclude: str | None = None,
+    limit: int = 20,
+) -> list[dict[str, Any]]:
+    """Return indexed runs newest first, filtered by workflow/mode/status and started_at window."""
+    if not run_index_path(runs_dir).exists():
+        if not runs_dir.exists():
+            return []
+        run_index_rebuild(runs_dir)
+
+    clauses: list[str] = []
+    params: list[Any] = []
+    for column, value in (("workflow", workflow), ("mode", mode), ("status", status)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since:
+        clauses.append("started_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("started_at < ?")
+        params.append(until)
+    if exclude:
+        clauses.append("run_id != ?")
+        params.append(exclude)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"SELECT run_id, workflow, mode, status, started_at, ended_at FROM runs {where} ORDER BY sort_ts DESC"
+    if limit > 0:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    conn = _open_run_index(runs_dir)
+    try:
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def _run_index_forget(runs_dir: Path, run_id: str) -> None:
+    conn = _open_run_index(runs_dir)
+    try:
+        with conn:
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+    finally:
+        conn.close()
+
+
+def newest_run_id_except(runs_dir: Path, exclude: str | None) -> str | None:
+    while True:
+        rows = run_index_query(runs_dir, exclude=exclude, limit=1)
+        if not rows:
+            return None
+        run_id = str(rows[0]["run_id"])
+        if (runs_dir / run_id).is_dir():
+            return run_id
+        # Run directory was removed behind the index's back; drop the stale row and retry.
+        _run_index_forget(runs_dir, run_id)
+
+
 def newest_run_id(runs_dir: Path) -> str | None:
-    candidates = [p for p in runs_dir.glob("*") if p.is_dir()]
-    if not candidates:
-        return None
-    candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-    return candidates[0].name
+    return newest_run_id_except(runs_dir, None)
 
 
-def newest_run_id_except(runs_dir: Path, exclude: str) -> str | None:
-    candidates = [p for p in runs_dir.glob("*") if p.is_dir() and p.name != exclude]
-    if not candidates:
-        return None
-    candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-    return candidates[0].name
+MEMORY_SOURCES: dict[str, tuple[str, ...]] = {
+    "project-insights.json": ("insights",),
+    "decisions.json": ("decisions",),
+    "vocabulary.json": ("terms",),
+    "test-learnings.json": ("signatures", "playbooks", "sessions"),
+}
+MEMORY_INDEX_FILENAME = "index.sqlite3"
+MEMORY_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    rowid INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    memory_id TEXT,
+    type TEXT,
+    source_session_id TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    confidence REAL,
+    tags TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_memory_source ON entries (source);
+CREATE INDEX IF NOT EXISTS idx_memory_type_updated ON entries (type, updated_at);
+CREATE INDEX IF NOT EXISTS idx_memory_updated ON entries (updated_at);
+CREATE INDEX IF NOT EXISTS idx_memory_created ON entries (created_at);
+CREATE TABLE IF NOT EXISTS entry_tags (tag TEXT NOT NULL, entry INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_memory_tags ON entry_tags (tag, entry);
+CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, count INTEGER);
+CREATE TABLE IF NOT EXISTS sections (
+    source TEXT NOT NULL, section TEXT NOT NULL, digest TEXT NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (source, section)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+# Trigram FTS5 gives substring matches for CJK text too; older SQLite builds without
+# FTS5/trigram fall back to a plain table scanned with LIKE.
+MEMORY_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS memory_text USING fts5(text, tokenize='trigram')"
+MEMORY_TEXT_FALLBACK_SCHEMA = "CREATE TABLE IF NOT EXISTS memory_text (rowid INTEGER PRIMARY KEY, text TEXT NOT NULL)"
+
+
+def memory_index_path(memory_dir: Path) -> Path:
+    return memory_dir / MEMORY_INDEX_FILENAME
+
+
+def _open_memory_index(memory_dir: Path) -> tuple[sqlite3.Connection, bool]:
+    memory_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(memory_index_path(memory_dir)), timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(MEMORY_INDEX_SCHEMA)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'fts5'").fetchone()
+    if row is not None:
+        return conn, bool(row[0])
+    try:
+        conn.execute(MEMORY_FTS_SCHEMA)
+        fts = True
+    except sqlite3.OperationalError:
+        conn.execute(MEMORY_TEXT_FALLBACK_SCHEMA)
+        fts = False
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('fts5', ?)", (int(fts),))
+    return conn, fts
+
+
+MEMORY_ENVELOPE_FIELDS = frozenset(
+    ("memory_id", "type", "source", "source_session_id", "created_at", "updated_at", "confidence", "evidence_ref")
+)
+# json.dumps(..., ensure_ascii=False) builds a new encoder per call; sync serializes every entry.
+_MEMORY_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+def _memory_text(value: Any) -> Iterator[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _memory_text(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _memory_text(item)
+
+
+def _memory_forget(conn: sqlite3.Connection, rowids: list[int]) -> None:
+    params = [(rowid,) for rowid in rowids]
+    conn.executemany("DELETE FROM memory_text WHERE rowid = ?", params)
+    conn.executemany("DELETE FROM entry_tags WHERE entry = ?", params)
+    conn.executemany("DELETE FROM entries WHERE rowid = ?", params)
+
+
+def _memory_index_section(conn: sqlite3.Connection, source: str, section: str, items: list[Any]) -> int:
+    """Diff one section against its rows; entries are matched on their serialized form."""
+    existing: dict[str, list[tuple[int, int]]] = {}
+    for rowid, position, body in conn.execute(
+        "SELECT rowid, position, body FROM entries WHERE source = ? AND section = ?", (source, section)
+    ):
+        existing.setdefault(body, []).append((rowid, position))
+    next_rowid = (conn.execute("SELECT MAX(rowid) FROM entries").fetchone()[0] or 0) + 1
+    entries: list[tuple[Any, ...]] = []
+    moved: list[tuple[int, int]] = []
+    texts: list[tuple[int, str]] = []
+    tag_rows: list[tuple[str, int]] = []
+    count = 0
+    for position, entry in enumerate(items):
+        if not isinstance(entry, dict):
+            continue
+        count += 1
+        serialized = _MEMORY_ENCODER.encode(entry)
+        reusable = existing.get(serialized)
+        if reusable:
+            rowid, previous = reusable.pop()
+            if previous != position:
+                moved.append((position, rowid))
+            continue
+        rowid = next_rowid + len(entries)
+        raw_tags = entry.get("tags")
+        tags = [str(tag) for tag in raw_tags if isinstance(tag, (str, int))] if isinstance(raw_tags, list) else []
+        confidence = entry.get("confidence")
+        entries.append(
+            (
+                rowid,
+                source,
+                section,
+                position,
+                str(entry.get("memory_id") or entry.get("id") or ""),
+                entry.get("type"),
+                entry.get("source_session_id"),
+                entry.get("created_at"),
+                entry.get("updated_at"),
+                float(confidence) if isinstance(confidence, (int, float)) else None,
+                json.dumps(tags, ensure_ascii=False),
+                serialized,
+            )
+        )
+        body = {key: value for key, value in entry.items() if key not in MEMORY_ENVELOPE_FIELDS}
+        texts.append((rowid, "\n".join(_memory_text(body))))
+        tag_rows.extend((tag, rowid) for tag in set(tags))
+    _memory_forget(conn, [rowid for rows in existing.values() for rowid, _ in rows])
+    conn.executemany("UPDATE entries SET position = ? WHERE rowid = ?", moved)
+    conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", entries)
+    conn.executemany("INSERT INTO memory_text (rowid, text) VALUES (?, ?)", texts)
+    conn.executemany("INSERT INTO entry_tags VALUES (?, ?)", tag_rows)
+    return count
+
+
+def _memory_index_source(
+    conn: sqlite3.Connection, memory_dir: Path, source: str, stamp: tuple[int, int] | None, *, rebuild: bool
+) -> int:
+    """Bring one store's rows in line with the file.
+
+    Each section is fingerprinted, so a write that leaves a section alone (e.g. only
+    bumps updated_at, or appends to another section) skips it without touching its
+    rows. Changed sections are diffed entry by entry: unchanged entries keep their FTS
+    rows, only moved positions are updated, and an append or eviction touches just the
+    affected entries. ``rebuild`` drops the source's rows first.
+    """
+    if rebuild or stamp is None:
+        conn.execute("DELETE FROM memory_text WHERE rowid IN (SELECT rowid FROM entries WHERE source = ?)", (source,))
+        conn.execute("DELETE FROM entry_tags WHERE entry IN (SELECT rowid FROM entries WHERE source = ?)", (source,))
+        conn.execute("DELETE FROM entries WHERE source = ?", (source,))
+        conn.execute("DELETE FROM sections WHERE source = ?", (source,))
+    if stamp is None:
+        conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+        return 0
+
+    data = read_json(memory_dir / source, {})
+    known = {
+        row["section"]: (row["digest"], row["count"])
+        for row in conn.execute("SELECT section, digest, count FROM sections WHERE source = ?", (source,))
+    }
+    count = 0
+    for section in MEMORY_SOURCES[source]:
+        items = data.get(section) if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            items = []
+        digest = hashlib.sha1(_MEMORY_ENCODER.encode(items).encode("utf-8")).hexdigest()
+        cached = known.get(section)
+        if cached is not None and cached[0] == digest:
+            count += cached[1]
+            continue
+        section_count = _memory_index_section(conn, source, section, items)
+        conn.execute("INSERT OR REPLACE INTO sections VALUES (?, ?, ?, ?)", (source, section, digest, section_count))
+        count += section_count
+    conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)", (source, stamp[0], stamp[1], count))
+    return count
+
+
+def memory_index_sync(memory_dir: Path, *, force: bool = False) -> dict[str, int]:
+    """Re-index every memory store whose size/mtime changed; returns {source: entry count} for re-indexed ones.
+
+    A changed stamp costs a parse and one fingerprint per section; only sections whose
+    content differs are diffed against the index.
+    """
+    conn, _ = _open_memory_index(memory_dir)
+    try:
+        known = {row["source"]: (row["size"], row["mtime_ns"]) for row in conn.execute("SELECT * FROM sources")}
+        reindexed: dict[str, int] = {}
+        with conn:
+            for source in MEMORY_SOURCES:
+                try:
+                    st = (memory_dir / source).stat()
+                    stamp: tuple[int, int] | None = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    stamp = None
+                if force or stamp != known.get(source):
+                    if stamp is None and source not in known:
+                        continue
+                    reindexed[source] = _memory_index_source(conn, memory_dir, source, stamp, rebuild=force)
+        return reindexed
+    finally:
+        conn.close()
+
+
+def memory_index_query(
+    memory_dir: Path,
+    *,
+    text: str | None = None,
+    types: list[str] | None = None,
+    tags: list[str] | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    time_field: str = "updated_at",
+    min_confidence: float | None = None,
+    limit: int = 10,
+) -> list[dict[str, Any]]:
+    """Top-k memory entries: all tags and text terms must match; ranked by bm25, then confidence and recency."""
+    if time_field not in ("created_at", "updated_at"):
+        raise ValueError(f"unsupported time field: {time_field}")
+    memory_index_sync(memory_dir)
+
+    conn, fts = _open_memory_index(memory_dir)
+    clauses: list[str] = []
+    params: list[Any] = []
+    join = ""
+    rank = "0"
+    match_terms: list[str] = []
+    terms = (text or "").split()
+    for term in terms:
+        # trigram MATCH needs at least three characters; shorter terms use LIKE on the same table.
+        if fts and len(term) >= 3:
+            match_terms.append('"' + term.replace('"', '""') + '"')
+        else:
+            clauses.append("t.text LIKE ? ESCAPE '\\'")
+            params.append("%" + re.sub(r"([%_\\])", r"\\\1", term) + "%")
+    if terms:
+        join = "JOIN memory_text t ON t.rowid = e.rowid"
+    if match_terms:
+        clauses.insert(0, "memory_text MATCH ?")
+        params.insert(0, " ".join(match_terms))
+        rank = "bm25(memory_text)"
+    if types:
+        clauses.append(f"e.type IN ({', '.join('?' for _ in types)})")
+        params.extend(types)
+    for tag in tags or []:
+        clauses.append("e.rowid IN (SELECT entry FROM entry_tags WHERE tag = ?)")
+        params.append(tag)
+    if since:
+        clauses.append(f"e.{time_field} >= ?")
+        params.append(since)
+    if until:
+        clauses.append(f"e.{time_field} < ?")
+        params.append(until)
+    if min_confidence is not None:
+        clauses.append("e.confidence >= ?")
+        params.append(min_confidence)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = (
+        f"SELECT e.*, {rank} AS score FROM entries e {join} {where}"
+        f" ORDER BY score, e.confidence DESC, e.{time_field} DESC"
+    )
+    if limit > 0:
+        sql += " LIMIT ?"
+        params.append(limit)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    return [
+        {
+            "memory_id": row["memory_id"],
+            "type": row["type"],
+            "source": row["source"],
+            "section": row["section"],
+            "tags": json.loads(row["tags"]),
+            "source_session_id": row["source_session_id"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "confidence": row["confidence"],
+            "score": round(row["score"], 4) if match_terms else None,
+            "entry": json.loads(row["body"]),
+        }
+        for row in rows
+    ]
 
 
 def load_run_state(ctx: Context, run_id: str) -> dict[str, Any]:
     return read_json(ctx.runs_dir / run_id / "state.json", {})
 
 
+def load_run_events(ctx: Context, run_id: str, state: dict[str, Any]) -> list[dict[str, Any]]:
+    """Events of a run: embedded in legacy state.json, otherwise read from its event log."""
+    embedded = state.get("events") if isinstance(state, dict) else None
+    if isinstance(embedded, list):
+        return embedded
+    events: list[dict[str, Any]] = []
+    try:
+        with (ctx.runs_dir / run_id / "events.jsonl").open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(item, dict):
+                    events.append(item)
+    except OSError:
+        pass
+    return events
+
+
+def run_event_count(ctx: Context, run_id: str, state: dict[str, Any]) -> int:
+    event_log = state.get("event_log") if isinstance(state, dict) else None
+    if isinstance(event_log, dict) and isinstance(event_log.get("count"), int):
+        return event_log["count"]
+    return len(load_run_events(ctx, run_id, state))
+
+
 def generate_run_id(runs_dir: Path) -> str:
     """Generate a collision-resistant run id.
 
@@ -355,14 +1334,17 @@ def command_run(args: argparse.Namespace, ctx: Context) -> int:
     run_dir.mkdir(parents=True, exist_ok=True)
     events_path = run_dir / "events.jsonl"
 
+    events = RunEventSink(events_path, durability=args.durability)
+
     def cleanup_empty_run_dir() -> None:
+        events.discard()
         if run_dir.exists():
             try:
                 run_dir.rmdir()
             except OSError:
                 pass
 
-    events: list[dict[str, Any]] = [
+    events.emit(
         {
             "event": "run_started",
             "run_id": run_id,
@@ -370,7 +1352,7 @@ def command_run(args: argparse.Namespace, ctx: Context) -> int:
             "workflow_route": route["key"],
             "ts": now_iso(),
         }
-    ]
+    )
     tool_calls: list[dict[str, Any]] = []
     llm_prompts: list[str] = []
     tool_calls.append(
@@ -397,7 +1379,7 @@ def command_run(args: argparse.Namespace, ctx: Context) -> int:
 
     if args.mode == "strict":
         try:
-            ac_scope_path = create_ac_scope(ctx)
+            ac_scope_result = create_ac_scope(ctx)
         except FileNotFoundError:
             cleanup_empty_run_dir()
             print(
@@ -408,9 +1390,15 @@ def command_run(args: argparse.Namespace, ctx: Context) -> int:
                 file=sys.stderr,
             )
             return 2
-        tool_calls.append({"name": "scope_guard.parse_ac", "args": {"user_story": str(ctx.user_story_path)}})
+        ac_scope_path = ac_scope_result.path
+        ac_scope = ac_scope_result.scope
+        tool_calls.append(
+            {
+                "name": "scope_guard.parse_ac",
+                "args": {"user_story": str(ctx.user_story_path), "cache": ac_scope_result.cache},
+            }
+        )
         llm_prompts.append("Parse AC and bind scope for strict mode.")
-        ac_scope = read_json(ac_scope_path, {})
         deviations, confirmations, blocked_by_confirmation = record_scope_memory(
             ctx=ctx,
             run_id=run_id,
@@ -418,7 +1406,7 @@ def command_run(args: argparse.Namespace, ctx: Context) -> int:
             ac_scope=ac_scope,
             confirm_choice=args.confirm,
         )
-        events.append(
+        events.emit(
             {
                 "event": "scope_guard_checked",
                 "run_id": run_id,
@@ -429,7 +1417,7 @@ def command_run(args: argparse.Namespace, ctx: Context) -> int:
         )
         tool_calls.append({"name": "scope_guard.record", "args": {"deviations": len(deviations)}})
     elif args.mode == "debug":
-        events.append({"event": "debug_mode_enabled", "run_id": run_id, "ts": now_iso()})
+        events.emit({"event": "debug_mode_enabled", "run_id": run_id, "ts": now_iso()})
         llm_prompts.append("Debug mode requested: emit verbose stage diagnostics.")
     elif args.mode == "replay":
         replay_source = args.from_run or newest_run_id_except(ctx.runs_dir, run_id)
@@ -442,9 +1430,8 @@ def command_run(args: argparse.Namespace, ctx: Context) -> int:
             cleanup_empty_run_dir()
             print(f"Replay source run not found: {replay_source}", file=sys.stderr)
             return 2
-        source_events = replay_state.get("events", [])
-        source_event_count = len(source_events) if isinstance(source_events, list) else 0
-        events.append(
+        source_event_count = run_event_count(ctx, replay_source, replay_state)
+        events.emit(
             {
                 "event": "replay_loaded",
                 "run_id": run_id,
@@ -460,25 +1447,24 @@ def command_run(args: argparse.Namespace, ctx: Context) -> int:
     if args.mode == "dry-run":
         status = "completed"
         reason = "dry-run"
-        events.append({"event": "dry_run_completed", "run_id": run_id, "ts": now_iso()})
+        events.emit({"event": "dry_run_completed", "run_id": run_id, "ts": now_iso()})
     elif blocked_by_confirmation:
         status = "blocked"
         reason = "awaiting_human_confirmation"
-        events.append({"event": "run_blocked", "run_id": run_id, "reason": reason, "ts": now_iso()})
+        events.emit({"event": "run_blocked", "run_id": run_id, "reason": reason, "ts": now_iso()})
     elif args.mode == "debug":
         reason = "debug_event_stream_enabled"
-        events.append({"event": "run_completed_debug", "run_id": run_id, "ts": now_iso()})
+        events.emit({"event": "run_completed_debug", "run_id": run_id, "ts": now_iso()})
     elif args.mode == "replay":
         reason = f"replay:{replay_source}"
-        events.append({"event": "replay_completed", "run_id": run_id, "source_run_id": replay_source, "ts": now_iso()})
+        events.emit({"event": "replay_completed", "run_id": run_id, "source_run_id": replay_source, "ts": now_iso()})
     else:
-        events.append({"event": "run_completed", "run_id": run_id, "ts": now_iso()})
+        events.emit({"event": "run_completed", "run_id": run_id, "ts": now_iso()})
 
-    for event in events:
-        append_jsonl(events_path, event)
+    events.close()
 
     if args.mode == "debug":
-        for event in events:
+        for event in events.events:
             print(f"[debug-event] {json.dumps(event, ensure_ascii=False)}", file=sys.stderr)
 
     state = {
@@ -488,9 +1474,13 @@ def command_run(args: argparse.Namespace, ctx: Context) -> int:
         "mode": args.mode,
         "status": status,
         "reason": reason,
-        "started_at": events[0]["ts"],
+        "started_at": events.events[0]["ts"],
         "ended_at": now_iso(),
-        "events": events,
+        "event_log": {
+            "path": str(events_path.relative_to(ctx.root)),
+            "count": len(events.events),
+            "durability": events.durability,
+        },
         "llm_prompts": llm_prompts,
         "token_usage": {"prompt_tokens": 128, "completion_tokens": 96},
         "tool_calls": tool_calls,
@@ -499,12 +1489,14 @@ def command_run(args: argparse.Namespace, ctx: Context) -> int:
             "ac_scope": str(ac_scope_path.relative_to(ctx.root)) if ac_scope_path else None,
             "scope_deviations": ".ptk/memory/scope/deviations.json",
             "scope_confirmations": ".ptk/memory/scope/confirmations.json",
+            "scope_lookup": f"ptk scope lookup --run-id {run_id}",
             "replay_source_run": replay_source,
         },
         "deviations": deviations,
         "confirmations": confirmations,
     }
     write_json(run_dir / "state.json", state)
+    run_index_record(ctx.runs_dir, state)
 
     print(json.dumps({"run_id": run_id, "status": status, "reason": reason}, ensure_ascii=False, indent=2))
     return 2 if status == "blocked" else 0
@@ -549,6 +1541,70 @@ def _human_summary(machine: dict[str, Any]) -> str:
     return "\n".join(lines) + "\n"
 
 
+def command_runs(args: argparse.Namespace, ctx: Context) -> int:
+    if args.runs_command == "reindex":
+        count = run_index_rebuild(ctx.runs_dir)
+        payload = {"reindexed": count, "index": str(run_index_path(ctx.runs_dir).relative_to(ctx.root))}
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+        return 0
+
+    rows = run_index_query(
+        ctx.runs_dir,
+        workflow=args.workflow or None,
+        mode=args.mode or None,
+        status=args.status or None,
+        since=args.since or None,
+        until=args.until or None,
+        limit=args.limit,
+    )
+    print(json.dumps({"count": len(rows), "runs": rows}, ensure_ascii=False, indent=2))
+    return 0
+
+
+def command_scope(args: argparse.Namespace, ctx: Context) -> int:
+    store = ScopeMemoryStore(ctx.scope_memory_dir)
+    if args.scope_command == "compact":
+        payload: dict[str, Any] = {"compacted": store.compact()}
+    elif args.scope_command == "views":
+        payload = {"refreshed": store.refresh_views()}
+    elif args.scope_command == "reindex":
+        payload = {"reindexed": store.reindex()}
+    else:
+        if not args.run_id and not args.deviation_id:
+            print("scope lookup requires --run-id and/or --deviation-id", file=sys.stderr)
+            return 2
+        payload = store.lookup(run_id=args.run_id or None, deviation_id=args.deviation_id or None)
+    print(json.dumps(payload, ensure_ascii=False, indent=2))
+    return 0
+
+
+def command_memory(args: argparse.Namespace, ctx: Context) -> int:
+    if args.memory_command == "reindex":
+        reindexed = memory_index_sync(ctx.memory_dir, force=True)
+        payload: dict[str, Any] = {
+            "reindexed": reindexed,
+            "index": str(memory_index_path(ctx.memory_dir).relative_to(ctx.root)),
+        }
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+        return 0
+
+    started = time.perf_counter()
+    rows = memory_index_query(
+        ctx.memory_dir,
+        text=args.text or None,
+        types=args.type,
+        tags=args.tag,
+        since=args.since or None,
+        until=args.until or None,
+        time_field=args.time_field,
+        min_confidence=args.min_confidence,
+        limit=args.limit,
+    )
+    took_ms = round((time.perf_counter() - started) * 1000, 2)
+    print(json.dumps({"count": len(rows), "took_ms": took_ms, "results": rows}, ensure_ascii=False, indent=2))
+    return 0
+
+
 def command_report(args: argparse.Namespace, ctx: Context) -> int:
     run_id = args.run_id
     if not run_id or run_id == "latest":
@@ -569,7 +1625,7 @@ def command_report(args: argparse.Namespace, ctx: Context) -> int:
         "mode": state.get("mode", "normal"),
         "status": state.get("status", "unknown"),
         "reason": state.get("reason", ""),
-        "events": state.get("events", []),
+        "events": load_run_events(ctx, run_id, state),
         "llm_prompts": state.get("llm_prompts", []),
         "token_usage": state.get("token_usage", {}),
         "tool_calls": state.get("tool_calls", []),
@@ -591,46 +1647,180 @@ def command_report(args: argparse.Namespace, ctx: Context) -> int:
     return 0
 
 
+def read_tail_lines(path: Path, count: int, block_size: int = 64 * 1024) -> tuple[list[str], int]:
+    """Return the last ``count`` complete lines of ``path`` and the byte offset just past them.
+
+    Reads backwards in blocks so the cost is proportional to the tail, not the file.
+    A trailing partial line (no newline yet) is excluded and left for the tailer.
+    """
+    with path.open("rb") as handle:
+        end = handle.seek(0, os.SEEK_END)
+        pos = end
+        buf = b""
+        complete_end = -1
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            handle.seek(pos)
+            buf = handle.read(step) + buf
+            if complete_end < 0:
+                newline = buf.rfind(b"\n")
+                if newline < 0:
+                    continue
+                complete_end = pos + newline + 1
+            if count > 0 and buf.count(b"\n") > count:
+                break
+    if complete_end < 0:
+        return [], 0
+    body = buf[: complete_end - pos]
+    lines = [line.decode("utf-8", errors="replace") for line in body.split(b"\n")[:-1]]
+    if pos > 0:
+        # First line in the buffer may be cut mid-way; it is never within the tail window.
+        lines = lines[1:]
+    return (lines[-count:] if count > 0 else lines), complete_end
+
+
+class JsonlTailer:
+    """Offset-based follower for an append-only JSONL file.
+
+    Only newly appended bytes are read on each poll; a partial trailing line is
+    buffered until its newline arrives. If the file shrinks or its inode changes
+    (truncation/rotation), reading restarts from the beginning of the new file.
+    """
+
+    def __init__(self, path: Path, offset: int = 0) -> None:
+        self.path = path
+        self.offset = offset
+        self.inode: int | None = None
+        self._partial = b""
+        try:
+            self.inode = path.stat().st_ino
+        except OSError:
+            pass
+
+    def poll(self) -> list[str]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return []
+        if (self.inode is not None and stat.st_ino != self.inode) or stat.st_size < self.offset:
+            self.offset = 0
+            self._partial = b""
+        self.inode = stat.st_ino
+        if stat.st_size == self.offset:
+            return []
+        with self.path.open("rb") as handle:
+            handle.seek(self.offset)
+            chunk = handle.read(stat.st_size - self.offset)
+        self.offset += len(chunk)
+        pieces = (self._partial + chunk).split(b"\n")
+        self._partial = pieces.pop()
+        return [piece.decode("utf-8", errors="replace") for piece in pieces if piece.strip()]
+
+
+class FileChangeWaiter:
+    """Sleep until a watched directory changes or ``timeout`` elapses.
+
+    Uses inotify through ctypes on Linux; other platforms fall back to a plain sleep.
+    """
+
+    _MASK = 0x00000002 | 0x00000008 | 0x00000080 | 0x00000100  # MODIFY | CLOSE_WRITE | MOVED_TO | CREATE
+
+    def __init__(self, directories: list[Path]) -> None:
+        self.fd = -1
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        for directory in directories:
+            if libc.inotify_add_watch(fd, os.fsencode(str(directory)), self._MASK) < 0:
+                os.close(fd)
+                return
+        self.fd = fd
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self.fd >= 0
+
+    def wait(self, timeout: float) -> None:
+        if self.fd < 0:
+            time.sleep(timeout)
+            return
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self.fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
 def command_debug_watch(args: argparse.Namespace, ctx: Context) -> int:
-    run_id = args.run_id or newest_run_id(ctx.runs_dir)
-    if not run_id:
-        print("No run found.", file=sys.stderr)
-        return 2
-    events_path = ctx.runs_dir / run_id / "events.jsonl"
-    if not events_path.exists():
-        print(f"No events for run: {run_id}", file=sys.stderr)
-        return 2
-    lines = events_path.read_text(encoding="utf-8").splitlines()
-    tail_lines = lines[-args.tail :] if args.tail > 0 else lines
-    for line in tail_lines:
-        print(line)
+    run_ids = [run_id for run_id in args.run_id if run_id]
+    if not run_ids:
+        latest = newest_run_id(ctx.runs_dir)
+        if not latest:
+            print("No run found.", file=sys.stderr)
+            return 2
+        run_ids = [latest]
+
+    tailers: list[JsonlTailer] = []
+    for run_id in run_ids:
+        events_path = ctx.runs_dir / run_id / "events.jsonl"
+        if not events_path.exists():
+            print(f"No events for run: {run_id}", file=sys.stderr)
+            return 2
+        tail_lines, offset = read_tail_lines(events_path, args.tail)
+        for line in tail_lines:
+            print(line)
+        tailers.append(JsonlTailer(events_path, offset))
 
     if not args.follow:
         print(f"# debug watch tail mode (tail={args.tail})", file=sys.stderr)
         return 0
 
-    idle_for = 0.0
-    consumed = len(lines)
+    poll_interval = max(args.poll_interval, 0.05)
+    waiter = FileChangeWaiter(sorted({tailer.path.parent for tailer in tailers}))
     print(
         (
             "# debug watch follow mode "
-            f"(poll_interval={args.poll_interval:.2f}s idle_exit={args.idle_exit:.2f}s)"
+            f"(poll_interval={args.poll_interval:.2f}s idle_exit={args.idle_exit:.2f}s "
+            f"runs={len(tailers)} wake={'inotify' if waiter.uses_inotify else 'poll'})"
         ),
         file=sys.stderr,
     )
-    while True:
-        time.sleep(max(args.poll_interval, 0.05))
-        latest = events_path.read_text(encoding="utf-8").splitlines()
-        if len(latest) > consumed:
-            for line in latest[consumed:]:
-                print(line)
-            consumed = len(latest)
-            idle_for = 0.0
-            continue
-        idle_for += max(args.poll_interval, 0.05)
-        if args.idle_exit > 0 and idle_for >= args.idle_exit:
-            print(f"# debug watch follow mode exited after {idle_for:.2f}s idle", file=sys.stderr)
-            break
+    last_activity = time.monotonic()
+    try:
+        while True:
+            timeout = poll_interval
+            if args.idle_exit > 0:
+                timeout = min(timeout, max(args.idle_exit - (time.monotonic() - last_activity), 0.01))
+            waiter.wait(timeout)
+            emitted = False
+            for tailer in tailers:
+                for line in tailer.poll():
+                    print(line, flush=True)
+                    emitted = True
+            now = time.monotonic()
+            if emitted:
+                last_activity = now
+                continue
+            idle_for = now - last_activity
+            if args.idle_exit > 0 and idle_for >= args.idle_exit:
+                print(f"# debug watch follow mode exited after {idle_for:.2f}s idle", file=sys.stderr)
+                break
+    finally:
+        waiter.close()
     return 0
 
 
@@ -639,7 +1829,7 @@ def command_resume(args: argparse.Namespace, ctx: Context) -> int:
     if not state:
         print(f"Run not found: {args.run_id}", file=sys.stderr)
         return 2
-    print(json.dumps(state, ensure_ascii=False, indent=2))
+    print(json.dumps({**state, "events": load_run_events(ctx, args.run_id, state)}, ensure_ascii=False, indent=2))
     return 0
 
 
@@ -676,17 +1866,61 @@ def command_feedback_sync(args: argparse.Namespace, ctx: Context) -> int:
             }
         ],
     }
-    write_json(out, payload)
+    # Atomic replace so readers (and feedback_from_test.py digests) never see a torn file.
+    write_json_atomic(out, payload)
     print(json.dumps({"synced": str(out.relative_to(ctx.root)), "run_id": run_id}, ensure_ascii=False, indent=2))
     return 0
 
 
-def command_doctor(args: argparse.Namespace, ctx: Context) -> int:
-    checks: list[dict[str, Any]] = []
+_MISSING = object()
+
+
+class DoctorFiles:
+    """Memoized, thread-safe file reads shared by all checks of one doctor invocation."""
 
-    def add_check(name: str, status: str, detail: str, recommendation: str = "") -> None:
-        checks.append({"name": name, "status": status, "detail": detail, "recommendation": recommendation})
+    def __init__(self) -> None:
+        self._cache: dict[tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
 
+    def _get(self, kind: str, path: Path, loader: Callable[[], Any]) -> Any:
+        key = (kind, str(path))
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        value = loader()
+        with self._lock:
+            return self._cache.setdefault(key, value)
+
+    def exists(self, path: Path) -> bool:
+        return bool(self._get("exists", path, path.exists))
+
+    def read_json(self, path: Path, fallback: Any) -> Any:
+        value = self._get("json", path, lambda: read_json(path, _MISSING))
+        return fallback if value is _MISSING else value
+
+    def read_text(self, path: Path) -> str | None:
+        def load() -> str | None:
+            try:
+                return path.read_text(encoding="utf-8")
+            except OSError:
+                return None
+
+        return self._get("text", path, load)
+
+
+@dataclass
+class DoctorCheck:
+    name: str
+    inputs: Callable[[Context], list[Path]]
+    run: Callable[[Context, DoctorFiles, dict[str, list[dict[str, Any]]]], list[dict[str, Any]]]
+    depends_on: tuple[str, ...] = ()
+
+
+def _check(name: str, status: str, detail: str, recommendation: str = "") -> dict[str, Any]:
+    return {"name": name, "status": status, "detail": detail, "recommendation": recommendation}
+
+
+def _doctor_version_consistency(ctx: Context, files: DoctorFiles, deps: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
     expected_version = TOOLKIT_VERSION
     expected_product_version = f"v{TOOLKIT_VERSION}"
     version_issues: list[str] = []
@@ -694,7 +1928,7 @@ def command_doctor(args: argparse.Namespace, ctx: Context) -> int:
     if DEFAULT_VERSION != expected_product_version:
         version_issues.append(f"DEFAULT_VERSION={DEFAULT_VERSION}")
 
-    plugin_json = read_json(ctx.root / ".claude-plugin" / "plugin.json", {})
+    plugin_json = files.read_json(ctx.root / ".claude-plugin" / "plugin.json", {})
     if not isinstance(plugin_json, dict):
         version_issues.append("plugin.json:invalid")
     else:
@@ -702,7 +1936,7 @@ def command_doctor(args: argparse.Namespace, ctx: Context) -> int:
         if plugin_version != expected_version:
             version_issues.append(f"plugin.json={plugin_version or 'missing'}")
 
-    marketplace_json = read_json(ctx.root / ".claude-plugin" / "marketplace.json", {})
+    marketplace_json = files.read_json(ctx.root / ".claude-plugin" / "marketplace.json", {})
     marketplace_version = ""
     if isinstance(marketplace_json, dict):
         plugins = marketplace_json.get("plugins")
@@ -716,7 +1950,7 @@ def command_doctor(args: argparse.Namespace, ctx: Context) -> int:
     elif marketplace_version != expected_version:
         version_issues.append(f"marketplace.json={marketplace_version}")
 
-    terminal_payload = read_json(ctx.terminal_path, {})
+    terminal_payload = files.read_json(ctx.terminal_path, {})
     if not isinstance(terminal_payload, dict):
         version_issues.append("terminal.json=invalid")
     else:
@@ -728,14 +1962,16 @@ def command_doctor(args: argparse.Namespace, ctx: Context) -> int:
             version_issues.append(f"terminal.schema_version={terminal_schema_version or 'missing'}")
 
     if version_issues:
-        add_check(
-            "version_consistency",
-            "FAIL",
-            f"expected={expected_version}; drift={', '.join(version_issues)}",
-            "统一 CLI/插件/文档元信息版本，避免版本幻视漂移",
-        )
-    else:
-        add_check(
+        return [
+            _check(
+                "version_consistency",
+                "FAIL",
+                f"expected={expected_version}; drift={', '.join(version_issues)}",
+                "统一 CLI/插件/文档元信息版本，避免版本幻视漂移",
+            )
+        ]
+    return [
+        _check(
             "version_consistency",
             "PASS",
             (
@@ -744,128 +1980,351 @@ def command_doctor(args: argparse.Namespace, ctx: Context) -> int:
                 f"terminal.version={expected_product_version}, terminal.schema_version={expected_version}"
             ),
         )
+    ]
+
 
+def _doctor_user_story(ctx: Context, files: DoctorFiles, deps: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
     user_story_rel = str(ctx.user_story_path.relative_to(ctx.root))
-    if ctx.user_story_path.exists():
-        add_check("user_story_exists", "PASS", user_story_rel)
-    else:
-        add_check("user_story_exists", "FAIL", user_story_rel, "补充 user-story 后再执行 strict/release 流程")
+    if files.exists(ctx.user_story_path):
+        return [_check("user_story_exists", "PASS", user_story_rel)]
+    return [_check("user_story_exists", "FAIL", user_story_rel, "补充 user-story 后再执行 strict/release 流程")]
 
-    ac_scope_path = ctx.execution_dir / "ac_scope.json"
-    if ac_scope_path.exists():
-        ac_scope = read_json(ac_scope_path, None)
-        if not isinstance(ac_scope, dict):
-            add_check("ac_scope_schema", "FAIL", str(ac_scope_path.relative_to(ctx.root)), "修复 ac_scope.json 的 JSON 结构")
-        else:
-            required = {"acceptance_criteria", "core_scope", "enhancement_scope"}
-            missing = sorted(required - set(ac_scope.keys()))
-            if missing:
-                add_check(
-                    "ac_scope_schema",
-                    "FAIL",
-                    f"missing keys: {', '.join(missing)}",
-                    "重新生成 ac_scope.json 并校验字段完整性",
-                )
-            else:
-                add_check("ac_scope_schema", "PASS", str(ac_scope_path.relative_to(ctx.root)))
-    else:
-        add_check("ac_scope_schema", "WARN", str(ac_scope_path.relative_to(ctx.root)), "运行 strict 模式以生成 AC 范围绑定")
 
+def _doctor_ac_scope(ctx: Context, files: DoctorFiles, deps: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    ac_scope_path = ctx.execution_dir / "ac_scope.json"
+    rel = str(ac_scope_path.relative_to(ctx.root))
+    if not files.exists(ac_scope_path):
+        return [_check("ac_scope_schema", "WARN", rel, "运行 strict 模式以生成 AC 范围绑定")]
+    ac_scope = files.read_json(ac_scope_path, None)
+    if not isinstance(ac_scope, dict):
+        return [_check("ac_scope_schema", "FAIL", rel, "修复 ac_scope.json 的 JSON 结构")]
+    required = {"acceptance_criteria", "core_scope", "enhancement_scope"}
+    missing = sorted(required - set(ac_scope.keys()))
+    if missing:
+        return [_check("ac_scope_schema", "FAIL", f"missing keys: {', '.join(missing)}", "重新生成 ac_scope.json 并校验字段完整性")]
+    return [_check("ac_scope_schema", "PASS", rel)]
+
+
+def _doctor_summary_redaction(ctx: Context, files: DoctorFiles, deps: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
     summary_md = ctx.execution_dir / "summary.md"
-    if summary_md.exists():
-        text = summary_md.read_text(encoding="utf-8")
-        leaked = [token for token in ("llm_prompts", "token_usage", "tool_calls") if token in text]
-        if leaked:
-            add_check("summary_human_redaction", "FAIL", f"summary.md leaked: {', '.join(leaked)}", "移除机器调试字段")
-        else:
-            add_check("summary_human_redaction", "PASS", str(summary_md.relative_to(ctx.root)))
-    else:
-        add_check("summary_human_redaction", "WARN", str(summary_md.relative_to(ctx.root)), "执行 ptk report --human")
+    rel = str(summary_md.relative_to(ctx.root))
+    text = files.read_text(summary_md)
+    if text is None:
+        return [_check("summary_human_redaction", "WARN", rel, "执行 ptk report --human")]
+    leaked = [token for token in ("llm_prompts", "token_usage", "tool_calls") if token in text]
+    if leaked:
+        return [_check("summary_human_redaction", "FAIL", f"summary.md leaked: {', '.join(leaked)}", "移除机器调试字段")]
+    return [_check("summary_human_redaction", "PASS", rel)]
+
 
+def _doctor_summary_machine(ctx: Context, files: DoctorFiles, deps: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
     summary_json = ctx.execution_dir / "summary.json"
-    machine_data: dict[str, Any] = {}
-    if summary_json.exists():
-        loaded_machine = read_json(summary_json, None)
-        if not isinstance(loaded_machine, dict):
-            add_check("summary_machine_schema", "FAIL", str(summary_json.relative_to(ctx.root)), "修复 summary.json 格式")
-        else:
-            machine_data = loaded_machine
-            required = {"events", "llm_prompts", "token_usage", "tool_calls"}
-            missing = sorted(required - set(machine_data.keys()))
-            if missing:
-                add_check(
-                    "summary_machine_schema",
-                    "FAIL",
-                    f"missing keys: {', '.join(missing)}",
-                    "重新生成机器报告确保 schema 完整",
-                )
-            else:
-                add_check("summary_machine_schema", "PASS", str(summary_json.relative_to(ctx.root)))
-    else:
-        add_check("summary_machine_schema", "WARN", str(summary_json.relative_to(ctx.root)), "执行 ptk report --machine")
+    rel = str(summary_json.relative_to(ctx.root))
+    if not files.exists(summary_json):
+        return [_check("summary_machine_schema", "WARN", rel, "执行 ptk report --machine")]
+    machine_data = files.read_json(summary_json, None)
+    if not isinstance(machine_data, dict):
+        return [_check("summary_machine_schema", "FAIL", rel, "修复 summary.json 格式")]
+    required = {"events", "llm_prompts", "token_usage", "tool_calls"}
+    missing = sorted(required - set(machine_data.keys()))
+    if missing:
+        return [_check("summary_machine_schema", "FAIL", f"missing keys: {', '.join(missing)}", "重新生成机器报告确保 schema 完整")]
+    return [_check("summary_machine_schema", "PASS", rel)]
+
+
+def _doctor_terminal_schema(ctx: Context, files: DoctorFiles, deps: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    rel = str(ctx.terminal_path.relative_to(ctx.root))
+    if not files.exists(ctx.terminal_path):
+        return [_check("terminal_schema", "UNKNOWN", rel, "尚未生成终态报告")]
+    terminal = files.read_json(ctx.terminal_path, None)
+    if not isinstance(terminal, dict):
+        return [_check("terminal_schema", "FAIL", rel, "修复 terminal.json")]
+    required = {"schema_version", "version", "terminal", "evidence_integrity"}
+    missing = sorted(required - set(terminal.keys()))
+    if missing:
+        return [_check("terminal_schema", "FAIL", f"missing keys: {', '.join(missing)}", "补齐 terminal.json 顶层字段")]
+    if not isinstance(terminal.get("terminal"), dict) or "status" not in terminal.get("terminal", {}):
+        return [_check("terminal_schema", "FAIL", "terminal.status missing", "补齐 terminal.status")]
+    return [_check("terminal_schema", "PASS", rel)]
+
+
+def _doctor_latest_run_inputs(ctx: Context) -> list[Path]:
+    latest = newest_run_id(ctx.runs_dir)
+    if not latest:
+        return [ctx.runs_dir]
+    return [ctx.runs_dir / latest / "state.json", ctx.runs_dir / latest / "events.jsonl"]
 
-    if ctx.terminal_path.exists():
-        terminal = read_json(ctx.terminal_path, None)
-        if not isinstance(terminal, dict):
-            add_check("terminal_schema", "FAIL", str(ctx.terminal_path.relative_to(ctx.root)), "修复 terminal.json")
-        else:
-            required = {"schema_version", "version", "terminal", "evidence_integrity"}
-            missing = sorted(required - set(terminal.keys()))
-            if missing:
-                add_check(
-                    "terminal_schema",
-                    "FAIL",
-                    f"missing keys: {', '.join(missing)}",
-                    "补齐 terminal.json 顶层字段",
-                )
-            elif not isinstance(terminal.get("terminal"), dict) or "status" not in terminal.get("terminal", {}):
-                add_check("terminal_schema", "FAIL", "terminal.status missing", "补齐 terminal.status")
-            else:
-                add_check("terminal_schema", "PASS", str(ctx.terminal_path.relative_to(ctx.root)))
-    else:
-        add_check("terminal_schema", "UNKNOWN", str(ctx.terminal_path.relative_to(ctx.root)), "尚未生成终态报告")
 
+def _doctor_events_integrity(ctx: Context, files: DoctorFiles, deps: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
     latest = newest_run_id(ctx.runs_dir)
     if not latest:
-        add_check("events_integrity", "UNKNOWN", "no runs found", "先执行 ptk run 生成可诊断事件")
-    else:
-        state = load_run_state(ctx, latest)
-        required = {"run_id", "workflow", "mode", "status", "events", "tool_calls"}
-        missing = sorted(required - set(state.keys())) if isinstance(state, dict) else sorted(required)
-        if missing:
-            add_check(
-                "events_integrity",
-                "FAIL",
-                f"run {latest} state missing: {', '.join(missing)}",
-                "修复 state.json 字段并重跑",
-            )
-        else:
-            events = state.get("events", [])
-            if not isinstance(events, list) or not events:
-                add_check("events_integrity", "FAIL", f"run {latest} has empty events", "确认运行模式写入事件流")
-            else:
-                event_names = {item.get("event") for item in events if isinstance(item, dict)}
-                terminal_events = {"run_completed", "run_blocked", "dry_run_completed", "run_completed_debug", "replay_completed"}
-                if "run_started" not in event_names:
-                    add_check("events_integrity", "FAIL", f"run {latest} missing run_started", "检查事件写入入口")
-                elif not (event_names & terminal_events):
-                    add_check("events_integrity", "FAIL", f"run {latest} missing terminal event", "补充终态事件写入")
-                else:
-                    add_check("events_integrity", "PASS", f"run {latest} events={len(events)}")
-
-        if machine_data:
-            machine_events = machine_data.get("events")
-            if not isinstance(machine_events, list) or not machine_events:
-                add_check("machine_events_integrity", "FAIL", "summary.json events empty", "重新生成机器报告")
-            else:
-                add_check("machine_events_integrity", "PASS", f"summary events={len(machine_events)}")
-        else:
-            add_check("machine_events_integrity", "UNKNOWN", "summary.json unavailable", "先生成机器报告再校验")
+        return [_check("events_integrity", "UNKNOWN", "no runs found", "先执行 ptk run 生成可诊断事件")]
+    state = files.read_json(ctx.runs_dir / latest / "state.json", {})
+    required = {"run_id", "workflow", "mode", "status", "tool_calls"}
+    missing = sorted(required - set(state.keys())) if isinstance(state, dict) else sorted(required)
+    if isinstance(state, dict) and "events" not in state and "event_log" not in state:
+        missing = sorted([*missing, "events|event_log"])
+    if missing:
+        return [_check("events_integrity", "FAIL", f"run {latest} state missing: {', '.join(missing)}", "修复 state.json 字段并重跑")]
+    events = load_run_events(ctx, latest, state)
+    if not events:
+        return [_check("events_integrity", "FAIL", f"run {latest} has empty events", "确认运行模式写入事件流")]
+    event_names = {item.get("event") for item in events if isinstance(item, dict)}
+    terminal_events = {"run_completed", "run_blocked", "dry_run_completed", "run_completed_debug", "replay_completed"}
+    if "run_started" not in event_names:
+        return [_check("events_integrity", "FAIL", f"run {latest} missing run_started", "检查事件写入入口")]
+    if not (event_names & terminal_events):
+        return [_check("events_integrity", "FAIL", f"run {latest} missing terminal event", "补充终态事件写入")]
+    return [_check("events_integrity", "PASS", f"run {latest} events={len(events)}")]
+
+
+def _doctor_machine_events(ctx: Context, files: DoctorFiles, deps: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    # Only meaningful once a run exists; events_integrity reports UNKNOWN when there is none.
+    if any(item["status"] == "UNKNOWN" for item in deps.get("events_integrity", [])):
+        return []
+    machine_data = files.read_json(ctx.execution_dir / "summary.json", None)
+    if not isinstance(machine_data, dict) or not machine_data:
+        return [_check("machine_events_integrity", "UNKNOWN", "summary.json unavailable", "先生成机器报告再校验")]
+    machine_events = machine_data.get("events")
+    if not isinstance(machine_events, list) or not machine_events:
+        return [_check("machine_events_integrity", "FAIL", "summary.json events empty", "重新生成机器报告")]
+    return [_check("machine_events_integrity", "PASS", f"summary events={len(machine_events)}")]
+
+
+def _doctor_scope_memory(ctx: Context, files: DoctorFiles, deps: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    scope_store = ScopeMemoryStore(ctx.scope_memory_dir)
+    rel = str(ctx.scope_memory_dir.relative_to(ctx.root))
+    if files.exists(scope_store.segments_dir) or all(files.exists(scope_store.view_path(kind)) for kind in SCOPE_KINDS):
+        return [_check("scope_memory_exists", "PASS", rel)]
+    return [_check("scope_memory_exists", "WARN", rel, "执行 strict + proposal 以生成 scope memory")]
+
+
+DOCTOR_CHECKS: list[DoctorCheck] = [
+    DoctorCheck(
+        "version_consistency",
+        lambda ctx: [
+            ctx.root / ".claude-plugin" / "plugin.json",
+            ctx.root / ".claude-plugin" / "marketplace.json",
+            ctx.terminal_path,
+        ],
+        _doctor_version_consistency,
+    ),
+    DoctorCheck("user_story_exists", lambda ctx: [ctx.user_story_path], _doctor_user_story),
+    DoctorCheck("ac_scope_schema", lambda ctx: [ctx.execution_dir / "ac_scope.json"], _doctor_ac_scope),
+    DoctorCheck("summary_human_redaction", lambda ctx: [ctx.execution_dir / "summary.md"], _doctor_summary_redaction),
+    DoctorCheck("summary_machine_schema", lambda ctx: [ctx.execution_dir / "summary.json"], _doctor_summary_machine),
+    DoctorCheck("terminal_schema", lambda ctx: [ctx.terminal_path], _doctor_terminal_schema),
+    DoctorCheck("events_integrity", _doctor_latest_run_inputs, _doctor_events_integrity),
+    DoctorCheck(
+        "machine_events_integrity",
+        lambda ctx: [ctx.execution_dir / "summary.json"],
+        _doctor_machine_events,
+        depends_on=("events_integrity",),
+    ),
+    DoctorCheck(
+        "scope_memory_exists",
+        lambda ctx: [ctx.scope_memory_dir / "segments", *(ctx.scope_memory_dir / f"{kind}.json" for kind in SCOPE_KINDS)],
+        _doctor_scope_memory,
+    ),
+]
 
-    if (ctx.scope_memory_dir / "deviations.json").exists() and (ctx.scope_memory_dir / "confirmations.json").exists():
-        add_check("scope_memory_exists", "PASS", str(ctx.scope_memory_dir.relative_to(ctx.root)))
-    else:
-        add_check("scope_memory_exists", "WARN", str(ctx.scope_memory_dir.relative_to(ctx.root)), "执行 strict + proposal 以生成 scope memory")
+
+def select_doctor_checks(names: list[str]) -> list[DoctorCheck]:
+    """Requested checks plus their transitive dependencies, in declaration order."""
+    by_name = {check.name: check for check in DOCTOR_CHECKS}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        raise ValueError(f"unknown doctor checks: {', '.join(unknown)}; available: {', '.join(by_name)}")
+    if not names:
+        return list(DOCTOR_CHECKS)
+    wanted: set[str] = set()
+    stack = list(names)
+    while stack:
+        name = stack.pop()
+        if name not in wanted:
+            wanted.add(name)
+            stack.extend(by_name[name].depends_on)
+    return [check for check in DOCTOR_CHECKS if check.name in wanted]
+
+
+DOCTOR_CACHE_VERSION = 2
+
+
+def _fingerprint(path: Path, previous: dict[str, Any] | None = None) -> dict[str, Any] | None:
+    """size/mtime/sha256 of ``path``; the hash is reused from ``previous`` while size and mtime match."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if path.is_dir():
+        return {"dir": True, "mtime_ns": stat.st_mtime_ns}
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return previous
+    try:
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+
+def _fingerprint_matches(current: dict[str, Any] | None, recorded: dict[str, Any] | None) -> bool:
+    if current is None or recorded is None:
+        return current is recorded
+    if current.get("dir") or recorded.get("dir"):
+        return current == recorded
+    return current.get("sha256") == recorded.get("sha256")
+
+
+def _verdict(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [{key: item[key] for key in ("name", "status", "detail", "recommendation")} for item in items]
+
+
+class DoctorCache:
+    """Per-check doctor verdicts keyed on version and input fingerprints, stored in .ptk/cache/doctor.json.
+
+    A verdict is reused when every declared input has the same content (size and
+    mtime short-circuit the hash) and every dependency produced the same verdict.
+    The whole cache is dropped when ptk_cli.py itself changes.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.cli = _stat_signature(Path(__file__))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        data = read_json(path, {})
+        valid = isinstance(data, dict) and data.get("version") == DOCTOR_CACHE_VERSION and data.get("cli") == self.cli
+        self.entries: dict[str, Any] = data.get("checks", {}) if valid and isinstance(data.get("checks"), dict) else {}
+
+    @staticmethod
+    def key(ctx: Context, check: DoctorCheck) -> str:
+        # Checks read version-scoped docs, so verdicts never cross versions.
+        return f"{ctx.version}:{check.name}"
+
+    def fingerprints(self, ctx: Context, check: DoctorCheck) -> dict[str, Any]:
+        recorded = self.entries.get(self.key(ctx, check), {}).get("inputs", {})
+        result: dict[str, Any] = {}
+        for path in check.inputs(ctx):
+            key = str(path.relative_to(ctx.root)) if path.is_relative_to(ctx.root) else str(path)
+            result[key] = _fingerprint(path, recorded.get(key))
+        return result
+
+    def lookup(
+        self, ctx: Context, check: DoctorCheck, inputs: dict[str, Any], deps: dict[str, list[dict[str, Any]]]
+    ) -> list[dict[str, Any]] | None:
+        entry = self.entries.get(self.key(ctx, check))
+        hit = (
+            isinstance(entry, dict)
+            and set(entry.get("inputs", {})) == set(inputs)
+            and all(_fingerprint_matches(inputs[key], entry["inputs"][key]) for key in inputs)
+            and entry.get("deps") == {name: _verdict(items) for name, items in deps.items()}
+        )
+        with self._lock:
+            if hit:
+                self.hits += 1
+                entry["inputs"] = inputs
+                return list(entry["results"])
+            self.misses += 1
+        return None
+
+    def store(
+        self,
+        ctx: Context,
+        check: DoctorCheck,
+        inputs: dict[str, Any],
+        deps: dict[str, list[dict[str, Any]]],
+        items: list[dict[str, Any]],
+    ) -> None:
+        entry = {
+            "inputs": inputs,
+            "deps": {name: _verdict(values) for name, values in deps.items()},
+            "results": _verdict(items),
+        }
+        with self._lock:
+            self.entries[self.key(ctx, check)] = entry
+
+    def save(self) -> None:
+        write_json_atomic(self.path, {"version": DOCTOR_CACHE_VERSION, "cli": self.cli, "checks": self.entries})
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "enabled": True,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+def run_doctor_checks(
+    ctx: Context,
+    checks: list[DoctorCheck],
+    *,
+    fail_fast: bool = False,
+    max_workers: int = 8,
+    cache: DoctorCache | None = None,
+) -> tuple[dict[str, list[dict[str, Any]]], list[str]]:
+    """Run checks on a thread pool as soon as their dependencies finish.
+
+    Returns per-check results (each item carries ``duration_ms`` and ``cached``)
+    and the names of checks never started because ``fail_fast`` tripped on a FAIL.
+    """
+    files = DoctorFiles()
+    results: dict[str, list[dict[str, Any]]] = {}
+    pending = {check.name: check for check in checks}
+    running: dict[Future[list[dict[str, Any]]], tuple[DoctorCheck, float]] = {}
+    failed = False
+
+    def execute(check: DoctorCheck) -> list[dict[str, Any]]:
+        deps = {dep: results.get(dep, []) for dep in check.depends_on}
+        if cache is None:
+            return [{**item, "cached": False} for item in check.run(ctx, files, deps)]
+        inputs = cache.fingerprints(ctx, check)
+        cached = cache.lookup(ctx, check, inputs, deps)
+        if cached is not None:
+            return [{**item, "cached": True} for item in cached]
+        items = check.run(ctx, files, deps)
+        cache.store(ctx, check, inputs, deps, items)
+        return [{**item, "cached": False} for item in items]
+
+    workers = max(1, min(max_workers, len(checks)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            # Submit only into free workers so a FAIL can still stop queued checks.
+            for name, check in list(pending.items()):
+                if len(running) >= workers or (fail_fast and failed):
+                    break
+                if all(dep in results for dep in check.depends_on):
+                    running[pool.submit(execute, check)] = (check, time.perf_counter())
+                    del pending[name]
+            if not running:
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                check, started = running.pop(future)
+                duration_ms = round((time.perf_counter() - started) * 1000, 3)
+                items = [{**item, "duration_ms": duration_ms} for item in future.result()]
+                results[check.name] = items
+                failed = failed or any(item["status"] == "FAIL" for item in items)
+
+    return results, list(pending)
+
+
+def command_doctor(args: argparse.Namespace, ctx: Context) -> int:
+    requested = [name.strip() for value in args.checks for name in value.split(",") if name.strip()]
+    try:
+        selected = select_doctor_checks(requested)
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    cache = None if args.no_cache else DoctorCache(ctx.cache_dir / "doctor.json")
+    results, skipped = run_doctor_checks(ctx, selected, fail_fast=args.fail_fast, cache=cache)
+    if cache is not None:
+        cache.save()
+    checks = [item for check in selected for item in results.get(check.name, [])]
 
     severity = {"PASS": 0, "UNKNOWN": 1, "WARN": 2, "FAIL": 3}
     overall = "PASS"
@@ -873,7 +2332,14 @@ def command_doctor(args: argparse.Namespace, ctx: Context) -> int:
         if severity.get(item["status"], 0) > severity.get(overall, 0):
             overall = item["status"]
 
-    payload = {"overall": overall, "checks": checks, "generated_at": now_iso()}
+    payload = {
+        "overall": overall,
+        "checks": checks,
+        "skipped": skipped,
+        "cache": cache.stats() if cache is not None else {"enabled": False},
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "generated_at": now_iso(),
+    }
     if args.json:
         print(json.dumps(payload, ensure_ascii=False, indent=2))
     else:
@@ -881,9 +2347,145 @@ def command_doctor(args: argparse.Namespace, ctx: Context) -> int:
         for item in checks:
             extra = f" | suggestion: {item['recommendation']}" if item.get("recommendation") else ""
             print(f"- {item['status']}: {item['name']} ({item['detail']}){extra}")
+        if skipped:
+            print(f"- skipped (fail-fast): {', '.join(skipped)}")
+        if cache is not None:
+            stats = cache.stats()
+            print(f"- cache: {stats['hits']}/{stats['hits'] + stats['misses']} reused (hit_ratio={stats['hit_ratio']})")
     return 0 if overall == "PASS" else 2
 
 
+DAEMON_FALLBACK_EXIT = 75  # EX_TEMPFAIL: the client re-runs the command in-process.
+
+
+def default_socket_path(root: Path) -> Path:
+    return Path(os.environ.get("PTK_SOCKET") or root / ".ptk" / "ptk.sock")
+
+
+def _daemon_request(sock_path: Path, request: dict[str, Any], timeout: float = 5.0) -> dict[str, Any] | None:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(timeout)
+            conn.connect(str(sock_path))
+            conn.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            conn.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        return json.loads(b"".join(chunks))
+    except (OSError, ValueError):
+        return None
+
+
+class _DaemonServer(socketserver.UnixStreamServer):
+    def __init__(self, sock_path: Path, idle_timeout: float) -> None:
+        super().__init__(str(sock_path), _DaemonHandler)
+        self.timeout = idle_timeout if idle_timeout > 0 else None
+        self.started_at = now_iso()
+        self.requests_served = 0
+        self.fallbacks = 0
+        self.stopping = False
+
+    def handle_timeout(self) -> None:
+        self.stopping = True
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    server: _DaemonServer
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline() or b"{}")
+        except ValueError:
+            request = {}
+        op = request.get("op", "run") if isinstance(request, dict) else "run"
+        if op == "stats":
+            response: dict[str, Any] = {
+                "pid": os.getpid(),
+                "started_at": self.server.started_at,
+                "requests_served": self.server.requests_served,
+                "fallbacks": self.server.fallbacks,
+                "cache_entries": len(_WARM_CACHE or {}),
+            }
+        elif op == "shutdown":
+            response = {"stopping": True}
+            self.server.stopping = True
+        else:
+            response = _serve_argv([str(x) for x in request.get("argv", [])])
+            if response.get("fallback"):
+                self.server.fallbacks += 1
+            else:
+                self.server.requests_served += 1
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+
+
+def _serve_argv(argv: list[str]) -> dict[str, Any]:
+    """Run one CLI invocation inside the daemon, capturing stdout/stderr and the exit code."""
+    normalized, _, intent_error = normalize_argv(["ptk", *argv])
+    if not intent_error:
+        try:
+            with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+                args = get_parser().parse_args(normalized[1:])
+        except SystemExit:
+            args = None
+        # Long-running or streaming commands stay in the caller's own process.
+        if args is not None and (args.func is command_serve or getattr(args, "follow", False)):
+            return {"fallback": True}
+
+    out, err = StringIO(), StringIO()
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            code = main(["ptk", *argv])
+        except SystemExit as exc:
+            code = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+        except Exception as exc:  # noqa: BLE001
+            print(f"ptk serve: unhandled error: {exc!r}", file=sys.stderr)
+            code = 1
+    return {"code": int(code), "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+
+def command_serve(args: argparse.Namespace, ctx: Context) -> int:
+    global _WARM_CACHE
+    sock_path = Path(args.socket) if args.socket else default_socket_path(ctx.root)
+
+    if args.stop or args.status:
+        response = _daemon_request(sock_path, {"op": "shutdown" if args.stop else "stats"})
+        if response is None:
+            print(f"No ptk daemon listening on {sock_path}", file=sys.stderr)
+            return 2
+        print(json.dumps(response, ensure_ascii=False, indent=2))
+        return 0
+
+    if sock_path.exists():
+        if _daemon_request(sock_path, {"op": "stats"}, timeout=1.0) is not None:
+            print(f"ptk daemon already running on {sock_path}", file=sys.stderr)
+            return 2
+        sock_path.unlink()  # stale socket left by a daemon that died
+    sock_path.parent.mkdir(parents=True, exist_ok=True)
+
+    _WARM_CACHE = {}
+    get_parser()
+    server = _DaemonServer(sock_path, args.idle_timeout)
+    print(f"# ptk serve listening on {sock_path} (pid={os.getpid()})", file=sys.stderr, flush=True)
+    try:
+        while not server.stopping:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        _WARM_CACHE = None
+        try:
+            sock_path.unlink()
+        except OSError:
+            pass
+    print("# ptk serve stopped", file=sys.stderr)
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="ptk", description=f"PTK unified CLI entry (v{TOOLKIT_VERSION}).")
     parser.add_argument("--version", default=DEFAULT_VERSION, help=f"Target product version (default: {DEFAULT_VERSION})")
@@ -905,12 +2507,68 @@ def build_parser() -> argparse.ArgumentParser:
     p_run.add_argument("--from-run", default="", help="Replay source run id (for --mode replay)")
     p_run.add_argument("--proposal", action="append", default=[], help="Optional proposal text for scope guard")
     p_run.add_argument("--confirm", choices=["A", "B", "C"], help="Human confirmation choice for high-risk scope")
+    p_run.add_argument(
+        "--durability",
+        default="end-of-run",
+        choices=list(EVENT_DURABILITY_POLICIES),
+        help="events.jsonl fsync policy (default: end-of-run)",
+    )
     p_run.set_defaults(func=command_run)
 
+    p_runs = sub.add_parser("runs", help="Query or rebuild the run index")
+    p_runs_sub = p_runs.add_subparsers(dest="runs_command", required=True)
+    p_runs_list = p_runs_sub.add_parser("list", help="List indexed runs (newest first)")
+    p_runs_list.add_argument("--workflow", default="", help="Filter by workflow route")
+    p_runs_list.add_argument("--mode", default="", help="Filter by execution mode")
+    p_runs_list.add_argument("--status", default="", help="Filter by run status")
+    p_runs_list.add_argument("--since", default="", help="Only runs started at/after this ISO timestamp")
+    p_runs_list.add_argument("--until", default="", help="Only runs started before this ISO timestamp")
+    p_runs_list.add_argument("--limit", type=int, default=20, help="Max rows (<=0 means unlimited)")
+    p_runs_list.set_defaults(func=command_runs)
+    p_runs_reindex = p_runs_sub.add_parser("reindex", help="Rebuild the run index from .ptk/runs")
+    p_runs_reindex.set_defaults(func=command_runs)
+
+    p_scope = sub.add_parser("scope", help="Scope memory store maintenance and lookups")
+    p_scope_sub = p_scope.add_subparsers(dest="scope_command", required=True)
+    p_scope_lookup = p_scope_sub.add_parser("lookup", help="Indexed lookup of deviations/confirmations")
+    p_scope_lookup.add_argument("--run-id", default="", help="Filter by run id")
+    p_scope_lookup.add_argument("--deviation-id", default="", help="Filter by deviation id")
+    p_scope_lookup.set_defaults(func=command_scope)
+    p_scope_compact = p_scope_sub.add_parser("compact", help="Regenerate deviations.json/confirmations.json views")
+    p_scope_compact.set_defaults(func=command_scope)
+    p_scope_views = p_scope_sub.add_parser("views", help="Refresh stale deviations.json/confirmations.json views")
+    p_scope_views.set_defaults(func=command_scope)
+    p_scope_reindex = p_scope_sub.add_parser("reindex", help="Rebuild the scope index from segment files")
+    p_scope_reindex.set_defaults(func=command_scope)
+
+    p_memory = sub.add_parser("memory", help="Query or rebuild the memory index")
+    p_memory_sub = p_memory.add_subparsers(dest="memory_command", required=True)
+    p_memory_query = p_memory_sub.add_parser("query", help="Ranked top-k lookup over insights/decisions/vocabulary/test learnings")
+    p_memory_query.add_argument("--text", default="", help="Full-text terms (all must match)")
+    p_memory_query.add_argument("--type", action="append", default=[], help="Filter by entry type (repeatable)")
+    p_memory_query.add_argument("--tag", action="append", default=[], help="Require tag (repeatable)")
+    p_memory_query.add_argument("--since", default="", help="Only entries at/after this ISO timestamp")
+    p_memory_query.add_argument("--until", default="", help="Only entries before this ISO timestamp")
+    p_memory_query.add_argument(
+        "--time-field", default="updated_at", choices=["updated_at", "created_at"], help="Field used by --since/--until"
+    )
+    p_memory_query.add_argument("--min-confidence", type=float, default=None, help="Minimum confidence")
+    p_memory_query.add_argument("--limit", type=int, default=10, help="Max rows (<=0 means unlimited)")
+    p_memory_query.set_defaults(func=command_memory)
+    p_memory_reindex = p_memory_sub.add_parser("reindex", help="Rebuild the memory index from .ptk/memory")
+    p_memory_reindex.set_defaults(func=command_memory)
+
+    p_serve = sub.add_parser("serve", help="Run the opt-in local daemon (Unix socket) for fast repeated calls")
+    p_serve.add_argument("--socket", default="", help="Socket path (default: $PTK_SOCKET or .ptk/ptk.sock)")
+    p_serve.add_argument("--idle-timeout", type=float, default=0.0, help="Exit after idle seconds (<=0 means never)")
+    p_serve.add_argument("--status", action="store_true", help="Show stats of the running daemon")
+    p_serve.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    p_serve.set_defaults(func=command_serve)
+
     p_debug = sub.add_parser("debug", help="Debug helpers")
     p_debug_sub = p_debug.add_subparsers(dest="debug_command", required=True)
     p_watch = p_debug_sub.add_parser("watch", help="Watch run events")
-    p_watch.add_argument("run_id", nargs="?", default="", help="Run id (default: latest)")
+    p_watch.add_argument("run_id", nargs="*", default=[], help="Run id(s) to watch (default: latest)")
     p_watch.add_argument("--tail", type=int, default=20, help="Tail line count")
     p_watch.add_argument("--follow", action="store_true", help="Follow new events until idle timeout")
     p_watch.add_argument("--poll-interval", type=float, default=0.2, help="Polling interval in seconds")
@@ -941,11 +2599,29 @@ def build_parser() -> argparse.ArgumentParser:
 
     p_doctor = sub.add_parser("doctor", help="Run environment and schema checks")
     p_doctor.add_argument("--json", action="store_true", help="JSON output")
+    p_doctor.add_argument(
+        "--checks",
+        action="append",
+        default=[],
+        help="Only run these checks (comma-separated or repeated; dependencies are included)",
+    )
+    p_doctor.add_argument("--fail-fast", action="store_true", help="Stop scheduling checks after the first FAIL")
+    p_doctor.add_argument("--no-cache", action="store_true", help="Re-run every check instead of reusing cached verdicts")
     p_doctor.set_defaults(func=command_doctor)
 
     return parser
 
 
+_PARSER: argparse.ArgumentParser | None = None
+
+
+def get_parser() -> argparse.ArgumentParser:
+    global _PARSER
+    if _PARSER is None:
+        _PARSER = build_parser()
+    return _PARSER
+
+
 def normalize_argv(argv: list[str]) -> tuple[list[str], str | None, bool]:
     if len(argv) < 2:
         return argv, None, False
@@ -1001,10 +2677,19 @@ def main(argv: list[str] | None = None) -> int:
         print(f"[intent-router] {intent_message}", file=sys.stderr)
     if intent_error:
         return 2
-    parser = build_parser()
-    args = parser.parse_args(argv[1:])
+    args = get_parser().parse_args(argv[1:])
     ctx = Context(root=Path(__file__).resolve().parents[1], version=args.version)
-    return int(args.func(args, ctx))
+    try:
+        code = int(args.func(args, ctx))
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. `ptk runs list | head`); point stdout at devnull so
+        # the interpreter's flush at exit does not raise again, and exit like SIGPIPE would.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+        return 141
+    return code
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Thin `ptk serve` client used by the ./ptk wrapper.
+
+Kept import-light so it starts fast under ``python3 -S``. Exits 75 when no
+daemon answers (or the daemon declines the command) so the wrapper can fall
+back to in-process execution.
+"""
+
+import json
+import socket
+import sys
+
+FALLBACK_EXIT = 75
+
+
+def main() -> int:
+    sock_path, argv = sys.argv[1], sys.argv[2:]
+    try:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(sock_path)
+    except OSError:
+        return FALLBACK_EXIT
+
+    with conn:
+        conn.sendall(json.dumps({"argv": argv}).encode("utf-8") + b"\n")
+        conn.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    try:
+        response = json.loads(b"".join(chunks))
+    except ValueError:
+        return FALLBACK_EXIT
+    if not isinstance(response, dict) or response.get("fallback"):
+        return FALLBACK_EXIT
+
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return int(response.get("code", 1))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,16 +1,60 @@
 #!/usr/bin/env python3
-"""Run a shell command and append immutable raw-command-log JSONL evidence."""
+"""Run a shell command and append immutable raw-command-log JSONL evidence.
+
+Output is streamed in chunks to the output file(s) and the console while its
+sha256 is computed in the same pass; bytes are written verbatim, so non-UTF-8
+output is preserved. --capture interleaved (default) merges stdout/stderr in
+arrival order into one file; --capture separate writes .stdout.log/.stderr.log.
+
+Batch mode runs a manifest of commands on a bounded worker pool:
+
+  python3 scripts/run_command_with_evidence.py --log <log.jsonl> --batch commands.json --jobs 4
+
+commands.json is a list (or {"commands": [...]}) of
+{"id", "cmd", "cwd"?, "timeout"?, "tags"?, "depends_on"?}. A command starts once
+all of its dependencies exited 0; dependents of a failed command are skipped.
+Log appends are serialized with an exclusive flock, and output file names are
+claimed exclusively so parallel commands never overwrite each other's output.
+
+--rusage adds the child's resource usage (user/sys CPU, max RSS, block I/O,
+context switches) to each record; --sample-memory MS additionally records a
+sampled RSS timeline of the command's process tree (Linux /proc).
+
+--store gzip|lzma writes outputs into a content-addressed store
+(<output-dir>/cas/sha256/<ab>/<sha256>.log.gz|.xz) keyed by the sha256 of the
+uncompressed output, so identical outputs are stored once; output_file points
+at the store object and evidence readers decompress it transparently.
+"""
 
 from __future__ import annotations
 
 import argparse
+import gzip
+import hashlib
 import json
+import lzma
+import os
 import re
+import signal
 import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, BinaryIO
+
+from evidence_integrity_common import OUTPUT_STORE_DIR, STORE_CODECS, store_object_path
 
-from evidence_integrity_common import sha256_file
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+CHUNK_SIZE = 64 * 1024
+PROC_ROOT = Path("/proc")
 
 
 def _slug(text: str) -> str:
@@ -21,50 +65,511 @@ def _slug(text: str) -> str:
     return cleaned[:48]
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Run command and capture raw evidence")
-    parser.add_argument("--log", required=True, help="raw command log jsonl path")
-    parser.add_argument("--cmd", required=True, help="command string")
-    parser.add_argument("--cwd", default=".", help="working directory")
-    parser.add_argument("--output-dir", default="", help="output log directory")
-    args = parser.parse_args()
+def _claim_output(output_dir: Path, base: str, suffixes: list[str]) -> list[Path]:
+    """Exclusively create one output file per suffix under a base name no other run holds."""
+    attempt = 1
+    while True:
+        name = base if attempt == 1 else f"{base}-{attempt}"
+        paths = [output_dir / f"{name}{suffix}" for suffix in suffixes]
+        created: list[Path] = []
+        try:
+            for path in paths:
+                with path.open("xb"):
+                    created.append(path)
+            return paths
+        except FileExistsError:
+            for path in created:
+                path.unlink()
+            attempt += 1
 
-    cwd = Path(args.cwd).resolve()
-    log_path = Path(args.log).resolve()
-    output_dir = Path(args.output_dir).resolve() if args.output_dir else log_path.parent / "raw-command-outputs"
 
-    output_dir.mkdir(parents=True, exist_ok=True)
-    log_path.parent.mkdir(parents=True, exist_ok=True)
+def append_log(log_path: Path, record: dict[str, Any]) -> None:
+    """Append one JSONL record as a single locked O_APPEND write."""
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+class _OutputSink:
+    """Where one captured stream goes: a claimed plain file, or a compressed temp that is
+    moved into the content-addressed store under its sha256 once the stream ends."""
+
+    def __init__(self, plain_path: Path | None = None, store_root: Path | None = None, codec: str = "gzip") -> None:
+        self.plain_path = plain_path
+        self.store_root = store_root
+        self.codec = codec
+        self.path: Path | None = plain_path
+        self._handles: list[BinaryIO] = []
+
+    def open(self) -> BinaryIO:
+        if self.plain_path is not None:
+            self._handles = [self.plain_path.open("wb")]
+            return self._handles[0]
+        tmp_dir = self.store_root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=tmp_dir, suffix=STORE_CODECS[self.codec])
+        self._tmp = Path(tmp_name)
+        raw = os.fdopen(fd, "wb")
+        if self.codec == "gzip":
+            # Fixed header (no name/mtime) so identical output compresses to identical bytes.
+            compressor: BinaryIO = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0, filename="")  # type: ignore[assignment]
+        else:
+            compressor = lzma.LZMAFile(raw, mode="wb")  # type: ignore[assignment]
+        # The compressor does not close a passed-in file object; close it second.
+        self._handles = [compressor, raw]
+        return compressor
+
+    def close(self) -> None:
+        for handle in self._handles:
+            handle.close()
+
+    def discard(self) -> None:
+        """Drop a claimed output file that never received any output (the command did not start)."""
+        self.close()
+        if self.plain_path is not None:
+            self.plain_path.unlink(missing_ok=True)
+
+    def commit(self, digest: str) -> None:
+        if self.plain_path is not None:
+            return
+        dest = store_object_path(self.store_root, digest, self.codec)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            # Identical output already stored: keep the existing object.
+            self._tmp.unlink()
+        else:
+            os.replace(self._tmp, dest)
+        self.path = dest
+
+
+def _pump(source: BinaryIO, sink: _OutputSink, console: BinaryIO | None) -> tuple[str, int]:
+    """Copy ``source`` into ``sink`` and ``console`` chunk by chunk; return (sha256, bytes)."""
+    hasher = hashlib.sha256()
+    total = 0
+    echo = console is not None
+    handle = sink.open()
+    try:
+        for chunk in iter(lambda: source.read1(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            handle.write(chunk)
+            total += len(chunk)
+            if echo:
+                try:
+                    console.write(chunk)
+                    console.flush()
+                except (BrokenPipeError, ValueError):
+                    # Keep capturing evidence even if whoever reads the console went away.
+                    echo = False
+    finally:
+        sink.close()
+    digest = hasher.hexdigest()
+    sink.commit(digest)
+    return digest, total
+
+
+def _rusage_fields(ru: Any) -> dict[str, int]:
+    # ru_maxrss is KiB on Linux but bytes on macOS.
+    max_rss_kb = ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+    return {
+        "user_cpu_ms": int(ru.ru_utime * 1000),
+        "sys_cpu_ms": int(ru.ru_stime * 1000),
+        "max_rss_kb": int(max_rss_kb),
+        "block_in": int(ru.ru_inblock),
+        "block_out": int(ru.ru_oublock),
+        "voluntary_ctx_switches": int(ru.ru_nvcsw),
+        "involuntary_ctx_switches": int(ru.ru_nivcsw),
+    }
+
+
+def _tree_rss_kb(root_pid: int) -> int | None:
+    """Summed RSS of ``root_pid`` and its descendants from /proc, or None where /proc is unavailable."""
+    if not PROC_ROOT.is_dir():
+        return None
+    children: dict[int, list[int]] = {}
+    rss_pages: dict[int, int] = {}
+    for entry in PROC_ROOT.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # Fields after the parenthesised comm: state ppid ... rss is field 24 overall.
+        fields = stat[stat.rfind(")") + 2 :].split()
+        pid = int(entry.name)
+        children.setdefault(int(fields[1]), []).append(pid)
+        rss_pages[pid] = int(fields[21])
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss_pages.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total * os.sysconf("SC_PAGE_SIZE") // 1024
+
 
+def _sample_memory(pid: int, interval_ms: int, stop: threading.Event, timeline: list[list[int]]) -> None:
+    started = time.monotonic()
+    while True:
+        rss = _tree_rss_kb(pid)
+        if rss is None:
+            return
+        if rss:
+            timeline.append([int((time.monotonic() - started) * 1000), rss])
+        if stop.wait(interval_ms / 1000):
+            return
+
+
+def run_one(
+    cmd: str,
+    cwd: Path,
+    output_dir: Path,
+    *,
+    capture: str = "interleaved",
+    timeout: float | None = None,
+    echo: bool = True,
+    rusage: bool = False,
+    sample_memory_ms: int = 0,
+    store: str = "none",
+) -> dict[str, Any]:
+    """Run ``cmd`` with streamed capture and return its raw-command-log record.
+
+    With ``store`` set to a codec, outputs go to the content-addressed store under
+    ``output_dir/cas`` instead of per-run ``.log`` files.
+    """
     started = datetime.now(timezone.utc)
-    proc = subprocess.run(args.cmd, shell=True, cwd=str(cwd), capture_output=True, text=True)
-    ended = datetime.now(timezone.utc)
+    base = f"{started.strftime('%Y%m%dT%H%M%SZ')}-{_slug(cmd)}"
+    separate = capture == "separate"
+    if store != "none":
+        out_sink = _OutputSink(store_root=output_dir / OUTPUT_STORE_DIR, codec=store)
+        err_sink = _OutputSink(store_root=output_dir / OUTPUT_STORE_DIR, codec=store) if separate else None
+    elif separate:
+        out_file, err_file = _claim_output(output_dir, base, [".stdout.log", ".stderr.log"])
+        out_sink, err_sink = _OutputSink(out_file), _OutputSink(err_file)
+    else:
+        (out_file,) = _claim_output(output_dir, base, [".log"])
+        out_sink, err_sink = _OutputSink(out_file), None
+
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            shell=True,
+            cwd=str(cwd),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE if separate else subprocess.STDOUT,
+            # Own process group only when we may have to kill it; otherwise Ctrl-C reaches the command.
+            start_new_session=timeout is not None,
+        )
+    except OSError:
+        for sink in (out_sink, err_sink):
+            if sink is not None:
+                sink.discard()
+        raise
+    results: dict[str, tuple[str, int]] = {}
+    pumps = [
+        threading.Thread(
+            target=lambda: results.__setitem__("out", _pump(proc.stdout, out_sink, sys.stdout.buffer if echo else None)),
+            daemon=True,
+        )
+    ]
+    if separate:
+        pumps.append(
+            threading.Thread(
+                target=lambda: results.__setitem__("err", _pump(proc.stderr, err_sink, sys.stderr.buffer if echo else None)),
+                daemon=True,
+            )
+        )
+    for pump in pumps:
+        pump.start()
 
-    stamp = started.strftime("%Y%m%dT%H%M%SZ")
-    out_file = output_dir / f"{stamp}-{_slug(args.cmd)}.log"
-    merged = (proc.stdout or "") + (proc.stderr or "")
-    out_file.write_text(merged, encoding="utf-8")
+    timeline: list[list[int]] = []
+    stop_sampling = threading.Event()
+    sampler = None
+    if sample_memory_ms > 0:
+        sampler = threading.Thread(
+            target=_sample_memory, args=(proc.pid, sample_memory_ms, stop_sampling, timeline), daemon=True
+        )
+        sampler.start()
+
+    timed_out = threading.Event()
+
+    def kill_group() -> None:
+        timed_out.set()
+        # Kill the whole process group: the shell's children still hold the output pipes.
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError):
+            proc.kill()
+
+    timer = threading.Timer(timeout, kill_group) if timeout is not None else None
+    if timer is not None:
+        timer.start()
+    usage = None
+    if rusage and hasattr(os, "wait4"):
+        _, wait_status, ru = os.wait4(proc.pid, 0)
+        returncode = os.waitstatus_to_exitcode(wait_status)
+        proc.returncode = returncode
+        usage = _rusage_fields(ru)
+    else:
+        returncode = proc.wait()
+    if timer is not None:
+        timer.cancel()
+    stop_sampling.set()
+    if sampler is not None:
+        sampler.join()
+    for pump in pumps:
+        pump.join()
+    for stream in (proc.stdout, proc.stderr):
+        if stream is not None:
+            stream.close()
+    ended = datetime.now(timezone.utc)
 
-    record = {
-        "cmd": args.cmd,
+    out_sha, out_bytes = results["out"]
+    record: dict[str, Any] = {
+        "cmd": cmd,
         "cwd": str(cwd),
         "started_at": started.isoformat(),
         "ended_at": ended.isoformat(),
         "duration_ms": int((ended - started).total_seconds() * 1000),
-        "exit_code": int(proc.returncode),
-        "output_file": str(out_file),
-        "output_sha256": sha256_file(out_file),
+        "exit_code": int(returncode),
+        "capture": capture,
+        "output_file": str(out_sink.path),
+        "output_sha256": out_sha,
+        "output_bytes": out_bytes,
     }
+    if separate:
+        err_sha, err_bytes = results["err"]
+        record.update({"stderr_file": str(err_sink.path), "stderr_sha256": err_sha, "stderr_bytes": err_bytes})
+    if store != "none":
+        record["output_store"] = store
+    if timed_out.is_set():
+        record["timed_out"] = True
+    if usage is not None:
+        record["rusage"] = usage
+    if timeline:
+        record["memory_timeline"] = {
+            "interval_ms": sample_memory_ms,
+            "peak_rss_kb": max(rss for _, rss in timeline),
+            "samples": timeline,
+        }
+    return record
+
+
+def load_batch(path: Path) -> list[dict[str, Any]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    commands = data.get("commands") if isinstance(data, dict) else data
+    if not isinstance(commands, list):
+        raise ValueError("batch manifest must be a list or {\"commands\": [...]}")
+
+    out: list[dict[str, Any]] = []
+    for idx, item in enumerate(commands, start=1):
+        if not isinstance(item, dict) or not isinstance(item.get("cmd"), str) or not item["cmd"].strip():
+            raise ValueError(f"batch entry {idx}: cmd is required")
+        timeout = item.get("timeout")
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise ValueError(f"batch entry {idx}: timeout must be a positive number of seconds")
+        tags = item.get("tags", [])
+        if not isinstance(tags, list):
+            raise ValueError(f"batch entry {idx}: tags must be a list")
+        depends_on = item.get("depends_on", [])
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        out.append(
+            {
+                "id": str(item.get("id") or f"cmd-{idx}"),
+                "cmd": item["cmd"],
+                "cwd": item.get("cwd"),
+                "timeout": timeout,
+                "tags": [str(tag) for tag in tags],
+                "depends_on": [str(dep) for dep in depends_on],
+            }
+        )
+
+    ids = [item["id"] for item in out]
+    duplicates = sorted({i for i in ids if ids.count(i) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate batch ids: {', '.join(duplicates)}")
+    unknown = sorted({dep for item in out for dep in item["depends_on"] if dep not in ids})
+    if unknown:
+        raise ValueError(f"unknown dependencies: {', '.join(unknown)}")
+
+    # Reject cycles up front rather than deadlocking the scheduler.
+    deps = {item["id"]: set(item["depends_on"]) for item in out}
+    resolved: set[str] = set()
+    while len(resolved) < len(deps):
+        ready = {cid for cid, needs in deps.items() if cid not in resolved and needs <= resolved}
+        if not ready:
+            raise ValueError(f"dependency cycle among: {', '.join(sorted(set(deps) - resolved))}")
+        resolved |= ready
+    return out
+
+
+def run_batch(
+    commands: list[dict[str, Any]],
+    log_path: Path,
+    output_dir: Path,
+    default_cwd: Path,
+    *,
+    jobs: int,
+    capture: str,
+    rusage: bool = False,
+    sample_memory_ms: int = 0,
+    store: str = "none",
+) -> dict[str, Any]:
+    pending = {item["id"]: item for item in commands}
+    status: dict[str, str] = {}
+    results: dict[str, dict[str, Any]] = {}
+    running: dict[Future[dict[str, Any]], str] = {}
+
+    def execute(item: dict[str, Any]) -> dict[str, Any]:
+        cwd = (default_cwd / item["cwd"]).resolve() if item["cwd"] else default_cwd
+        started = datetime.now(timezone.utc)
+        try:
+            record = run_one(
+                item["cmd"],
+                cwd,
+                output_dir,
+                capture=capture,
+                timeout=item["timeout"],
+                echo=False,
+                rusage=rusage,
+                sample_memory_ms=sample_memory_ms,
+                store=store,
+            )
+        except Exception as exc:  # noqa: BLE001
+            # The command never ran (bad cwd, fork failure, ...): log it as failed, keep the batch going.
+            ended = datetime.now(timezone.utc)
+            record = {
+                "cmd": item["cmd"],
+                "cwd": str(cwd),
+                "started_at": started.isoformat(),
+                "ended_at": ended.isoformat(),
+                "duration_ms": int((ended - started).total_seconds() * 1000),
+                "exit_code": -1,
+                "capture": capture,
+                "error": f"{type(exc).__name__}: {exc}",
+            }
+        record["batch_id"] = item["id"]
+        if item["tags"]:
+            record["tags"] = item["tags"]
+        append_log(log_path, record)
+        return record
 
-    with log_path.open("a", encoding="utf-8") as handle:
-        handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for cid, item in list(pending.items()):
+                dep_states = [status.get(dep) for dep in item["depends_on"]]
+                if any(state in {"failed", "skipped"} for state in dep_states):
+                    status[cid] = "skipped"
+                    del pending[cid]
+                elif all(state == "passed" for state in dep_states):
+                    running[pool.submit(execute, item)] = cid
+                    del pending[cid]
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                cid = running.pop(future)
+                try:
+                    record = future.result()
+                except Exception as exc:  # noqa: BLE001
+                    record = {"exit_code": None, "error": f"{type(exc).__name__}: {exc}"}
+                results[cid] = record
+                status[cid] = "passed" if record["exit_code"] == 0 else "failed"
+
+    return {
+        "status": "Pass" if all(state == "passed" for state in status.values()) else "Blocked",
+        "log": str(log_path),
+        "commands": [
+            {
+                "id": item["id"],
+                "status": status[item["id"]],
+                "exit_code": results.get(item["id"], {}).get("exit_code"),
+                "duration_ms": results.get(item["id"], {}).get("duration_ms"),
+                "output_file": results.get(item["id"], {}).get("output_file"),
+                **({"error": results[item["id"]]["error"]} if "error" in results.get(item["id"], {}) else {}),
+            }
+            for item in commands
+        ],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run command and capture raw evidence")
+    parser.add_argument("--log", required=True, help="raw command log jsonl path")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--cmd", help="command string")
+    target.add_argument("--batch", help="JSON manifest of commands to run on a worker pool")
+    parser.add_argument("--cwd", default=".", help="working directory (batch: base for relative cwd)")
+    parser.add_argument("--output-dir", default="", help="output log directory")
+    parser.add_argument(
+        "--capture",
+        choices=["interleaved", "separate"],
+        default="interleaved",
+        help="interleaved: one file in arrival order; separate: stdout/stderr files",
+    )
+    parser.add_argument("--timeout", type=float, default=None, help="kill the command after N seconds")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 2, help="batch worker count")
+    parser.add_argument("--rusage", action="store_true", help="record child CPU/RSS/block-IO/context-switch usage")
+    parser.add_argument(
+        "--sample-memory",
+        type=int,
+        default=0,
+        metavar="MS",
+        help="sample the command tree's RSS every MS milliseconds into memory_timeline",
+    )
+    parser.add_argument(
+        "--store",
+        choices=["none", *STORE_CODECS],
+        default="none",
+        help="write outputs to the compressed content-addressed store (<output-dir>/cas) instead of .log files",
+    )
+    args = parser.parse_args()
+
+    cwd = Path(args.cwd).resolve()
+    log_path = Path(args.log).resolve()
+    output_dir = Path(args.output_dir).resolve() if args.output_dir else log_path.parent / "raw-command-outputs"
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
 
-    if proc.stdout:
-        print(proc.stdout, end="")
-    if proc.stderr:
-        print(proc.stderr, end="")
+    if args.batch:
+        try:
+            commands = load_batch(Path(args.batch).resolve())
+        except (OSError, ValueError) as exc:
+            print(f"invalid batch manifest: {exc}", file=sys.stderr)
+            return 2
+        summary = run_batch(
+            commands,
+            log_path,
+            output_dir,
+            cwd,
+            jobs=args.jobs,
+            capture=args.capture,
+            rusage=args.rusage,
+            sample_memory_ms=args.sample_memory,
+            store=args.store,
+        )
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return 0 if summary["status"] == "Pass" else 1
 
-    return int(proc.returncode)
+    record = run_one(
+        args.cmd,
+        cwd,
+        output_dir,
+        capture=args.capture,
+        timeout=args.timeout,
+        rusage=args.rusage,
+        sample_memory_ms=args.sample_memory,
+        store=args.store,
+    )
+    append_log(log_path, record)
+    return int(record["exit_code"])
 
 
 if __name__ == "__main__":
@@ -1,5 +1,8 @@
 import json
+import os
 import subprocess
+import tempfile
+import time
 import unittest
 from pathlib import Path
 
@@ -8,13 +11,14 @@ ROOT = Path(__file__).resolve().parents[2]
 PTK = ROOT / "ptk"
 
 
-def run_ptk(*args: str) -> subprocess.CompletedProcess[str]:
+def run_ptk(*args: str, env: dict[str, str] | None = None) -> subprocess.CompletedProcess[str]:
     return subprocess.run(
         [str(PTK), *args],
         cwd=str(ROOT),
         text=True,
         capture_output=True,
         check=False,
+        env={**os.environ, **env} if env else None,
     )
 
 
@@ -76,6 +80,19 @@ class PtkCliTests(unittest.TestCase):
         second_id = json.loads(second.stdout)["run_id"]
         self.assertNotEqual(first_id, second_id)
 
+    def test_runs_index_list_and_reindex(self) -> None:
+        proc = run_ptk("--version", "v3.7.0", "run", "workflow", "--mode", "dry-run")
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        run_id = json.loads(proc.stdout)["run_id"]
+
+        listed = run_ptk("runs", "list", "--mode", "dry-run", "--limit", "1")
+        self.assertEqual(listed.returncode, 0, listed.stderr)
+        self.assertEqual(json.loads(listed.stdout)["runs"][0]["run_id"], run_id)
+
+        reindex = run_ptk("runs", "reindex")
+        self.assertEqual(reindex.returncode, 0, reindex.stderr)
+        self.assertGreaterEqual(json.loads(reindex.stdout)["reindexed"], 1)
+
     def test_debug_follow_mode(self) -> None:
         run_proc = run_ptk("--version", "v3.7.0", "run", "workflow", "--mode", "debug")
         self.assertEqual(run_proc.returncode, 0, run_proc.stderr)
@@ -99,6 +116,21 @@ class PtkCliTests(unittest.TestCase):
         self.assertIn("debug watch follow mode", watch_proc.stderr)
         self.assertIn(run_id, watch_proc.stdout)
 
+    def test_debug_watch_multiple_runs(self) -> None:
+        run_ids = []
+        for _ in range(2):
+            proc = run_ptk("--version", "v3.7.0", "run", "workflow", "--mode", "debug")
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+            run_ids.append(json.loads(proc.stdout)["run_id"])
+
+        watch_proc = run_ptk(
+            "--version", "v3.7.0", "debug", "watch", *run_ids, "--tail", "1", "--follow", "--idle-exit", "0.2"
+        )
+        self.assertEqual(watch_proc.returncode, 0, watch_proc.stderr)
+        self.assertIn("runs=2", watch_proc.stderr)
+        for run_id in run_ids:
+            self.assertIn(run_id, watch_proc.stdout)
+
     def test_replay_mode_differs_from_normal(self) -> None:
         base_proc = run_ptk("--version", "v3.7.0", "run", "workflow", "--mode", "normal")
         self.assertEqual(base_proc.returncode, 0, base_proc.stderr)
@@ -124,6 +156,40 @@ class PtkCliTests(unittest.TestCase):
         self.assertTrue(any(event.get("event") == "replay_completed" for event in payload.get("events", [])))
         self.assertNotEqual(payload.get("reason", ""), "")
 
+    def test_serve_daemon_handles_calls_and_falls_back(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {"PTK_SOCKET": str(Path(tmp) / "ptk.sock")}
+            daemon = subprocess.Popen(
+                [str(PTK), "serve", "--idle-timeout", "30"],
+                cwd=str(ROOT),
+                env={**os.environ, **env},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                for _ in range(50):
+                    if Path(env["PTK_SOCKET"]).exists():
+                        break
+                    time.sleep(0.05)
+                direct = run_ptk("status", "--board", env={"PTK_NO_DAEMON": "1"})
+                served = run_ptk("status", "--board", env=env)
+                self.assertEqual(served.returncode, 0, served.stderr)
+                self.assertEqual(served.stdout, direct.stdout)
+
+                bad = run_ptk("report", env=env)
+                self.assertEqual(bad.returncode, 2)
+                self.assertIn("--human", bad.stderr)
+
+                stats = run_ptk("serve", "--status", env=env)
+                self.assertEqual(stats.returncode, 0, stats.stderr)
+                self.assertGreaterEqual(json.loads(stats.stdout)["requests_served"], 2)
+            finally:
+                run_ptk("serve", "--stop", env=env)
+                daemon.wait(timeout=10)
+
+            fallback = run_ptk("status", env=env)
+            self.assertEqual(fallback.returncode, 0, fallback.stderr)
+
     def test_strict_missing_user_story_is_friendly(self) -> None:
         proc = run_ptk("--version", "v9.9.9", "run", "workflow", "--mode", "strict")
         self.assertNotEqual(proc.returncode, 0)
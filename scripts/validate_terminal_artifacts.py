@@ -4,35 +4,51 @@
 Includes architecture governance + integrity checks:
 - required architecture files under docs/product/{version}/architecture
 - ownership boundaries / api drift / nfr proof fields
-- raw command log validation
-- sha256 manifest coverage + hash verification
-- gate consistency cross-check (terminal vs architecture docs)
+- raw command log validation (streamed; checkpointed so only appended lines are re-parsed)
+- sha256 manifest coverage + hash verification (cached on dev/inode/size/mtime, misses hashed in parallel)
+- manifest schema 1.0 (flat) or 1.1 (Merkle tree consistent with items)
+- gate consistency cross-check (terminal vs architecture docs), shared cache with check_gate_consistency.py
 
 Usage:
   python3 scripts/validate_terminal_artifacts.py --version v3.6.0
   python3 scripts/validate_terminal_artifacts.py --version v3.6.0 --terminal docs/product/v3.6.0/execution/terminal.release-sample.json
+  python3 scripts/validate_terminal_artifacts.py --version v3.6.0 --paranoid   # ignore the sha256 cache
+  python3 scripts/validate_terminal_artifacts.py --version v3.6.0 --no-cache   # or --cache <path>
+  python3 scripts/validate_terminal_artifacts.py --all-versions --jobs 4
+  python3 scripts/validate_terminal_artifacts.py --versions 'v3.6.*'
 
 Exit codes:
-  0 => Pass
+  0 => Pass (every version, in multi-version mode)
   2 => Blocked (one or more checks failed)
+  3 => no version folder matched (multi-version mode)
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import time
 from pathlib import Path
 from typing import Any
 
 from evidence_integrity_common import (
+    HASH_CACHE_REL,
+    MANIFEST_SCHEMA_MERKLE,
+    MANIFEST_SCHEMA_VERSIONS,
+    RAW_LOG_CHECKPOINT_REL,
+    HashCache,
+    cached_gate_consistency,
     collect_evidence_refs,
-    compute_gate_consistency,
+    discover_versions,
     display_path,
+    hash_files,
     load_json,
+    load_markdown,
+    merkle_problems,
     normalize_ref,
     parse_raw_command_log,
     resolve_ref,
-    sha256_file,
+    run_versions,
     unique_refs,
 )
 
@@ -52,8 +68,14 @@ def _validate_boundaries(path: Path, reasons: list[str], details: dict[str, Any]
         details["boundaries_exists"] = False
         return
 
+    doc = load_markdown(path)
+    if doc is None:
+        # Removed between the exists() check and the read.
+        _add_reason(reasons, "boundaries_missing")
+        details["boundaries_exists"] = False
+        return
+
     details["boundaries_exists"] = True
-    txt = path.read_text(encoding="utf-8")
     required_markers = [
         "## 2. In Scope",
         "## 3. Out of Scope",
@@ -61,7 +83,7 @@ def _validate_boundaries(path: Path, reasons: list[str], details: dict[str, Any]
         "## 6. Blocked 条件",
         "## 8. 输出产物",
     ]
-    missing = [m for m in required_markers if m not in txt]
+    missing = [m for m in required_markers if not doc.has_heading(m)]
     details["boundaries_missing_markers"] = missing
     if missing:
         _add_reason(reasons, "boundaries_schema_invalid")
@@ -253,6 +275,9 @@ def _validate_evidence_integrity(
     reasons: list[str],
     details: dict[str, Any],
     consistency: dict[str, Any],
+    hash_cache: HashCache | None = None,
+    paranoid: bool = False,
+    hash_workers: int | None = None,
 ) -> None:
     integrity = data.get("evidence_integrity")
     if not isinstance(integrity, dict):
@@ -273,7 +298,7 @@ def _validate_evidence_integrity(
     else:
         raw_path = resolve_ref(raw_ref, root)
         details["raw_command_log_path"] = display_path(raw_path, root)
-        raw_info = parse_raw_command_log(raw_path)
+        raw_info = parse_raw_command_log(raw_path, checkpoint_dir=root / RAW_LOG_CHECKPOINT_REL)
         details["raw_command_log"] = raw_info
         if not raw_path.exists():
             _add_reason(reasons, "raw_command_log_missing")
@@ -308,6 +333,8 @@ def _validate_evidence_integrity(
                             "actual_status": report_status,
                             "expected_conflict_count": len(consistency.get("conflicts", [])),
                             "actual_conflict_count": len(report_conflicts),
+                            "expected_cache_key": consistency.get("cache_key"),
+                            "actual_cache_key": report_data.get("cache_key"),
                         }
 
     manifest_path = None
@@ -326,6 +353,13 @@ def _validate_evidence_integrity(
                 details["sha256_manifest_error"] = manifest_err or "not_object"
                 return
 
+            schema_version = str(manifest_data.get("schema_version", "1.0"))
+            details["sha256_manifest_schema_version"] = schema_version
+            if schema_version not in MANIFEST_SCHEMA_VERSIONS:
+                _add_reason(reasons, "evidence_sha256_manifest_invalid")
+                details["sha256_manifest_schema"] = "unsupported_schema_version"
+                return
+
             items = manifest_data.get("items")
             if not isinstance(items, list):
                 _add_reason(reasons, "evidence_sha256_manifest_invalid")
@@ -352,6 +386,14 @@ def _validate_evidence_integrity(
                 _add_reason(reasons, "evidence_sha256_manifest_invalid")
                 details["sha256_manifest_invalid_items"] = manifest_invalid_items
 
+            if schema_version == MANIFEST_SCHEMA_MERKLE:
+                problems = merkle_problems(manifest_data)
+                if problems:
+                    _add_reason(reasons, "evidence_sha256_manifest_invalid")
+                    details["sha256_manifest_merkle_problems"] = problems
+                else:
+                    details["sha256_manifest_merkle_root"] = manifest_data["merkle"]["root"]
+
             required_refs = collect_evidence_refs(data)
             if isinstance(raw_ref, str) and raw_ref.strip():
                 required_refs.append(raw_ref)
@@ -369,17 +411,42 @@ def _validate_evidence_integrity(
 
             mismatched_refs: list[str] = []
             missing_files: list[str] = []
+            ref_paths = {normalized_ref: resolve_ref(normalized_ref, root) for normalized_ref in manifest_map}
+            hash_started = time.perf_counter()
+            digests = hash_files(list(ref_paths.values()), hash_cache, paranoid=paranoid, workers=hash_workers)
+            hash_seconds = time.perf_counter() - hash_started
             for normalized_ref, item in manifest_map.items():
-                ref_path = resolve_ref(normalized_ref, root)
-                if not ref_path.exists():
+                digest = digests[ref_paths[normalized_ref]]
+                if digest.sha256 is None:
                     missing_files.append(normalized_ref)
                     continue
 
                 expected = str(item.get("sha256", "")).lower()
-                actual = sha256_file(ref_path)
-                if expected != actual:
+                if expected != digest.sha256:
                     mismatched_refs.append(normalized_ref)
 
+            hashed = [d for d in digests.values() if d.sha256 is not None and not d.cached]
+            bytes_hashed = sum(d.size_bytes for d in hashed)
+            details["sha256_manifest_hashing"] = {
+                "paranoid": paranoid,
+                "file_count": sum(1 for d in digests.values() if d.sha256 is not None),
+                "cache_hits": sum(1 for d in digests.values() if d.cached),
+                "hashed_count": len(hashed),
+                "bytes_hashed": bytes_hashed,
+                "wall_ms": round(hash_seconds * 1000, 3),
+                "throughput_bytes_per_sec": round(bytes_hashed / hash_seconds) if hashed and hash_seconds > 0 else None,
+                "files": [
+                    {
+                        "path": normalized_ref,
+                        "size_bytes": digests[ref_paths[normalized_ref]].size_bytes,
+                        "ms": round(digests[ref_paths[normalized_ref]].seconds * 1000, 3),
+                        "cached": digests[ref_paths[normalized_ref]].cached,
+                    }
+                    for normalized_ref in manifest_map
+                    if digests[ref_paths[normalized_ref]].sha256 is not None
+                ],
+            }
+
             if missing_files:
                 _add_reason(reasons, "evidence_sha256_manifest_invalid")
                 details["sha256_manifest_missing_files"] = missing_files
@@ -389,52 +456,116 @@ def _validate_evidence_integrity(
                 details["sha256_manifest_mismatched_refs"] = mismatched_refs
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Validate PTK v3.6.0 terminal evidence artifacts")
-    parser.add_argument("--version", required=True, help="version folder, e.g. v3.6.0")
-    parser.add_argument("--terminal", default="", help="override terminal json path (repo-relative)")
-    parser.add_argument("--boundaries", default="", help="override boundaries path (repo-relative)")
-    parser.add_argument("--pretty", action="store_true", help="pretty-print json")
-    args = parser.parse_args()
-
-    root = _repo_root()
-    default_exec = root / "docs" / "product" / args.version / "execution"
-
-    terminal_path = root / args.terminal if args.terminal else default_exec / "terminal.json"
-    boundaries_path = root / args.boundaries if args.boundaries else default_exec / "boundaries.md"
+def validate_version(
+    version: str,
+    root: Path,
+    terminal: str = "",
+    boundaries: str = "",
+    paranoid: bool = False,
+    hash_workers: int | None = None,
+    hash_cache: str = HASH_CACHE_REL,
+) -> dict[str, Any]:
+    """Validate one version; ``hash_cache`` is the sha256 cache path ("" keeps it in memory only)."""
+    default_exec = root / "docs" / "product" / version / "execution"
+
+    terminal_path = root / terminal if terminal else default_exec / "terminal.json"
+    boundaries_path = root / boundaries if boundaries else default_exec / "boundaries.md"
 
     reasons: list[str] = []
     details: dict[str, Any] = {
-        "version": args.version,
+        "version": version,
         "terminal_path": display_path(terminal_path, root),
         "boundaries_path": display_path(boundaries_path, root),
     }
 
     _validate_boundaries(boundaries_path, reasons, details)
-    _validate_architecture_artifacts(args.version, root, reasons, details)
+    _validate_architecture_artifacts(version, root, reasons, details)
     data = _validate_terminal_schema(terminal_path, root, reasons, details)
 
     if data is not None:
-        consistency = compute_gate_consistency(data, root, args.version)
+        consistency, consistency_cached = cached_gate_consistency(data, root, version)
         details["gate_consistency"] = consistency
+        details["gate_consistency_cache_hit"] = consistency_cached
         if consistency.get("status") != "Pass":
             _add_reason(reasons, "gate_consistency_conflict")
 
-        _validate_evidence_integrity(data, terminal_path, root, reasons, details, consistency)
+        digest_cache = HashCache(resolve_ref(hash_cache, root) if hash_cache else None)
+        _validate_evidence_integrity(
+            data,
+            terminal_path,
+            root,
+            reasons,
+            details,
+            consistency,
+            hash_cache=digest_cache,
+            paranoid=paranoid,
+            hash_workers=hash_workers,
+        )
+        digest_cache.save()
 
     status = "Pass" if not reasons else "Blocked"
-    payload = {
+    return {
         "status": status,
         "reason_codes": reasons,
         "details": details,
     }
 
-    if args.pretty:
-        print(json.dumps(payload, ensure_ascii=False, indent=2))
-    else:
-        print(json.dumps(payload, ensure_ascii=False))
 
-    return 0 if status == "Pass" else 2
+def _version_summary(version: str, **kwargs: Any) -> dict[str, Any]:
+    payload = validate_version(version, **kwargs)
+    return {"status": payload["status"], "reason_codes": payload["reason_codes"]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate PTK v3.6.0 terminal evidence artifacts")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--version", help="version folder, e.g. v3.6.0")
+    target.add_argument("--all-versions", action="store_true", help="validate every docs/product/v* folder")
+    target.add_argument("--versions", default="", help="glob of version folders under docs/product, e.g. 'v3.6.*'")
+    parser.add_argument("--terminal", default="", help="override terminal json path (repo-relative)")
+    parser.add_argument("--boundaries", default="", help="override boundaries path (repo-relative)")
+    parser.add_argument("--pretty", action="store_true", help="pretty-print json")
+    parser.add_argument("--paranoid", action="store_true", help="ignore the sha256 cache and re-hash every manifest file")
+    parser.add_argument("--hash-workers", type=int, default=None, help="threads used to hash cache misses")
+    parser.add_argument("--cache", default=HASH_CACHE_REL, help=f"sha256 cache path (default: {HASH_CACHE_REL})")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the sha256 cache")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes for multi-version mode")
+    args = parser.parse_args()
+
+    root = _repo_root()
+    indent = 2 if args.pretty else None
+    hash_cache = "" if args.no_cache else args.cache
+
+    if args.version:
+        payload = validate_version(
+            args.version,
+            root,
+            terminal=args.terminal,
+            boundaries=args.boundaries,
+            paranoid=args.paranoid,
+            hash_workers=args.hash_workers,
+            hash_cache=hash_cache,
+        )
+        print(json.dumps(payload, ensure_ascii=False, indent=indent))
+        return 0 if payload["status"] == "Pass" else 2
+
+    if args.terminal or args.boundaries:
+        parser.error("--terminal/--boundaries only apply to a single --version")
+    versions = discover_versions(root, args.versions or "v*")
+    if not versions:
+        print(json.dumps({"status": "Blocked", "version_count": 0, "reason_codes": ["no_versions_matched"]}, indent=indent))
+        return 3
+    aggregate = run_versions(
+        _version_summary,
+        versions,
+        args.jobs,
+        root=root,
+        paranoid=args.paranoid,
+        hash_workers=args.hash_workers,
+        hash_cache=hash_cache,
+    )
+    print(json.dumps(aggregate, ensure_ascii=False, indent=indent))
+    return 0 if aggregate["status"] == "Pass" else 2
 
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Partial verification and diffing of schema 1.1 (Merkle) evidence manifests.
+
+Usage:
+  python3 scripts/verify_evidence_manifest.py --manifest docs/product/v3.7.0/execution/evidence-manifest.json
+  python3 scripts/verify_evidence_manifest.py --manifest <m> --class reports --class logs
+  python3 scripts/verify_evidence_manifest.py --manifest <m> --ac US3701-AC01 --terminal docs/product/v3.7.0/execution/terminal.json
+  python3 scripts/verify_evidence_manifest.py --manifest <m> --diff <other-manifest>
+  python3 scripts/verify_evidence_manifest.py --manifest <m> --no-cache   # or --cache <path>
+
+Only the files in the selected subtrees (or the AC's evidence_refs) are re-hashed;
+the tree itself is always checked against the recorded root without file IO.
+--diff compares roots first and only descends into classes whose subtree root changed.
+
+Exit codes:
+  0 => Pass (or manifests equal for --diff)
+  2 => Blocked (verification failed, or manifests differ for --diff)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any
+
+from evidence_integrity_common import (
+    HASH_CACHE_REL,
+    MANIFEST_SCHEMA_MERKLE,
+    MERKLE_CLASSES,
+    HashCache,
+    diff_merkle,
+    display_path,
+    hash_files,
+    load_json,
+    merkle_leaf,
+    merkle_problems,
+    resolve_ref,
+)
+
+
+def _repo_root() -> Path:
+    return Path(__file__).resolve().parents[1]
+
+
+def _load_manifest(path: Path) -> dict[str, Any]:
+    data, err = load_json(path)
+    if err or not isinstance(data, dict):
+        raise SystemExit(f"failed to read manifest: {err or 'not_object'}")
+    if data.get("schema_version") != MANIFEST_SCHEMA_MERKLE:
+        raise SystemExit(
+            f"manifest schema {data.get('schema_version')!r} has no Merkle tree; "
+            f"rebuild with build_evidence_manifest.py --schema {MANIFEST_SCHEMA_MERKLE}"
+        )
+    return data
+
+
+def _ac_refs(terminal_path: Path, ac_ids: list[str]) -> tuple[list[str], list[str]]:
+    data, err = load_json(terminal_path)
+    if err or not isinstance(data, dict):
+        raise SystemExit(f"failed to read terminal json: {err or 'not_object'}")
+    refs: list[str] = []
+    found: set[str] = set()
+    for item in data.get("traceability") or []:
+        if isinstance(item, dict) and item.get("ac_id") in ac_ids:
+            found.add(str(item["ac_id"]))
+            refs.extend(str(x).strip() for x in item.get("evidence_refs") or [] if str(x).strip())
+    return refs, sorted(set(ac_ids) - found)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Verify Merkle evidence manifest subtrees or diff two manifests")
+    parser.add_argument("--manifest", required=True, help="manifest path (repo-relative)")
+    parser.add_argument("--class", dest="classes", action="append", default=[], choices=MERKLE_CLASSES)
+    parser.add_argument("--ac", action="append", default=[], help="verify only this AC's evidence_refs (repeatable)")
+    parser.add_argument("--terminal", default="", help="terminal json holding traceability (required with --ac)")
+    parser.add_argument("--diff", default="", help="other manifest to diff against (repo-relative)")
+    parser.add_argument("--paranoid", action="store_true", help="ignore the sha256 cache")
+    parser.add_argument("--cache", default=HASH_CACHE_REL, help=f"sha256 cache path (default: {HASH_CACHE_REL})")
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the sha256 cache")
+    parser.add_argument("--pretty", action="store_true", help="pretty-print json")
+    args = parser.parse_args()
+
+    root = _repo_root()
+    manifest_path = resolve_ref(args.manifest, root)
+    manifest = _load_manifest(manifest_path)
+    merkle = manifest.get("merkle") if isinstance(manifest.get("merkle"), dict) else {}
+    subtrees = merkle.get("classes") if isinstance(merkle.get("classes"), dict) else {}
+    payload: dict[str, Any] = {"manifest": display_path(manifest_path, root), "root": merkle.get("root")}
+
+    if args.diff:
+        other_path = resolve_ref(args.diff, root)
+        other = _load_manifest(other_path)
+        payload["other"] = display_path(other_path, root)
+        payload["diff"] = diff_merkle(merkle, other.get("merkle") if isinstance(other.get("merkle"), dict) else {})
+        payload["status"] = "Pass" if payload["diff"]["equal"] else "Blocked"
+        print(json.dumps(payload, ensure_ascii=False, indent=2 if args.pretty else None))
+        return 0 if payload["status"] == "Pass" else 2
+
+    problems = merkle_problems(manifest)
+    leaves: dict[str, str] = {}
+    for subtree in subtrees.values():
+        if isinstance(subtree, dict) and isinstance(subtree.get("leaves"), dict):
+            leaves.update(subtree["leaves"])
+
+    if args.ac:
+        if not args.terminal:
+            raise SystemExit("--ac requires --terminal")
+        selected, unknown_acs = _ac_refs(resolve_ref(args.terminal, root), args.ac)
+        payload["ac_ids"] = args.ac
+        payload["unknown_ac_ids"] = unknown_acs
+    else:
+        classes = args.classes or list(MERKLE_CLASSES)
+        payload["classes"] = classes
+        selected = []
+        for cls in classes:
+            subtree = subtrees.get(cls)
+            if not isinstance(subtree, dict) or not isinstance(subtree.get("leaves"), dict):
+                problems.append(f"subtree_missing:{cls}")
+                continue
+            selected.extend(subtree["leaves"])
+
+    selected = list(dict.fromkeys(selected))
+    not_in_manifest = [ref for ref in selected if ref not in leaves]
+    cache = HashCache(None if args.no_cache else resolve_ref(args.cache, root))
+    digests = hash_files([resolve_ref(ref, root) for ref in selected if ref in leaves], cache, paranoid=args.paranoid)
+    cache.save()
+
+    missing_files: list[str] = []
+    mismatched: list[str] = []
+    for ref in selected:
+        if ref not in leaves:
+            continue
+        digest = digests[resolve_ref(ref, root)]
+        if digest.sha256 is None:
+            missing_files.append(ref)
+        elif merkle_leaf(ref, digest.sha256) != leaves[ref]:
+            mismatched.append(ref)
+
+    payload.update(
+        {
+            "verified_count": len(selected) - len(not_in_manifest) - len(missing_files) - len(mismatched),
+            "tree_problems": problems,
+            "not_in_manifest": not_in_manifest,
+            "missing_files": missing_files,
+            "mismatched": mismatched,
+        }
+    )
+    failed = problems or payload.get("unknown_ac_ids") or not_in_manifest or missing_files or mismatched
+    payload["status"] = "Blocked" if failed else "Pass"
+    print(json.dumps(payload, ensure_ascii=False, indent=2 if args.pretty else None))
+    return 0 if payload["status"] == "Pass" else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
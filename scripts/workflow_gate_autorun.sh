@@ -136,6 +136,7 @@ echo "[workflow-gate] build evidence manifest"
 python3 scripts/build_evidence_manifest.py \
   --terminal "$TERMINAL_PATH" \
   --output "$MANIFEST_PATH" \
+  --incremental \
   --pretty
 
 echo "[workflow-gate] validate terminal artifacts"
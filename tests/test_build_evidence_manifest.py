@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPT = ROOT / "scripts" / "build_evidence_manifest.py"
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import build_evidence_manifest  # noqa: E402
+import evidence_integrity_common  # noqa: E402
+
+
+def build(terminal: Path, output: Path, *extra: str) -> tuple[int, dict]:
+    proc = subprocess.run(
+        [
+            sys.executable,
+            str(SCRIPT),
+            "--terminal",
+            str(terminal),
+            "--output",
+            str(output),
+            "--cache",
+            str(output.with_name("sha256-cache.json")),
+            *extra,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    return proc.returncode, json.loads(proc.stdout)
+
+
+class TestBuildEvidenceManifest(unittest.TestCase):
+    def test_incremental_rehashes_only_changed_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            report, log = base / "report.md", base / "run.log"
+            report.write_text("report\n", encoding="utf-8")
+            log.write_text("log\n", encoding="utf-8")
+            terminal = base / "terminal.json"
+            terminal.write_text(json.dumps({"evidence": {"reports": [str(report)], "logs": [str(log)]}}), encoding="utf-8")
+            output = base / "manifest.json"
+
+            code, first = build(terminal, output)
+            self.assertEqual(code, 0)
+            self.assertEqual((first["summary"]["hashed_count"], first["summary"]["reused_count"]), (3, 0))
+            classes = {item["path"]: item["class"] for item in first["items"]}
+            self.assertEqual(classes, {str(report): "reports", str(log): "logs", str(terminal): "integrity"})
+
+            code, again = build(terminal, output, "--incremental")
+            self.assertEqual((again["summary"]["hashed_count"], again["summary"]["reused_count"]), (0, 3))
+            self.assertEqual(again["merkle"]["root"], first["merkle"]["root"])
+
+            log.write_text("log, longer now\n", encoding="utf-8")
+            code, changed = build(terminal, output, "--incremental")
+            self.assertEqual((changed["summary"]["hashed_count"], changed["summary"]["reused_count"]), (1, 2))
+            digests = {item["path"]: item["sha256"] for item in changed["items"]}
+            self.assertEqual(digests[str(log)], hashlib.sha256(log.read_bytes()).hexdigest())
+            self.assertNotEqual(changed["merkle"]["root"], first["merkle"]["root"])
+            self.assertEqual(changed["merkle"]["classes"]["reports"], first["merkle"]["classes"]["reports"])
+
+            # Same size and mtime but a new inode: the replaced file is re-hashed.
+            stat = report.stat()
+            replacement = base / "report.md.new"
+            replacement.write_text("REPORT\n", encoding="utf-8")
+            os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(replacement, report)
+            code, replaced = build(terminal, output, "--incremental")
+            self.assertEqual((replaced["summary"]["hashed_count"], replaced["summary"]["reused_count"]), (1, 2))
+            digests = {item["path"]: item["sha256"] for item in replaced["items"]}
+            self.assertEqual(digests[str(report)], hashlib.sha256(b"REPORT\n").hexdigest())
+
+            report.unlink()
+            code, missing = build(terminal, output, "--incremental", "--schema", "1.0")
+            self.assertEqual((code, missing["missing"]), (2, [str(report)]))
+            self.assertNotIn("merkle", missing)
+
+    def test_file_vanishing_before_hashing_is_reported_missing(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            report, log = base / "report.md", base / "run.log"
+            report.write_text("report\n", encoding="utf-8")
+            log.write_text("log\n", encoding="utf-8")
+            terminal = base / "terminal.json"
+            terminal.write_text(json.dumps({"evidence": {"reports": [str(report)], "logs": [str(log)]}}), encoding="utf-8")
+            output = base / "manifest.json"
+            real_sha256 = evidence_integrity_common.sha256_file
+
+            def vanish(path: Path) -> str:
+                if path == log:
+                    log.unlink()
+                return real_sha256(path)
+
+            argv = ["build", "--terminal", str(terminal), "--output", str(output), "--no-cache"]
+            stdout = io.StringIO()
+            with mock.patch.object(sys, "argv", argv), mock.patch.object(
+                evidence_integrity_common, "sha256_file", vanish
+            ), redirect_stdout(stdout):
+                code = build_evidence_manifest.main()
+
+            manifest = json.loads(stdout.getvalue())
+            self.assertEqual(code, 2)
+            self.assertEqual(manifest["missing"], [str(log)])
+            self.assertEqual(manifest["summary"]["missing_count"], 1)
+            self.assertEqual(sorted(item["path"] for item in manifest["items"]), [str(report), str(terminal)])
+            self.assertNotIn(str(log), manifest["merkle"]["classes"]["logs"]["leaves"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import evidence_integrity_common as common  # noqa: E402
+
+
+def raw_line(cmd: str, exit_code: int = 0) -> str:
+    return json.dumps(
+        {"cmd": cmd, "cwd": ".", "started_at": "2026-01-01T00:00:00Z", "ended_at": "2026-01-01T00:00:01Z", "exit_code": exit_code}
+    ) + "\n"
+
+
+class TestEvidenceIntegrityCommon(unittest.TestCase):
+    def test_raw_log_checkpoint_resumes_and_recovers_after_fix(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            log = Path(tmp) / "raw.jsonl"
+            checkpoints = Path(tmp) / "checkpoints"
+            log.write_text(raw_line("a") + '{"cmd": "b"}\n', encoding="utf-8")
+
+            first = common.parse_raw_command_log(log, checkpoints)
+            self.assertFalse(first["valid"])
+            self.assertTrue(first["invalid_lines"][0]["reason"].startswith("missing_keys"))
+            # A prefix with invalid lines is never checkpointed.
+            self.assertFalse(any(checkpoints.glob("*.json")))
+
+            log.write_text(raw_line("a") + raw_line("b"), encoding="utf-8")
+            fixed = common.parse_raw_command_log(log, checkpoints)
+            self.assertTrue(fixed["valid"], fixed)
+            self.assertEqual(fixed["entry_count"], 2)
+
+            with log.open("a", encoding="utf-8") as handle:
+                handle.write(raw_line("c"))
+            resumed = common.parse_raw_command_log(log, checkpoints)
+            self.assertTrue(resumed["valid"])
+            self.assertEqual(resumed["entry_count"], 3)
+            self.assertEqual(resumed["checkpoint"]["resumed_at_line"], 2)
+
+            # Rewriting or truncating the prefix re-validates from scratch and only warns.
+            log.write_text(raw_line("z"), encoding="utf-8")
+            rewritten = common.parse_raw_command_log(log, checkpoints)
+            self.assertTrue(rewritten["valid"], rewritten)
+            self.assertEqual(rewritten["warnings"], ["prefix_modified"])
+            self.assertEqual(rewritten["entry_count"], 1)
+            again = common.parse_raw_command_log(log, checkpoints)
+            self.assertEqual(again["warnings"], [])
+            self.assertEqual(again["checkpoint"]["resumed_at_line"], 1)
+
+    def test_markdown_model_sections_tables_and_code(self) -> None:
+        doc = common.parse_markdown(
+            "# Title\n"
+            "## 2. In Scope\n"
+            "- item\n"
+            "### Detail\n"
+            "| a | b |\n"
+            "|---|---|\n"
+            "| 1 | 2 |\n"
+            "```\n"
+            "## not a heading\n"
+            "- not a bullet\n"
+            "```\n"
+            "## 3. Out of Scope\n"
+        )
+        self.assertEqual([section.title for section in doc.sections], ["Title", "2. In Scope", "Detail", "3. Out of Scope"])
+        in_scope = doc.find_section(r"in scope")
+        self.assertEqual([line.kind for line in doc.body(in_scope)][:2], ["bullet", "heading"])
+        self.assertEqual(doc.sections[2].parent, 1)
+        self.assertTrue(doc.has_heading("## 3. Out of Scope"))
+        self.assertFalse(doc.has_heading("## not a heading"))
+        self.assertEqual(doc.table_rows(), [["a", "b"], ["1", "2"]])
+        self.assertFalse(doc.is_template)
+        self.assertTrue(common.parse_markdown("## <feature-name>\n").is_template)
+
+    def test_api_contracts_empty_drift_section_scans_whole_document(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "api-contracts.md"
+            path.write_text("# API\n- GET /runs drift: open\n\n## 4. Drift 变更记录\n\n## 5. Next\n", encoding="utf-8")
+            self.assertEqual(common.parse_api_contracts_doc(path)["open_lines"], ["- GET /runs drift: open"])
+
+            path.write_text("# API\n- GET /runs\n## 4. Drift\n- POST /runs [resolved]\n---\n", encoding="utf-8")
+            parsed = common.parse_api_contracts_doc(path)
+            self.assertEqual((parsed["open_count"], parsed["resolved_count"]), (0, 1))
+
+    def test_hash_cache_serves_unchanged_files_only(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            files = [base / f"f{idx}.txt" for idx in range(3)]
+            for idx, path in enumerate(files):
+                path.write_bytes(b"x" * (idx + 1))
+            missing = base / "missing.txt"
+            cache_path = base / "cache" / "sha256.json"
+
+            cache = common.HashCache(cache_path)
+            cold = common.hash_files([*files, missing], cache)
+            cache.save()
+            self.assertIsNone(cold[missing].sha256)
+            self.assertEqual(cold[files[2]].sha256, hashlib.sha256(b"xxx").hexdigest())
+            self.assertFalse(any(digest.cached for digest in cold.values()))
+
+            files[1].write_bytes(b"changed")
+            os.utime(files[1], ns=(1, 1))
+            warm = common.hash_files(files, common.HashCache(cache_path))
+            self.assertEqual([warm[path].cached for path in files], [True, False, True])
+            self.assertEqual(warm[files[1]].sha256, hashlib.sha256(b"changed").hexdigest())
+
+            paranoid = common.hash_files(files, common.HashCache(cache_path), paranoid=True)
+            self.assertFalse(any(digest.cached for digest in paranoid.values()))
+
+            # Saving prunes entries for deleted files; only files still present remain.
+            files[0].unlink()
+            cache = common.HashCache(cache_path)
+            common.hash_files(files[1:], cache, paranoid=True)
+            cache.save()
+            saved = json.loads(cache_path.read_text(encoding="utf-8"))["entries"]
+            self.assertEqual(sorted(saved), sorted(str(path) for path in files[1:]))
+
+    def test_merkle_tree_is_order_independent_and_diffs_by_class(self) -> None:
+        items = [
+            {"path": "r1.md", "sha256": "a" * 64, "class": "reports"},
+            {"path": "r2.md", "sha256": "b" * 64, "class": "reports"},
+            {"path": "run.log", "sha256": "c" * 64, "class": "logs"},
+        ]
+        merkle = common.build_merkle(items)
+        self.assertEqual(common.build_merkle(list(reversed(items)))["root"], merkle["root"])
+        manifest = {"items": items, "merkle": merkle}
+        self.assertEqual(common.merkle_problems(manifest), [])
+
+        tampered = [dict(items[0], sha256="d" * 64), *items[1:], {"path": "new.log", "sha256": "e" * 64, "class": "logs"}]
+        diff = common.diff_merkle(merkle, common.build_merkle(tampered))
+        self.assertEqual(diff["changed_classes"], ["reports", "logs"])
+        self.assertEqual((diff["modified"], diff["added"], diff["removed"]), (["r1.md"], ["new.log"], []))
+        self.assertTrue(common.diff_merkle(merkle, merkle)["equal"])
+
+        # Items that no longer match the recorded tree are structural problems.
+        self.assertEqual(common.merkle_problems({"items": tampered, "merkle": merkle}), [
+            "class_mismatch:reports",
+            "class_mismatch:logs",
+            "root_mismatch",
+        ])
+        self.assertEqual(common.merkle_problems({"items": items}), ["merkle_missing"])
+
+    def test_hash_cache_saves_merge_concurrent_writers(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            cache_path = base / "cache" / "sha256.json"
+            first, second = base / "a.txt", base / "b.txt"
+            first.write_bytes(b"a")
+            second.write_bytes(b"b")
+            # Two workers load the same (empty) cache, hash different files and save in turn.
+            worker_a, worker_b = common.HashCache(cache_path), common.HashCache(cache_path)
+            common.hash_files([first], worker_a)
+            common.hash_files([second], worker_b)
+            worker_a.save()
+            worker_b.save()
+
+            warm = common.hash_files([first, second], common.HashCache(cache_path))
+            self.assertTrue(all(digest.cached for digest in warm.values()))
+
+    def test_gate_consistency_cache_hits_until_inputs_change(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            api = root / "docs" / "product" / "v1.0.0" / "architecture" / "api-contracts.md"
+            api.parent.mkdir(parents=True)
+            api.write_text("# API\n## Drift\n- 无 open drift\n", encoding="utf-8")
+            data = {"terminal": {"status": "Pass", "reason_codes": []}}
+            cache_dir = root / "cache"
+
+            cold, hit = common.cached_gate_consistency(data, root, "v1.0.0", cache_dir)
+            self.assertFalse(hit)
+            warm, hit = common.cached_gate_consistency(data, root, "v1.0.0", cache_dir)
+            self.assertTrue(hit)
+            self.assertEqual(warm, cold)
+
+            # Any input change (terminal content, referenced doc or version) is a miss.
+            for args in (
+                ({"terminal": {"status": "Pass", "reason_codes": ["x"]}}, "v1.0.0"),
+                (data, "v1.0.1"),
+            ):
+                result, hit = common.cached_gate_consistency(args[0], root, args[1], cache_dir)
+                self.assertFalse(hit)
+                self.assertNotEqual(result["cache_key"], cold["cache_key"])
+            api.write_text("# API\n## Drift\n- GET /runs open\n", encoding="utf-8")
+            changed, hit = common.cached_gate_consistency(data, root, "v1.0.0", cache_dir)
+            self.assertFalse(hit)
+            self.assertNotEqual(changed["cache_key"], cold["cache_key"])
+            # Misses overwrite the version's slot instead of adding a file per key.
+            self.assertEqual(sorted(path.name for path in cache_dir.iterdir()), ["v1.0.0.json", "v1.0.1.json"])
+
+    def test_discover_versions_natural_order_and_aggregate(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            for name in ("v3.10.0", "v3.2.0", "v3.9.1", "notes"):
+                (root / "docs" / "product" / name).mkdir(parents=True)
+            (root / "docs" / "product" / "v9.txt").write_text("", encoding="utf-8")
+            self.assertEqual(common.discover_versions(root), ["v3.2.0", "v3.9.1", "v3.10.0"])
+            self.assertEqual(common.discover_versions(root, "v3.9*"), ["v3.9.1"])
+            self.assertEqual(common.discover_versions(root / "missing"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
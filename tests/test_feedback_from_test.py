@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPT = ROOT / "scripts" / "feedback_from_test.py"
+
+
+def session(session_id: str, feature: str, stopped_at: str, missing: list[str]) -> dict:
+    return {
+        "session_id": session_id,
+        "meta": {"version": "v9.9.9", "feature": feature, "test_type": "smoke", "tool": "api"},
+        "lifecycle": {"status": "failed", "stopped_at": stopped_at},
+        "gaps": {"missing_user_stories": missing},
+        "memory_delta": {},
+    }
+
+
+def run_batch(root: Path, *extra: str) -> tuple[int, dict]:
+    proc = subprocess.run(
+        [sys.executable, str(SCRIPT), "--sessions-dir", str(root / "sessions"), "--project-root", str(root), "--jobs", "2", *extra],
+        text=True,
+        capture_output=True,
+        check=False,
+    )
+    return proc.returncode, json.loads(proc.stdout)
+
+
+class TestFeedbackFromTest(unittest.TestCase):
+    def test_batch_latest_per_feature_skip_and_bad_sessions(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            sessions = root / "sessions"
+            sessions.mkdir()
+            for idx in range(3):
+                payload = session(f"s{idx}", "login", f"2026-01-01T00:00:0{idx}Z", [f"TC-{idx}"])
+                (sessions / f"s{idx}.json").write_text(json.dumps(payload), encoding="utf-8")
+            bad = session("bad", "pay", "2026-01-01T00:00:00Z", [])
+            bad["memory_delta"] = "oops"
+            (sessions / "bad.json").write_text(json.dumps(bad), encoding="utf-8")
+
+            rc, summary = run_batch(root)
+            self.assertEqual(rc, 2)
+            self.assertEqual([Path(item["session_file"]).name for item in summary["errors"]], ["bad.json"])
+            self.assertEqual((summary["generated"], summary["superseded"]), (1, 2))
+            result = summary["results"][0]
+            self.assertEqual(Path(result["session_file"]).name, "s2.json")
+            self.assertIn("TC-2", Path(result["feedback_md"]).read_text(encoding="utf-8"))
+
+            docs_json = Path(result["feedback_json"])
+            state_json = Path(result["state_json"])
+            self.assertEqual(docs_json.read_bytes(), state_json.read_bytes())
+            self.assertEqual(Path(result["shared_feedback_json"]).read_bytes(), docs_json.read_bytes())
+            self.assertNotEqual(docs_json.stat().st_ino, state_json.stat().st_ino)
+
+            (sessions / "bad.json").unlink()
+            rc, summary = run_batch(root)
+            self.assertEqual((rc, summary["generated"], summary["skipped"]), (0, 0, 1))
+
+            # Another tool rewriting an output forces regeneration; the docs copy is untouched by it.
+            state_json.write_text("{}\n", encoding="utf-8")
+            rc, summary = run_batch(root)
+            self.assertEqual((rc, summary["generated"]), (0, 1))
+            self.assertEqual(state_json.read_bytes(), docs_json.read_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import memory_eviction  # noqa: E402
+
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+def stamp(days_ago: float) -> str:
+    return (NOW - timedelta(days=days_ago)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class TestMemoryEviction(unittest.TestCase):
+    def test_read_limits_nested_keys_and_defaults(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Path(tmp) / "persistence.yaml"
+            config.write_text(
+                "memory:\n"
+                "  decisions:\n"
+                "    max_count: 3  # keep it small\n"
+                "  test_learnings:\n"
+                "    max_records: many\n"
+                "session:\n"
+                "  max_history_count: 2\n",
+                encoding="utf-8",
+            )
+            limits = memory_eviction.read_limits(config)
+            self.assertEqual(limits["memory.decisions.max_count"], 3)
+            self.assertEqual(limits["session.max_history_count"], 2)
+            # Unparseable values keep the default.
+            self.assertEqual(limits["memory.test_learnings.max_records"], 300)
+            self.assertEqual(memory_eviction.read_limits(Path(tmp) / "missing.yaml"), memory_eviction.DEFAULT_LIMITS)
+
+    def test_select_evictions_orders_by_score_then_age(self) -> None:
+        entries = [
+            {"id": "old-low", "confidence": 0.1, "updated_at": stamp(200)},
+            {"id": "fresh-high", "confidence": 0.9, "updated_at": stamp(1)},
+            "not-a-dict",
+            {"id": "tie-a"},
+            {"id": "tie-b"},
+            {"id": "used", "confidence": 0.1, "updated_at": stamp(200), "usage_count": 50},
+        ]
+        self.assertEqual(memory_eviction.select_evictions(entries, 6, NOW), [])
+        evicted = memory_eviction.select_evictions(entries, 3, NOW)
+        # Non-dict entries go first, then the lowest score; equal scores evict the older position.
+        self.assertEqual([idx for idx, _ in evicted], [0, 2, 3])
+        self.assertEqual(evicted[1][1], -1.0)
+
+    def test_enforce_archives_overflow_and_round_trips(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            memory_dir = Path(tmp)
+            decisions = [{"id": f"D{idx}", "confidence": idx / 10, "updated_at": stamp(idx)} for idx in range(5)]
+            (memory_dir / "decisions.json").write_text(json.dumps({"decisions": decisions}), encoding="utf-8")
+            limits = {**memory_eviction.DEFAULT_LIMITS, "memory.decisions.max_count": 3}
+
+            dry = memory_eviction.enforce_limits(memory_dir, limits, ["decisions"], dry_run=True, now=NOW)
+            self.assertEqual([item["id"] for item in dry[0]["would_evict"]], ["D0", "D1"])
+            self.assertFalse((memory_dir / memory_eviction.ARCHIVE_DIRNAME).exists())
+
+            report = memory_eviction.enforce_limits(memory_dir, limits, ["decisions"], now=NOW)
+            self.assertEqual((report[0]["before"], report[0]["evicted"], report[0]["after"]), (5, 2, 3))
+            kept = json.loads((memory_dir / "decisions.json").read_text(encoding="utf-8"))["decisions"]
+            self.assertEqual([item["id"] for item in kept], ["D2", "D3", "D4"])
+
+            # A second overflow appends another gzip member to the same segment.
+            data = {"decisions": kept + [{"id": "D5", "confidence": 0.0, "updated_at": stamp(300)}]}
+            (memory_dir / "decisions.json").write_text(json.dumps(data), encoding="utf-8")
+            memory_eviction.enforce_limits(memory_dir, limits, ["decisions"], now=NOW)
+            archived = list(memory_eviction.iter_archive(memory_dir, "decisions"))
+            self.assertEqual([record["entry"]["id"] for record in archived], ["D0", "D1", "D5"])
+            self.assertEqual({record["section"] for record in archived}, {"decisions"})
+            self.assertEqual(len(list((memory_dir / memory_eviction.ARCHIVE_DIRNAME).iterdir())), 1)
+
+    def test_enforce_skips_when_store_changes_concurrently(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            memory_dir = Path(tmp)
+            path = memory_dir / "decisions.json"
+            original = {"decisions": [{"id": f"D{idx}"} for idx in range(4)]}
+            path.write_text(json.dumps(original), encoding="utf-8")
+            limits = {**memory_eviction.DEFAULT_LIMITS, "memory.decisions.max_count": 2}
+            concurrent = {"decisions": [{"id": f"W{idx}"} for idx in range(5)]}
+            real_select = memory_eviction.select_evictions
+
+            def select_then_write(entries: list, limit: int, now: datetime) -> list:
+                # Another writer replaces the store between the read and the write-back.
+                path.write_text(json.dumps(concurrent), encoding="utf-8")
+                return real_select(entries, limit, now)
+
+            with mock.patch.object(memory_eviction, "select_evictions", select_then_write):
+                report = memory_eviction.enforce_limits(memory_dir, limits, ["decisions"], now=NOW)
+
+            self.assertEqual(report[0]["skipped"], "store changed concurrently")
+            self.assertEqual(report[0]["evicted"], 0)
+            self.assertEqual(json.loads(path.read_text(encoding="utf-8")), concurrent)
+            self.assertEqual(list(memory_eviction.iter_archive(memory_dir, "decisions")), [])
+
+    def test_evict_sections_trims_loaded_store_under_writer_lock(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            memory_dir = Path(tmp)
+            limits = {**memory_eviction.DEFAULT_LIMITS, "session.max_history_count": 2}
+            data = {
+                "signatures": [{"signature_id": "S1"}],
+                "sessions": [{"session_id": f"s{idx}", "stopped_at": stamp(idx)} for idx in range(4)],
+            }
+            lock = memory_eviction.lock_store(memory_dir)
+            try:
+                report = memory_eviction.evict_sections(memory_dir, "test-learnings.json", data, limits, ["sessions"], now=NOW)
+                # The CLI path waits for the writer's lock instead of racing its write.
+                proc = subprocess.Popen(
+                    [sys.executable, str(ROOT / "scripts" / "memory_eviction.py"), "--memory-dir", tmp, "--dry-run"],
+                    stdout=subprocess.PIPE,
+                    text=True,
+                )
+                with self.assertRaises(subprocess.TimeoutExpired):
+                    proc.wait(timeout=0.5)
+            finally:
+                lock.close()
+            proc.communicate(timeout=30)
+
+            self.assertEqual([(row["section"], row["evicted"]) for row in report], [("sessions", 2)])
+            self.assertEqual([item["session_id"] for item in data["sessions"]], ["s0", "s1"])
+            self.assertIn("updated_at", data)
+            archived = list(memory_eviction.iter_archive(memory_dir, "test-learnings"))
+            self.assertEqual([record["entry"]["session_id"] for record in archived], ["s2", "s3"])
+
+            # Within the limit nothing is archived and the dict is left alone.
+            data.pop("updated_at")
+            report = memory_eviction.evict_sections(memory_dir, "test-learnings.json", data, limits, None, now=NOW)
+            self.assertEqual(sum(row["evicted"] for row in report), 0)
+            self.assertNotIn("updated_at", data)
+            self.assertEqual(len(list(memory_eviction.iter_archive(memory_dir, "test-learnings"))), 2)
+
+    def test_memory_migration_enforces_decisions_limit(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "config").mkdir()
+            (root / "config" / "persistence.yaml").write_text("memory:\n  decisions:\n    max_count: 2\n", encoding="utf-8")
+            memory_dir = root / ".ptk" / "memory"
+            memory_dir.mkdir(parents=True)
+            decisions = [{"id": f"D{idx}", "decision": f"choice {idx}"} for idx in range(4)]
+            (memory_dir / "decisions.json").write_text(json.dumps({"decisions": decisions}), encoding="utf-8")
+
+            proc = subprocess.run(
+                [sys.executable, str(ROOT / "scripts" / "migrate_memory_v3.py"), "--root", str(root)],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            payload = json.loads(proc.stdout)
+            self.assertEqual(payload["eviction"][0]["evicted"], 2)
+            kept = json.loads((memory_dir / "decisions.json").read_text(encoding="utf-8"))["decisions"]
+            self.assertEqual(len(kept), 2)
+            self.assertEqual(len(list(memory_eviction.iter_archive(memory_dir, "decisions"))), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
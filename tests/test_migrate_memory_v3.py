@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import migrate_memory_v3 as migrate  # noqa: E402
+
+
+def learnings() -> dict:
+    return {
+        "version": "2.0",
+        "threshold": 123.5e10,
+        "ratio": -0.25e-3,
+        "signatures": [
+            {"signature_id": f"SIG-{idx}", "first_seen": "2026-01-01T00:00:00Z", "count": 1234567.125 * idx}
+            for idx in range(12)
+        ],
+        "playbooks": [{"playbook_id": "PB-1", "updated_at": "2026-01-02T00:00:00Z", "success_count": 3}],
+        "sessions": [],
+        "pitfalls": [1.5e300, 42, "note"],
+    }
+
+
+def without_updated_at(data: dict) -> dict:
+    return {key: value for key, value in data.items() if key != "updated_at"}
+
+
+class TestMigrateMemoryV3(unittest.TestCase):
+    def test_streamed_migration_matches_in_memory_with_tiny_chunks(self) -> None:
+        # Literal exponents so tiny chunks split numbers after "123." or inside "e-3".
+        text = json.dumps(learnings(), indent=2).replace("1235000000000.0", "123.5e10").replace("-0.00025", "-0.25e-3")
+        for chunk_chars in range(3, 16):
+            with self.subTest(chunk_chars=chunk_chars), tempfile.TemporaryDirectory() as tmp:
+                in_memory = Path(tmp) / "a" / "test-learnings.json"
+                streamed = Path(tmp) / "b" / "test-learnings.json"
+                for path in (in_memory, streamed):
+                    path.parent.mkdir()
+                    path.write_text(text, encoding="utf-8")
+
+                plain = migrate.migrate_file(in_memory, dry_run=False)
+                with mock.patch.object(migrate, "STREAM_CHUNK_CHARS", chunk_chars):
+                    chunked = migrate.migrate_file(streamed, dry_run=False, stream=True, sidecar=True)
+
+                self.assertEqual((chunked.entries_touched, chunked.entries_changed), (plain.entries_touched, plain.entries_changed))
+                self.assertEqual(chunked.field_counts, plain.field_counts)
+                expected = json.loads(in_memory.read_text(encoding="utf-8"))
+                actual = json.loads(streamed.read_text(encoding="utf-8"))
+                self.assertEqual(without_updated_at(actual), without_updated_at(expected))
+                self.assertEqual((actual["threshold"], actual["ratio"]), (123.5e10, -0.25e-3))
+
+                records = [json.loads(line) for line in chunked.sidecar.read_text(encoding="utf-8").splitlines()]
+                self.assertEqual(len(records), 1 + 12 + 1)
+    def test_dry_run_reports_entry_changes_without_writing(self) -> None:
+        complete = {
+            "id": "D1",
+            "memory_id": "D1",
+            "type": "decision",
+            "source_session_id": "s1",
+            "source": "remember",
+            "created_at": "2026-01-01T00:00:00Z",
+            "updated_at": "2026-01-01T00:00:00Z",
+            "confidence": 0.9,
+            "tags": [],
+            "evidence_ref": [],
+        }
+        original = {"decisions": [complete, {"id": "D2", "decided_at": "2026-02-01T00:00:00Z"}]}
+        transform = migrate.migrate_decisions(original)
+        # Pure transform: the input is untouched and only D2 changes.
+        self.assertEqual(original["decisions"][1], {"id": "D2", "decided_at": "2026-02-01T00:00:00Z"})
+        self.assertEqual([(c.section, c.index, c.memory_id) for c in transform.entry_changes], [("decisions", 1, "D2")])
+        self.assertIn("created_at", transform.entry_changes[0].fields)
+        self.assertEqual(transform.data["decisions"][1]["created_at"], "2026-02-01T00:00:00Z")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "decisions.json"
+            text = json.dumps(original)
+            path.write_text(text, encoding="utf-8")
+            dry = migrate.migrate_file(path, dry_run=True)
+            self.assertEqual((dry.changed, dry.note, dry.entries_touched, dry.entries_changed), (True, "would change", 2, 1))
+            self.assertEqual(path.read_text(encoding="utf-8"), text)
+            self.assertEqual(dry.field_counts["memory_id"], 1)
+
+            real = migrate.migrate_file(path, dry_run=False)
+            self.assertTrue(real.changed)
+            migrated = json.loads(path.read_text(encoding="utf-8"))
+            self.assertEqual(migrated["schema_version"], "3.0")
+            self.assertEqual(list(Path(tmp).glob(".*.tmp")), [])
+            self.assertFalse(migrate.migrate_file(path, dry_run=False).changed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
 import unittest
 from pathlib import Path
+from unittest import mock
 
 import sys
 
@@ -29,6 +35,25 @@ class TestPtkCli(unittest.TestCase):
         self.assertEqual(r2, "high")
         self.assertEqual(t2, "out-of-scope")
 
+    def test_scope_matcher_reports_overlapping_acs(self) -> None:
+        automaton = ptk_cli.KeywordAutomaton(["he", "she", "his", "hers"])
+        self.assertEqual(sorted(automaton.find_all("ushers")), ["he", "hers", "she"])
+
+        ac_scope = {
+            "acceptance_criteria": [
+                {"id": "AC-1", "description": "Status board shows workflow state"},
+                {"id": "AC-2", "description": "Report export as markdown"},
+            ]
+        }
+        matcher = ptk_cli.ScopeMatcher(ac_scope)
+        in_scope = matcher.classify("workflow board")
+        self.assertEqual((in_scope.deviation_type, in_scope.matched_ac_ids), ("in-scope", ["AC-1"]))
+        risky = matcher.classify("rewrite report auth")
+        self.assertEqual(risky.risk, "high")
+        self.assertEqual(risky.matched_ac_ids, ["AC-2"])
+        self.assertEqual(sorted(risky.risk_keywords), ["auth", "rewrite"])
+        self.assertEqual(ptk_cli.classify_proposal("dark mode", ac_scope, matcher), ("enhancement-proposal", "low"))
+
     def test_human_summary_hides_machine_fields(self) -> None:
         machine = {
             "run_id": "run-1",
@@ -69,6 +94,349 @@ class TestPtkCli(unittest.TestCase):
         self.assertIn("confidence", notice or "")
         self.assertTrue(is_error)
 
+    def test_run_index_latest_filters_and_rebuild(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            runs_dir = Path(tmp) / "runs"
+            for idx, (mode, status) in enumerate((("normal", "completed"), ("strict", "blocked"), ("debug", "completed"))):
+                run_id = f"run-{idx}"
+                (runs_dir / run_id).mkdir(parents=True)
+                state = {
+                    "run_id": run_id,
+                    "workflow": "workflow",
+                    "mode": mode,
+                    "status": status,
+                    "started_at": f"2026-01-0{idx + 1}T00:00:00+00:00",
+                }
+                ptk_cli.write_json(runs_dir / run_id / "state.json", state)
+                ptk_cli.run_index_record(runs_dir, state, sort_ts=float(idx))
+
+            self.assertEqual(ptk_cli.newest_run_id(runs_dir), "run-2")
+            self.assertEqual(ptk_cli.newest_run_id_except(runs_dir, "run-2"), "run-1")
+            blocked = ptk_cli.run_index_query(runs_dir, status="blocked")
+            self.assertEqual([row["run_id"] for row in blocked], ["run-1"])
+            window = ptk_cli.run_index_query(runs_dir, since="2026-01-02", until="2026-01-03")
+            self.assertEqual([row["run_id"] for row in window], ["run-1"])
+
+            # Stale rows are dropped lazily when their directory disappears.
+            (runs_dir / "run-2" / "state.json").unlink()
+            (runs_dir / "run-2").rmdir()
+            self.assertEqual(ptk_cli.newest_run_id(runs_dir), "run-1")
+
+            ptk_cli.run_index_path(runs_dir).unlink()
+            self.assertEqual(ptk_cli.run_index_rebuild(runs_dir), 2)
+            self.assertEqual(len(ptk_cli.run_index_query(runs_dir, limit=0)), 2)
+
+    def test_warm_cache_hands_out_independent_copies(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "index.json"
+            ptk_cli.write_json(path, {"stories": {}})
+            previous = ptk_cli._WARM_CACHE
+            ptk_cli._WARM_CACHE = {}
+            try:
+                first = ptk_cli.read_json(path, {})
+                first["stories"]["mutated"] = True
+                second = ptk_cli.read_json(path, {})
+            finally:
+                ptk_cli._WARM_CACHE = previous
+            self.assertEqual(second, {"stories": {}})
+
+    def test_run_index_record_seeds_existing_runs(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            runs_dir = Path(tmp) / "runs"
+            for run_id in ("old-1", "old-2", "new"):
+                (runs_dir / run_id).mkdir(parents=True)
+                ptk_cli.write_json(runs_dir / run_id / "state.json", {"run_id": run_id, "status": "completed"})
+
+            ptk_cli.run_index_record(runs_dir, {"run_id": "new", "status": "completed"})
+
+            rows = ptk_cli.run_index_query(runs_dir, limit=0)
+            self.assertEqual(sorted(row["run_id"] for row in rows), ["new", "old-1", "old-2"])
+            self.assertEqual(rows[0]["run_id"], "new")
+
+    def test_scope_memory_store_append_lookup_and_compact(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp) / "scope"
+            ptk_cli.write_json(base / "deviations.json", [{"id": "DEV-legacy-1", "run_id": "legacy"}])
+            store = ptk_cli.ScopeMemoryStore(base)
+
+            def writer(worker: int) -> None:
+                for idx in range(10):
+                    run_id = f"run-{worker}-{idx}"
+                    deviation = {"id": f"DEV-{run_id}-1", "run_id": run_id}
+                    confirmation = {"id": f"CONF-{run_id}-1", "run_id": run_id, "deviation_id": deviation["id"]}
+                    store.append([deviation], [confirmation])
+
+            threads = [threading.Thread(target=writer, args=(worker,)) for worker in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(len(list(store.iter_entries("deviations"))), 41)
+            # Appends leave the views alone; refresh_views rebuilds only stale kinds.
+            self.assertFalse((base / "confirmations.json").exists())
+            self.assertEqual(store.refresh_views(), {"deviations": 41, "confirmations": 40})
+            self.assertEqual(store.refresh_views(), {})
+            store.append([{"id": "DEV-extra-1", "run_id": "extra"}], [])
+            self.assertEqual(len(ptk_cli.read_json(base / "deviations.json", [])), 41)
+            self.assertEqual(store.refresh_views(), {"deviations": 42})
+            self.assertEqual(ptk_cli.read_json(base / "deviations.json", [])[-1]["id"], "DEV-extra-1")
+
+            # A torn trailing line from an interrupted writer does not swallow the next entry.
+            segment = sorted(store.segments_dir.glob("deviations-*.jsonl"))[-1]
+            with segment.open("ab") as handle:
+                handle.write(b'{"id": "DEV-torn')
+            store.append([{"id": "DEV-after-torn", "run_id": "torn"}], [])
+            self.assertEqual([item["id"] for item in store.iter_entries("deviations")][-1], "DEV-after-torn")
+            self.assertEqual(store.lookup(run_id="torn")["deviations"][0]["id"], "DEV-after-torn")
+            found = store.lookup(deviation_id="DEV-run-2-3-1")
+            self.assertEqual([item["id"] for item in found["deviations"]], ["DEV-run-2-3-1"])
+            self.assertEqual([item["id"] for item in found["confirmations"]], ["CONF-run-2-3-1"])
+            self.assertEqual(store.lookup(run_id="legacy")["deviations"][0]["id"], "DEV-legacy-1")
+
+            counts = store.compact()
+            self.assertEqual(counts, {"deviations": 43, "confirmations": 40})
+            self.assertEqual(len(ptk_cli.read_json(base / "confirmations.json", [])), 40)
+
+            store.index_path.unlink()
+            self.assertEqual(len(store.lookup(run_id="run-0-0")["confirmations"]), 1)
+
+    def test_memory_index_query_filters_rank_and_sync(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            memory_dir = Path(tmp) / "memory"
+            decisions = [
+                {"memory_id": "D1", "type": "decision", "title": "采用 SQLite 索引", "tags": ["arch"], "confidence": 0.9,
+                 "created_at": "2026-01-01T00:00:00Z", "updated_at": "2026-01-01T00:00:00Z"},
+                {"memory_id": "D2", "type": "decision", "title": "flaky selector retry", "tags": ["ui"], "confidence": 0.5,
+                 "created_at": "2026-02-01T00:00:00Z", "updated_at": "2026-03-01T00:00:00Z"},
+            ]
+            signatures = [
+                {"memory_id": "S1", "type": "test_signature", "signature": "flaky selector timeout", "tags": ["ui", "test-memory"],
+                 "confidence": 0.7, "created_at": "2026-02-01T00:00:00Z", "updated_at": "2026-02-01T00:00:00Z"},
+            ]
+            ptk_cli.write_json(memory_dir / "decisions.json", {"decisions": decisions})
+            ptk_cli.write_json(memory_dir / "test-learnings.json", {"signatures": signatures, "sessions": []})
+
+            self.assertEqual(
+                ptk_cli.memory_index_sync(memory_dir), {"decisions.json": 2, "test-learnings.json": 1}
+            )
+            self.assertEqual(ptk_cli.memory_index_sync(memory_dir), {})
+
+            ids = lambda rows: [row["memory_id"] for row in rows]  # noqa: E731
+            self.assertEqual(ids(ptk_cli.memory_index_query(memory_dir, text="SQLite 索引")), ["D1"])
+            self.assertEqual(ids(ptk_cli.memory_index_query(memory_dir, text="selector timeout")), ["S1"])
+            self.assertEqual(ids(ptk_cli.memory_index_query(memory_dir, tags=["ui"], types=["decision"])), ["D2"])
+            self.assertEqual(ids(ptk_cli.memory_index_query(memory_dir, tags=["ui"])), ["S1", "D2"])
+            window = ptk_cli.memory_index_query(memory_dir, since="2026-02-15", until="2026-04-01")
+            self.assertEqual(ids(window), ["D2"])
+            created = ptk_cli.memory_index_query(memory_dir, since="2026-02-01", time_field="created_at")
+            self.assertEqual(sorted(ids(created)), ["D2", "S1"])
+            self.assertEqual(ids(ptk_cli.memory_index_query(memory_dir, limit=1)), ["D1"])
+
+            # Appends and removals are picked up on the next query without a manual reindex.
+            decisions = decisions[1:] + [{"memory_id": "D3", "type": "decision", "title": "zebra rollout", "tags": []}]
+            ptk_cli.write_json(memory_dir / "decisions.json", {"decisions": decisions})
+            os.utime(memory_dir / "decisions.json", ns=(1, 1))
+            self.assertEqual(ids(ptk_cli.memory_index_query(memory_dir, text="zebra")), ["D3"])
+            self.assertEqual(ptk_cli.memory_index_query(memory_dir, tags=["arch"]), [])
+
+            ptk_cli.memory_index_path(memory_dir).unlink()
+            self.assertEqual(len(ptk_cli.memory_index_query(memory_dir, limit=0)), 3)
+
+    def test_memory_index_sync_skips_unchanged_sections(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            memory_dir = Path(tmp) / "memory"
+            signatures = [{"memory_id": f"S{idx}", "signature": f"timeout {idx}"} for idx in range(3)]
+            sessions = [{"session_id": "s1"}]
+            store = memory_dir / "test-learnings.json"
+            ptk_cli.write_json(store, {"signatures": signatures, "sessions": sessions})
+            self.assertEqual(ptk_cli.memory_index_sync(memory_dir), {"test-learnings.json": 4})
+
+            def indexed() -> dict[str, tuple[int, int]]:
+                conn, _ = ptk_cli._open_memory_index(memory_dir)
+                try:
+                    return {row[2]: (row[0], row[1]) for row in conn.execute("SELECT rowid, position, body FROM entries")}
+                finally:
+                    conn.close()
+
+            before = indexed()
+            # A writer appends a session and bumps updated_at; signatures are left alone.
+            sessions.append({"session_id": "s2"})
+            ptk_cli.write_json(store, {"signatures": signatures, "sessions": sessions, "updated_at": "now"})
+            os.utime(store, ns=(1, 1))
+            with mock.patch.object(ptk_cli, "_memory_index_section", wraps=ptk_cli._memory_index_section) as diffed:
+                self.assertEqual(ptk_cli.memory_index_sync(memory_dir), {"test-learnings.json": 5})
+            self.assertEqual([call.args[2] for call in diffed.call_args_list], ["sessions"])
+            after = indexed()
+            self.assertEqual({body: after[body] for body in before}, before)
+
+            # Evicting the head of a section shifts positions without re-inserting the survivors.
+            ptk_cli.write_json(store, {"signatures": signatures[1:], "sessions": sessions})
+            os.utime(store, ns=(2, 2))
+            self.assertEqual(ptk_cli.memory_index_sync(memory_dir), {"test-learnings.json": 4})
+            after = indexed()
+            kept = [ptk_cli._MEMORY_ENCODER.encode(entry) for entry in signatures[1:]]
+            self.assertEqual([after[body] for body in kept], [(before[body][0], idx) for idx, body in enumerate(kept)])
+            self.assertEqual(ptk_cli.memory_index_query(memory_dir, text="timeout 0"), [])
+
+    def test_main_exits_quietly_when_stdout_reader_goes_away(self) -> None:
+        script = (
+            "import sys\n"
+            f"sys.path.insert(0, {str(ROOT / 'scripts')!r})\n"
+            "import ptk_cli\n"
+            "ptk_cli.command_runs = lambda args, ctx: print('x' * 1048576) or 0\n"
+            "raise SystemExit(ptk_cli.main(['ptk', 'runs', 'list']))\n"
+        )
+        proc = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        proc.stdout.close()
+        stderr = proc.stderr.read().decode("utf-8")
+        proc.stderr.close()
+        self.assertEqual(proc.wait(timeout=30), 141)
+        self.assertEqual(stderr, "")
+
+    def test_tail_lines_and_tailer_handle_partial_and_truncation(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "events.jsonl"
+            path.write_text("".join(f'{{"n": {idx}}}\n' for idx in range(50)) + '{"n": 50', encoding="utf-8")
+            lines, offset = ptk_cli.read_tail_lines(path, 3, block_size=16)
+            self.assertEqual(lines, ['{"n": 47}', '{"n": 48}', '{"n": 49}'])
+
+            tailer = ptk_cli.JsonlTailer(path, offset)
+            self.assertEqual(tailer.poll(), [])
+            with path.open("a", encoding="utf-8") as handle:
+                handle.write('}\n{"n": 51}\n')
+            self.assertEqual(tailer.poll(), ['{"n": 50}', '{"n": 51}'])
+
+            path.write_text('{"n": 0}\n', encoding="utf-8")
+            self.assertEqual(tailer.poll(), ['{"n": 0}'])
+
+    def test_create_ac_scope_uses_content_cache(self) -> None:
+        source_story = ROOT / "docs" / "product" / "v3.7.0" / "user-story" / "ptk-cli-scope-guard.md"
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx = ptk_cli.Context(root=Path(tmp), version="v0.0.1")
+            ctx.user_story_path.parent.mkdir(parents=True)
+            shutil.copy(source_story, ctx.user_story_path)
+
+            first = ptk_cli.create_ac_scope(ctx)
+            self.assertEqual(first.cache["source"], "parse")
+            self.assertTrue(first.cache["ac_scope_rewritten"])
+            self.assertEqual(first.scope, ptk_cli.parse_acceptance_criteria(ctx.user_story_path))
+
+            second = ptk_cli.create_ac_scope(ctx)
+            self.assertEqual(second.cache["source"], "stat")
+            self.assertFalse(second.cache["ac_scope_rewritten"])
+
+            stat = ctx.user_story_path.stat()
+            os.utime(ctx.user_story_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            third = ptk_cli.create_ac_scope(ctx)
+            self.assertEqual(third.cache["source"], "hash")
+            self.assertFalse(third.cache["ac_scope_rewritten"])
+
+            with ctx.user_story_path.open("a", encoding="utf-8") as handle:
+                handle.write("- [ ] US9999-AC01 新增：cache invalidation check\n")
+            fourth = ptk_cli.create_ac_scope(ctx)
+            self.assertFalse(fourth.cache["hit"])
+            self.assertTrue(fourth.cache["ac_scope_rewritten"])
+            self.assertTrue(any(item["id"] == "US9999-AC01" for item in fourth.scope["acceptance_criteria"]))
+
+    def test_run_event_sink_writes_log_once_and_state_references_it(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "events.jsonl"
+            sink = ptk_cli.RunEventSink(path, durability="end-of-run")
+            sink.emit({"event": "run_started"})
+            sink.emit({"event": "run_completed"})
+            sink.close()
+            self.assertEqual(len(path.read_text(encoding="utf-8").splitlines()), 2)
+
+            ctx = ptk_cli.Context(root=Path(tmp), version="v0.0.1")
+            run_dir = ctx.runs_dir / "run-1"
+            run_dir.mkdir(parents=True)
+            path.rename(run_dir / "events.jsonl")
+            state = {"run_id": "run-1", "event_log": {"path": "x", "count": 2}}
+            self.assertEqual([e["event"] for e in ptk_cli.load_run_events(ctx, "run-1", state)], ["run_started", "run_completed"])
+            self.assertEqual(ptk_cli.run_event_count(ctx, "run-1", state), 2)
+            legacy = {"events": [{"event": "run_started"}]}
+            self.assertEqual(ptk_cli.load_run_events(ctx, "run-1", legacy), legacy["events"])
+
+            discarded = ptk_cli.RunEventSink(Path(tmp) / "aborted.jsonl", durability="per-event")
+            discarded.emit({"event": "run_started"})
+            discarded.discard()
+            self.assertFalse((Path(tmp) / "aborted.jsonl").exists())
+            with self.assertRaises(ValueError):
+                ptk_cli.RunEventSink(path, durability="sometimes")
+
+    def test_doctor_checks_select_dependencies_and_fail_fast(self) -> None:
+        selected = ptk_cli.select_doctor_checks(["machine_events_integrity"])
+        self.assertEqual([c.name for c in selected], ["events_integrity", "machine_events_integrity"])
+        with self.assertRaises(ValueError):
+            ptk_cli.select_doctor_checks(["nope"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx = ptk_cli.Context(root=Path(tmp), version="v0.0.1")
+            results, skipped = ptk_cli.run_doctor_checks(ctx, ptk_cli.select_doctor_checks([]))
+            self.assertEqual(skipped, [])
+            self.assertEqual(results["user_story_exists"][0]["status"], "FAIL")
+            self.assertEqual(results["machine_events_integrity"], [])
+            self.assertTrue(all("duration_ms" in item for items in results.values() for item in items))
+
+            chained = [
+                ptk_cli.DoctorCheck("user_story_exists", lambda c: [], ptk_cli._doctor_user_story),
+                ptk_cli.DoctorCheck("after", lambda c: [], ptk_cli._doctor_ac_scope, depends_on=("user_story_exists",)),
+            ]
+            results, skipped = ptk_cli.run_doctor_checks(ctx, chained, fail_fast=True)
+            self.assertEqual(list(results), ["user_story_exists"])
+            self.assertEqual(skipped, ["after"])
+
+            # Independent checks queued behind a busy worker are not started after a FAIL.
+            started: list[str] = []
+
+            def fake(name: str, status: str) -> ptk_cli.DoctorCheck:
+                def run(c: ptk_cli.Context, files: ptk_cli.DoctorFiles, deps: dict) -> list[dict]:
+                    started.append(name)
+                    return [ptk_cli._check(name, status, "")]
+
+                return ptk_cli.DoctorCheck(name, lambda c: [], run)
+
+            independent = [fake("first", "FAIL"), fake("second", "PASS"), fake("third", "PASS")]
+            results, skipped = ptk_cli.run_doctor_checks(ctx, independent, fail_fast=True, max_workers=1)
+            self.assertEqual(started, ["first"])
+            self.assertEqual(skipped, ["second", "third"])
+
+    def test_doctor_cache_reuses_verdicts_until_inputs_change(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx = ptk_cli.Context(root=Path(tmp), version="v0.0.1")
+            checks = ptk_cli.select_doctor_checks(["ac_scope_schema", "machine_events_integrity"])
+            cache_path = ctx.cache_dir / "doctor.json"
+
+            def run_once() -> tuple[dict, ptk_cli.DoctorCache]:
+                cache = ptk_cli.DoctorCache(cache_path)
+                results, _ = ptk_cli.run_doctor_checks(ctx, checks, cache=cache)
+                cache.save()
+                return results, cache
+
+            _, cold = run_once()
+            self.assertEqual(cold.stats()["hits"], 0)
+            results, warm = run_once()
+            self.assertEqual(warm.stats()["hit_ratio"], 1.0)
+            self.assertTrue(results["ac_scope_schema"][0]["cached"])
+
+            ac_scope = ctx.execution_dir / "ac_scope.json"
+            ac_scope.parent.mkdir(parents=True)
+            ac_scope.write_text("{}", encoding="utf-8")
+            results, changed = run_once()
+            self.assertFalse(results["ac_scope_schema"][0]["cached"])
+            self.assertEqual(results["ac_scope_schema"][0]["status"], "FAIL")
+            self.assertEqual(changed.stats()["misses"], 1)
+
+            # A check without declared inputs must not share its verdict across versions.
+            versioned = [ptk_cli.DoctorCheck("versioned", lambda c: [], lambda c, f, d: [ptk_cli._check("versioned", "PASS", c.version)])]
+            cache = ptk_cli.DoctorCache(cache_path)
+            ptk_cli.run_doctor_checks(ctx, versioned, cache=cache)
+            other = ptk_cli.Context(root=Path(tmp), version="v0.0.2")
+            results, _ = ptk_cli.run_doctor_checks(other, versioned, cache=cache)
+            self.assertEqual(results["versioned"][0]["detail"], "v0.0.2")
+            self.assertEqual(cache.stats()["hits"], 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import evidence_integrity_common as common  # noqa: E402
+import run_command_with_evidence as rcwe  # noqa: E402
+
+
+def read_log(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestRunCommandWithEvidence(unittest.TestCase):
+    def test_batch_bad_cwd_fails_entry_and_skips_dependents(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            log = base / "raw.jsonl"
+            outputs = base / "out"
+            outputs.mkdir()
+            commands = [
+                {"id": "bad", "cmd": "echo never", "cwd": "missing-dir", "timeout": None, "tags": [], "depends_on": []},
+                {"id": "after-bad", "cmd": "echo dep", "cwd": None, "timeout": None, "tags": [], "depends_on": ["bad"]},
+                {"id": "ok", "cmd": "echo fine", "cwd": None, "timeout": None, "tags": [], "depends_on": []},
+            ]
+            summary = rcwe.run_batch(commands, log, outputs, base, jobs=2, capture="interleaved")
+
+            states = {item["id"]: item["status"] for item in summary["commands"]}
+            self.assertEqual(states, {"bad": "failed", "after-bad": "skipped", "ok": "passed"})
+            self.assertEqual(summary["status"], "Blocked")
+            bad = next(item for item in summary["commands"] if item["id"] == "bad")
+            self.assertIn("FileNotFoundError", bad["error"])
+
+            records = {record["batch_id"]: record for record in read_log(log)}
+            self.assertEqual(set(records), {"bad", "ok"})
+            self.assertEqual(records["bad"]["exit_code"], -1)
+            # Only the command that actually ran left an output file behind.
+            self.assertEqual(len(list(outputs.glob("*.log"))), 1)
+
+    def test_load_batch_validates_and_batch_respects_dependencies(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            manifest = base / "batch.json"
+            for commands, message in (
+                ([{"id": "a", "cmd": "true"}, {"id": "a", "cmd": "true"}], "duplicate"),
+                ([{"id": "a", "cmd": "true", "depends_on": "zzz"}], "unknown"),
+                ([{"id": "a", "cmd": "true", "depends_on": "b"}, {"id": "b", "cmd": "true", "depends_on": "a"}], "cycle"),
+                ([{"id": "a"}], "cmd is required"),
+                ([{"id": "e", "cmd": "sleep 3", "timeout": "1"}], "timeout"),
+                ([{"id": "e", "cmd": "true", "timeout": 0}], "timeout"),
+                ([{"id": "e", "cmd": "true", "timeout": True}], "timeout"),
+                ([{"id": "e", "cmd": "true", "tags": "unit"}], "tags"),
+            ):
+                manifest.write_text(json.dumps(commands), encoding="utf-8")
+                with self.assertRaisesRegex(ValueError, message):
+                    rcwe.load_batch(manifest)
+
+            marker = base / "marker"
+            manifest.write_text(
+                json.dumps(
+                    {
+                        "commands": [
+                            {"id": "check", "cmd": f"test -f {marker}", "depends_on": "make", "tags": ["unit"]},
+                            {"id": "make", "cmd": f"sleep 0.2; touch {marker}"},
+                            {"id": "fail", "cmd": "exit 3"},
+                        ]
+                    }
+                ),
+                encoding="utf-8",
+            )
+            log = base / "raw.jsonl"
+            outputs = base / "out"
+            outputs.mkdir()
+            summary = rcwe.run_batch(rcwe.load_batch(manifest), log, outputs, base, jobs=3, capture="interleaved")
+
+            states = {item["id"]: (item["status"], item["exit_code"]) for item in summary["commands"]}
+            self.assertEqual(states, {"check": ("passed", 0), "make": ("passed", 0), "fail": ("failed", 3)})
+            records = {record["batch_id"]: record for record in read_log(log)}
+            self.assertEqual(records["check"]["tags"], ["unit"])
+            self.assertGreaterEqual(records["check"]["started_at"], records["make"]["ended_at"])
+            self.assertTrue(common.parse_raw_command_log(log)["valid"])
+
+    def test_run_one_streams_output_and_hashes_inline(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            record = rcwe.run_one("printf 'out\\n'; printf 'err\\n' >&2", base, base, capture="separate", echo=False)
+            self.assertEqual(record["exit_code"], 0)
+            out, err = Path(record["output_file"]), Path(record["stderr_file"])
+            self.assertEqual(out.read_bytes(), b"out\n")
+            self.assertEqual(err.read_bytes(), b"err\n")
+            self.assertEqual(record["output_sha256"], hashlib.sha256(b"out\n").hexdigest())
+            self.assertEqual((record["output_bytes"], record["stderr_bytes"]), (4, 4))
+            self.assertEqual(record["stderr_sha256"], hashlib.sha256(b"err\n").hexdigest())
+
+            # Same command again claims a fresh output file instead of overwriting.
+            again = rcwe.run_one("printf 'out\\n'; printf 'err\\n' >&2", base, base, capture="separate", echo=False)
+            self.assertNotEqual(again["output_file"], record["output_file"])
+
+            slow = rcwe.run_one("echo start; sleep 5", base, base, timeout=0.3, echo=False)
+            self.assertTrue(slow["timed_out"])
+            self.assertNotEqual(slow["exit_code"], 0)
+            self.assertLess(slow["duration_ms"], 4000)
+            self.assertEqual(Path(slow["output_file"]).read_bytes(), b"start\n")
+
+    def test_rusage_records_feed_the_resource_summary(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            log = base / "raw.jsonl"
+            busy = "python3 -c \"sum(range(2000000))\""
+            for cmd in ("true", busy):
+                rcwe.append_log(log, rcwe.run_one(cmd, base, base, echo=False, rusage=True, sample_memory_ms=5))
+
+            records = read_log(log)
+            self.assertEqual(set(records[1]["rusage"]), set(common.RUSAGE_FIELDS))
+            self.assertGreater(records[1]["rusage"]["max_rss_kb"], 0)
+
+            summary = common.parse_raw_command_log(log)["resource_summary"]
+            self.assertEqual(summary["record_count"], 2)
+            self.assertEqual(summary["max_cpu_cmd"], busy)
+            cpu_total = sum(r["rusage"]["user_cpu_ms"] for r in records)
+            self.assertEqual(summary["user_cpu_ms_total"], cpu_total)
+
+            with log.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps({**records[0], "rusage": {"user_cpu_ms": "1"}}) + "\n")
+            parsed = common.parse_raw_command_log(log)
+            self.assertEqual(parsed["invalid_lines"], [{"line": 3, "reason": "invalid_rusage"}])
+
+    def test_store_deduplicates_compressed_outputs_by_content(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            first = rcwe.run_one("echo same", base, base, echo=False, store="gzip")
+            second = rcwe.run_one("echo same", base, base, echo=False, store="gzip")
+            other = rcwe.run_one("echo other", base, base, echo=False, store="lzma")
+
+            stored = Path(first["output_file"])
+            self.assertEqual(second["output_file"], first["output_file"])
+            self.assertEqual(stored, common.store_object_path(base / common.OUTPUT_STORE_DIR, first["output_sha256"], "gzip"))
+            self.assertTrue(common.is_store_object(stored))
+            self.assertEqual(first["output_store"], "gzip")
+            with common.open_evidence(stored) as handle:
+                self.assertEqual(handle.read(), b"same\n")
+            self.assertEqual(common.sha256_file(stored), first["output_sha256"])
+            self.assertEqual(common.sha256_file(Path(other["output_file"])), hashlib.sha256(b"other\n").hexdigest())
+            self.assertEqual(list((base / common.OUTPUT_STORE_DIR / "tmp").iterdir()), [])
+            self.assertEqual(list(base.glob("*.log")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import evidence_integrity_common as common  # noqa: E402
+import validate_terminal_artifacts as vta  # noqa: E402
+
+
+def _explode(version: str, **kwargs: object) -> dict:
+    raise RuntimeError(f"cannot validate {version}")
+
+
+class TestValidateTerminalArtifacts(unittest.TestCase):
+    def test_boundaries_markers_and_vanished_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "boundaries.md"
+            path.write_text("## 2. In Scope\n## 3. Out of Scope\n```\n## 5. Done 边界\n```\n", encoding="utf-8")
+            reasons: list[str] = []
+            details: dict = {}
+            vta._validate_boundaries(path, reasons, details)
+            self.assertEqual(reasons, ["boundaries_schema_invalid"])
+            self.assertEqual(details["boundaries_missing_markers"], ["## 5. Done 边界", "## 6. Blocked 条件", "## 8. 输出产物"])
+
+            reasons, details = [], {}
+            with mock.patch.object(vta, "load_markdown", return_value=None):
+                vta._validate_boundaries(path, reasons, details)
+            self.assertEqual(reasons, ["boundaries_missing"])
+            self.assertFalse(details["boundaries_exists"])
+
+    def test_multi_version_aggregate_and_no_match_exit_code(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            for name in ("v1.0.0", "v1.1.0"):
+                (root / "docs" / "product" / name).mkdir(parents=True)
+            versions = common.discover_versions(root)
+            aggregate = common.run_versions(vta._version_summary, versions, 2, root=root)
+            self.assertEqual(aggregate["status"], "Blocked")
+            self.assertEqual(aggregate["blocked_versions"], versions)
+            self.assertIn("boundaries_missing", aggregate["versions"]["v1.1.0"]["reason_codes"])
+
+            failed = common.run_versions(_explode, ["v1.0.0"], 1)
+            self.assertEqual(failed["versions"]["v1.0.0"]["reason_codes"], ["worker_error"])
+            self.assertEqual(common.run_versions(_explode, [], 1)["status"], "Blocked")
+
+        proc = subprocess.run(
+            [sys.executable, str(ROOT / "scripts" / "validate_terminal_artifacts.py"), "--versions", "v0.0.*"],
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(proc.returncode, 3)
+        self.assertEqual(json.loads(proc.stdout)["reason_codes"], ["no_versions_matched"])
+
+
+if __name__ == "__main__":
+    unittest.main()
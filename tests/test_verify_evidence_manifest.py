@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPT = ROOT / "scripts" / "verify_evidence_manifest.py"
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import evidence_integrity_common as common  # noqa: E402
+
+
+def verify(*args: str) -> tuple[int, dict]:
+    proc = subprocess.run([sys.executable, str(SCRIPT), *args], capture_output=True, text=True)
+    return proc.returncode, json.loads(proc.stdout)
+
+
+class TestVerifyEvidenceManifest(unittest.TestCase):
+    def test_class_verification_reports_missing_subtree(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            items = []
+            for name, cls in (("report.md", "reports"), ("run.log", "logs")):
+                path = base / name
+                path.write_text(f"{name}\n", encoding="utf-8")
+                items.append({"path": str(path), "sha256": hashlib.sha256(path.read_bytes()).hexdigest(), "class": cls})
+            manifest = {"schema_version": common.MANIFEST_SCHEMA_MERKLE, "items": items, "merkle": common.build_merkle(items)}
+            manifest_path = base / "manifest.json"
+            manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+            cache = base / "cache" / "sha256.json"
+
+            code, payload = verify("--manifest", str(manifest_path), "--class", "reports", "--cache", str(cache))
+            self.assertEqual((code, payload["status"], payload["verified_count"]), (0, "Pass", 1))
+            self.assertIn(str(base / "report.md"), json.loads(cache.read_text(encoding="utf-8"))["entries"])
+
+            (base / "run.log").write_text("tampered\n", encoding="utf-8")
+            code, payload = verify("--manifest", str(manifest_path), "--class", "logs", "--no-cache")
+            self.assertEqual((code, payload["mismatched"]), (2, [str(base / "run.log")]))
+
+            del manifest["merkle"]["classes"]["logs"]
+            manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+            code, payload = verify("--manifest", str(manifest_path), "--class", "logs", "--no-cache")
+            self.assertEqual(code, 2)
+            self.assertIn("subtree_missing:logs", payload["tree_problems"])
+            self.assertIn("class_mismatch:logs", payload["tree_problems"])
+
+
+if __name__ == "__main__":
+    unittest.main()